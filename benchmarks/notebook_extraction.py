@@ -0,0 +1,103 @@
+# Notebook extraction benchmark for the dataset pipeline.
+# Generates notebooks with list-of-lines sources and large base64 image
+# outputs, then compares the old nbformat path (parse, convert to
+# NotebookNode, keep code cells) with RepoProcessor._process_notebook, which
+# cuts the outputs out of the raw bytes and parses only what is left.
+# python benchmarks/notebook_extraction.py --notebooks 200 --image-kb 512
+
+import os
+import sys
+import json
+import base64
+import random
+import argparse
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src", "data"))
+
+NOTEBOOKS = 100
+CELLS = 40
+IMAGE_KB = 256
+RUNS = 3
+
+
+def MakeNotebook(rng, cells=CELLS, image_kb=IMAGE_KB):
+    """Serialized v4 notebook alternating markdown and code cells with image outputs."""
+    notebook_cells = []
+    for index in range(cells):
+        lines = [f"value_{index}_{line} = {rng.random()!r}\n" for line in range(rng.randint(3, 20))]
+        if index % 4 == 0:
+            notebook_cells.append({"cell_type": "markdown", "metadata": {}, "source": ["# Section\n", "Some text"]})
+            continue
+        image = base64.b64encode(rng.randbytes(image_kb * 1024) if hasattr(rng, "randbytes")
+                                 else os.urandom(image_kb * 1024)).decode("ascii")
+        notebook_cells.append({
+            "cell_type": "code",
+            "execution_count": index,
+            "metadata": {},
+            "source": lines,
+            "outputs": [
+                {"output_type": "stream", "name": "stdout", "text": ["done\n"]},
+                {"output_type": "display_data", "metadata": {}, "data": {"image/png": image, "text/plain": ["<Figure>"]}},
+            ],
+        })
+    notebook = {
+        "cells": notebook_cells,
+        "metadata": {"kernelspec": {"name": "python3", "display_name": "Python 3", "language": "python"}},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    return json.dumps(notebook, indent=1).encode("utf-8")
+
+
+def NbformatExtract(content):
+    """The extraction RepoProcessor used before, kept here as the baseline."""
+    from nbformat import reads, NO_CONVERT
+    notebook = reads(content.decode("utf-8"), NO_CONVERT)
+    code_cells = [c for c in notebook["cells"] if c["cell_type"] == "code"]
+    return "\n".join(c["source"] for c in code_cells
+                     if not (c["source"].startswith("!") or "%%capture" in c["source"]))
+
+
+def TimeExtractor(extract, notebooks, runs=RUNS):
+    """Best wall time of extracting every notebook, over several runs."""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        for content in notebooks:
+            extract(content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(count=NOTEBOOKS, image_kb=IMAGE_KB, runs=RUNS):
+    from prepare_dataset import RepoProcessor
+
+    rng = random.Random(0)
+    notebooks = [MakeNotebook(rng, image_kb=image_kb) for _ in range(count)]
+    total_mb = sum(len(content) for content in notebooks) / 1e6
+    processor = RepoProcessor(REPO_ROOT)
+
+    for content in notebooks[:5]:
+        assert processor._process_notebook(content) == NbformatExtract(content), "extractors disagree"
+
+    print(f"{count} notebooks, {total_mb:.1f} MB, best of {runs} runs")
+    results = {}
+    for name, extract in (("nbformat", NbformatExtract), ("streaming", processor._process_notebook)):
+        seconds = TimeExtractor(extract, notebooks, runs)
+        results[name] = seconds
+        print(f"{name:<10} {seconds:8.3f} s {count / seconds:10.1f} notebooks/s {total_mb / seconds:10.1f} MB/s")
+    print(f"speed-up   {results['nbformat'] / results['streaming']:8.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark notebook code extraction")
+    parser.add_argument("--notebooks", type=int, default=NOTEBOOKS, help="Number of notebooks to generate")
+    parser.add_argument("--image-kb", type=int, default=IMAGE_KB, help="Size of each embedded image output")
+    parser.add_argument("--runs", type=int, default=RUNS, help="Runs per extractor; the best is reported")
+    args = parser.parse_args()
+
+    main(args.notebooks, args.image_kb, args.runs)
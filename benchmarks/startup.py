@@ -0,0 +1,89 @@
+# Startup-time benchmark for the README generator scripts.
+# Measures how long `python <script> --help` and a bare `import <script>` take
+# for each script, as the median of several fresh interpreter runs. Pass
+# --baseline-ref to time the same commands against an older commit, extracted
+# with `git archive`, and print the speed-up.
+# python benchmarks/startup.py --baseline-ref <commit>
+
+import os
+import sys
+import tarfile
+import argparse
+import tempfile
+import statistics
+import subprocess
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = ("gemini", "openai_gpt", "mistral")
+RENAMED = {"openai_gpt": "openai"}  # Names the scripts had in older commits
+RUNS = 5
+
+
+def TimeCommand(command, cwd, runs=RUNS):
+    """Median wall time of a command over several runs, or None if it fails."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=cwd, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            return None
+        timings.append(elapsed)
+    return statistics.median(timings)
+
+
+def MeasureTree(scripts_dir, runs=RUNS):
+    """Time --help and import for every script in a scripts directory."""
+    results = {}
+    for name in SCRIPTS:
+        script = name
+        if not os.path.exists(os.path.join(scripts_dir, f"{name}.py")):
+            script = RENAMED.get(name, name)
+        results[f"{name} --help"] = TimeCommand([sys.executable, f"{script}.py", "--help"], scripts_dir, runs)
+        results[f"import {name}"] = TimeCommand([sys.executable, "-c", f"import {script}"], scripts_dir, runs)
+    return results
+
+
+def ExtractScripts(ref, destination):
+    """Write the scripts directory of a git ref into destination."""
+    archive = subprocess.run(["git", "archive", "--format=tar", ref, "scripts"], cwd=REPO_ROOT,
+                             check=True, capture_output=True).stdout
+    archive_path = os.path.join(destination, "scripts.tar")
+    with open(archive_path, "wb") as f:
+        f.write(archive)
+    with tarfile.open(archive_path) as tar:
+        tar.extractall(destination)
+    return os.path.join(destination, "scripts")
+
+
+def FormatSeconds(seconds):
+    return "failed" if seconds is None else f"{seconds * 1000:8.1f} ms"
+
+
+def main(baseline_ref=None, runs=RUNS):
+    current = MeasureTree(os.path.join(REPO_ROOT, "scripts"), runs)
+    baseline = None
+    if baseline_ref:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            baseline = MeasureTree(ExtractScripts(baseline_ref, temp_dir), runs)
+
+    print(f"{'command':<20} {'current':>12}" + (f" {baseline_ref[:12]:>12} {'speed-up':>9}" if baseline else ""))
+    for command, seconds in current.items():
+        line = f"{command:<20} {FormatSeconds(seconds):>12}"
+        if baseline:
+            before = baseline[command]
+            speedup = f"{before / seconds:8.1f}x" if before and seconds else "       -"
+            line += f" {FormatSeconds(before):>12} {speedup:>9}"
+        print(line)
+    return current, baseline
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark startup time of the README generator scripts")
+    parser.add_argument("--baseline-ref", help="Git ref to compare against, e.g. a commit before lazy loading")
+    parser.add_argument("--runs", type=int, default=RUNS, help="Runs per command; the median is reported")
+    args = parser.parse_args()
+
+    main(args.baseline_ref, args.runs)
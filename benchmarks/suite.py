@@ -0,0 +1,371 @@
+# Benchmark suite for the extraction and README generation hot paths.
+# A deterministic synthetic repository (see synthetic_repo.py) is generated
+# once, then every benchmark runs in a fresh interpreter so peak RSS and I/O
+# counters belong to it alone. Generation uses a fake LLM backend, so no
+# network or API key is involved. Each benchmark runs in several interpreters,
+# taking turns with the others so a burst of machine noise does not land on
+# one benchmark only. The suite reports the median throughput over all runs,
+# peak RSS, the read/write syscalls and
+# bytes read from /proc/self/io during one run, and the directory listings and
+# stats of one more, instrumented run, which /proc/self/io does not count.
+# Results are compared with baseline.json and the suite exits non-zero on a
+# regression.
+# python benchmarks/suite.py [--update-baseline] [--only process_repository]
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import statistics
+import subprocess
+
+from synthetic_repo import GenerateRepository
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "scripts"))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src", "data"))
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+RUNS = 7  # Timed runs per interpreter
+PROCESSES = 5  # Interpreters per benchmark; the median is taken over all their runs
+TOLERANCE = 0.25  # Allowed relative slowdown of the median, RSS growth or syscall growth
+SYSCALL_SLACK = 64  # Absolute syscall noise ignored on top of the tolerance
+REPOSITORY_OPTIONS = {
+    "files": 6000,
+    "depth": 5,
+    "notebook_share": 0.05,
+    "binary_share": 0.1,
+    "file_bytes": 4096,
+    "seed": 0,
+}
+
+
+class FakeGeminiModel:
+    """Stands in for the Gemini client: answers instantly with text derived from the prompt."""
+
+    class Response:
+        def __init__(self, text):
+            self.text = text
+
+    def generate_content(self, prompt):
+        return self.Response(f"# README\n\nGenerated from {len(prompt)} characters.\n")
+
+
+class FakeChatModel:
+    """Stands in for an async LangChain model."""
+
+    async def ainvoke(self, messages):
+        return f"Notes on {sum(len(message.content) for message in messages)} characters."
+
+
+def UnlimitedRateLimits(*providers):
+    """Lift the provider quotas so the fake backend is never throttled."""
+    import rate_limiter
+    for provider in providers:
+        rate_limiter.PROVIDER_LIMITS[provider] = (10 ** 9, None)
+
+
+def EstimateTokens(text):
+    """Offline, deterministic token count, so the benchmark never downloads a tokenizer."""
+    from repo_reader import CHARS_PER_TOKEN
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+# Each setup function takes the repository path and returns (run, units, unit):
+# run() is the timed callable and processes `units` of `unit` per call.
+
+def SetupProcessRepository(repo_path):
+    from prepare_dataset import RepoProcessor
+    processor = RepoProcessor(os.path.dirname(repo_path))
+    units = len(processor.process_repository(repo_path)[0])
+    return lambda: processor.process_repository(repo_path), units, "entries"
+
+
+def SetupReadRepositoryContents(repo_path):
+    import mistral
+    units = sum(len(text) for _, text in mistral.ReadRepositoryContents(repo_path, digest=False))
+    return lambda: mistral.ReadRepositoryContents(repo_path, digest=False), units, "bytes"
+
+
+def SetupDigest(repo_path):
+    import mistral
+    from digest import DigestRepository
+    repo_files = mistral.ReadRepositoryContents(repo_path, digest=False)
+    units = sum(len(text) for _, text in repo_files)
+    return lambda: DigestRepository(repo_files), units, "bytes"
+
+
+def SetupGetImportantFiles(repo_path):
+    import gemini
+    return lambda: gemini.GetImportantFiles(repo_path), 1, "repos"
+
+
+def SetupChunking(repo_path):
+    import mistral
+    from chunking import PackChunks
+    repo_files = mistral.ReadRepositoryContents(repo_path, digest=False)
+    budget = mistral.CONTEXT_WINDOW - mistral.MAX_NEW_TOKENS - EstimateTokens(
+        mistral.SYSTEM_PROMPT + mistral.PROMPT_TEMPLATE.format(chunk=""))
+    units = sum(len(text) for _, text in repo_files)
+    return lambda: PackChunks(repo_files, budget, EstimateTokens), units, "bytes"
+
+
+def SetupGenerateGemini(repo_path):
+    import gemini
+    from providers import SetClient
+    UnlimitedRateLimits("gemini")
+    SetClient("gemini", FakeGeminiModel())
+    runs = iter(range(10 ** 9))
+
+    def Run():
+        # A per-run marker makes every request miss the response cache.
+        contents = gemini.ReadRepositoryContents(repo_path) + f"\n<!-- run {next(runs)} -->"
+        return gemini.GenerateReadme(contents)
+    return Run, 1, "repos"
+
+
+def SetupGenerateMistral(repo_path):
+    import mistral
+    import langchain.schema  # noqa: F401  The prompt messages need LangChain.
+    UnlimitedRateLimits("huggingface")
+    mistral.GetTokenCounter = lambda model: EstimateTokens
+    model = FakeChatModel()
+    runs = iter(range(10 ** 9))
+
+    def Run():
+        repo_files = mistral.ReadRepositoryContents(repo_path) + [("run", str(next(runs)))]
+        return mistral.GenerateReadme(repo_files, model)
+    return Run, 1, "repos"
+
+
+BENCHMARKS = {
+    "process_repository": SetupProcessRepository,
+    "read_repository_contents": SetupReadRepositoryContents,
+    "digest": SetupDigest,
+    "get_important_files": SetupGetImportantFiles,
+    "chunking": SetupChunking,
+    "generate_gemini": SetupGenerateGemini,
+    "generate_mistral": SetupGenerateMistral,
+}
+
+
+class _CountedEntry:
+    """A DirEntry whose first stat() is counted; its type checks use the listing's d_type and are free."""
+
+    def __init__(self, entry, counts):
+        self._entry = entry
+        self._counts = counts
+        self._stated = False
+
+    def __getattr__(self, name):
+        return getattr(self._entry, name)
+
+    def __fspath__(self):
+        return self._entry.path
+
+    def stat(self, *, follow_symlinks=True):
+        if not self._stated:
+            self._stated = True
+            self._counts["stats"] += 1
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+
+class _CountedScandir:
+    def __init__(self, iterator, counts):
+        self._iterator = iterator
+        self._counts = counts
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return _CountedEntry(next(self._iterator), self._counts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._iterator.close()
+
+
+class DirectoryOpCounter:
+    """Count directory listings (open, getdents, close) and stats while active.
+
+    os.scandir and os.listdir are listings. os.stat and os.lstat, which
+    os.path goes through as well, and the first stat() of a DirEntry are
+    stats. The wrappers cost time, so only an untimed run is counted.
+    """
+
+    def __init__(self):
+        self.counts = {"listings": 0, "stats": 0}
+        self._originals = {}
+
+    def _wrap(self, name, kind, wrap_result=None):
+        original = self._originals[name] = getattr(os, name)
+        counts = self.counts
+
+        def counted(*args, **kwargs):
+            counts[kind] += 1
+            result = original(*args, **kwargs)
+            return wrap_result(result, counts) if wrap_result else result
+        setattr(os, name, counted)
+
+    def __enter__(self):
+        self._wrap("scandir", "listings", _CountedScandir)
+        self._wrap("listdir", "listings")
+        self._wrap("stat", "stats")
+        self._wrap("lstat", "stats")
+        return self
+
+    def __exit__(self, *exc_info):
+        for name, original in self._originals.items():
+            setattr(os, name, original)
+
+
+def ReadIoCounters():
+    """Read and write syscall counts and bytes read by this process, from /proc/self/io."""
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(":") for line in f if ":" in line)
+        return {name: int(value) for name, value in counters.items()}
+    except OSError:
+        return None
+
+
+def RunBenchmark(name, repo_path, runs=RUNS):
+    """Run one benchmark in this process and return its measurements."""
+    try:
+        run, units, unit = BENCHMARKS[name](repo_path)
+    except ImportError as e:
+        return {"name": name, "skipped": f"missing dependency: {e.name}"}
+
+    before = ReadIoCounters()
+    timings = []
+    for index in range(runs):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+        if index == 0:
+            after = ReadIoCounters()
+
+    result = {
+        "name": name,
+        "timings": timings,
+        "units": units,
+        "unit": f"{unit}/s",
+        # ru_maxrss is in kilobytes on Linux.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    if before and after:
+        result["syscalls"] = (after["syscr"] - before["syscr"]) + (after["syscw"] - before["syscw"])
+        result["read_bytes"] = after["rchar"] - before["rchar"]
+    with DirectoryOpCounter() as counter:
+        run()
+    result.update(counter.counts)
+    return result
+
+
+def RunIsolated(name, repo_path, runs, cache_dir):
+    """Run a benchmark in a fresh interpreter with its own response cache."""
+    env = dict(os.environ, README_CACHE_PATH=os.path.join(cache_dir, f"{name}.sqlite"))
+    command = [sys.executable, os.path.abspath(__file__), "--child", name, "--repo", repo_path, "--runs", str(runs)]
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"name": name, "error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def MergeResults(results):
+    """Combine one benchmark's results from several interpreters into medians over all runs."""
+    failed = [result for result in results if "timings" not in result]
+    if failed:
+        return failed[0]
+    timings = [seconds for result in results for seconds in result["timings"]]
+    merged = dict(results[0])
+    del merged["timings"], merged["units"]
+    # The median moves far less between invocations than the best run does.
+    merged["seconds"] = statistics.median(timings)
+    merged["best_seconds"] = min(timings)
+    merged["throughput"] = results[0]["units"] / merged["seconds"]
+    merged["peak_rss_mb"] = max(result["peak_rss_mb"] for result in results)
+    return merged
+
+
+def Regressions(result, baseline, tolerance=TOLERANCE):
+    """Describe how a result is worse than its baseline, if it is."""
+    problems = []
+    if "throughput" in baseline and result["throughput"] < baseline["throughput"] * (1 - tolerance):
+        problems.append(f"throughput {result['throughput']:.1f} < {baseline['throughput']:.1f} {result['unit']}")
+    if "peak_rss_mb" in baseline and result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        problems.append(f"peak RSS {result['peak_rss_mb']:.0f} > {baseline['peak_rss_mb']:.0f} MB")
+    for counter in ("syscalls", "listings", "stats"):
+        if counter in baseline and counter in result and \
+                result[counter] > baseline[counter] * (1 + tolerance) + SYSCALL_SLACK:
+            problems.append(f"{counter} {result[counter]} > {baseline[counter]}")
+    return problems
+
+
+def main(only=None, runs=RUNS, baseline_path=BASELINE_PATH, update_baseline=False, tolerance=TOLERANCE,
+         processes=PROCESSES):
+    names = only or list(BENCHMARKS)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        repo_path = os.path.join(temp_dir, "synthetic")
+        GenerateRepository(repo_path, **REPOSITORY_OPTIONS)
+        rounds = [[RunIsolated(name, repo_path, runs, temp_dir) for name in names] for _ in range(processes)]
+        results = [MergeResults(list(per_name)) for per_name in zip(*rounds)]
+
+    baseline = {}
+    if os.path.exists(baseline_path) and not update_baseline:
+        with open(baseline_path) as f:
+            stored = json.load(f)
+        if stored.get("repository") == REPOSITORY_OPTIONS:
+            baseline = stored["results"]
+        else:
+            print("Baseline was recorded for a different synthetic repository, not comparing")
+
+    failed = False
+    print(f"{'benchmark':<26} {'throughput':>22} {'peak RSS':>10} {'syscalls':>9} {'listings':>9} {'stats':>7}  status")
+    for result in results:
+        name = result["name"]
+        if "throughput" not in result:
+            print(f"{name:<26} {result.get('skipped') or result.get('error')}")
+            failed = failed or "error" in result
+            continue
+        problems = Regressions(result, baseline[name], tolerance) if name in baseline else []
+        failed = failed or bool(problems)
+        status = "REGRESSION: " + "; ".join(problems) if problems else ("ok" if name in baseline else "no baseline")
+        print(f"{name:<26} {result['throughput']:>12.1f} {result['unit']:<9} "
+              f"{result['peak_rss_mb']:>7.0f} MB {result.get('syscalls', '-'):>9} "
+              f"{result.get('listings', '-'):>9} {result.get('stats', '-'):>7}  {status}")
+
+    if update_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump({"repository": REPOSITORY_OPTIONS,
+                       "results": {r["name"]: r for r in results if "throughput" in r}}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {baseline_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the extraction and generation benchmarks")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--runs", type=int, default=RUNS, help="Timed runs per interpreter")
+    parser.add_argument("--processes", type=int, default=PROCESSES, help="Interpreters per benchmark")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline results to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Record these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Allowed relative regression")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--repo", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(RunBenchmark(args.child, args.repo, args.runs)))
+        sys.exit(0)
+    sys.exit(main(args.only, args.runs, args.baseline, args.update_baseline, args.tolerance, args.processes))
@@ -0,0 +1,151 @@
+# Deterministic synthetic repository generator for the benchmarks.
+# The same seed and options always produce byte-identical trees: a nested
+# package layout with manifests, entry points, READMEs, source files, tests,
+# notebooks with embedded image outputs, binary assets and a vendored
+# node_modules directory that the readers are expected to prune.
+# python benchmarks/synthetic_repo.py /tmp/synthetic --files 2000 --depth 5
+
+import os
+import json
+import base64
+import random
+import argparse
+
+FILES = 1000
+DEPTH = 4
+NOTEBOOK_SHARE = 0.05
+BINARY_SHARE = 0.1
+FILE_BYTES = 4096  # Mean size of generated text files
+SEED = 0
+
+SOURCE_EXTENSIONS = (".py", ".py", ".js", ".ts", ".go", ".md", ".json", ".txt")
+BINARY_EXTENSIONS = (".png", ".jpg", ".bin", ".so")
+WORDS = (
+    "data", "model", "client", "config", "request", "response", "parse", "load", "save", "user",
+    "token", "cache", "index", "value", "result", "error", "stream", "buffer", "record", "batch",
+)
+ROOT_FILES = {
+    "README.md": "# Synthetic project\n\nA generated repository used for benchmarks.\n",
+    "LICENSE": "MIT License\n\nPermission is hereby granted, free of charge, to any person.\n",
+    "setup.py": "from setuptools import setup\n\nsetup(name='synthetic', version='0.1')\n",
+    "requirements.txt": "requests\nnumpy\n",
+    "package.json": '{"name": "synthetic", "version": "0.1.0"}\n',
+    "Dockerfile": "FROM python:3.11-slim\nCOPY . /app\n",
+    "main.py": "from app import run\n\nif __name__ == '__main__':\n    run()\n",
+}
+
+
+def RandomBytes(rng, size):
+    return rng.getrandbits(8 * size).to_bytes(size, "little") if size else b""
+
+
+def SourceText(rng, size, extension):
+    """Plausible-looking source lines adding up to roughly size bytes."""
+    lines = []
+    used = 0
+    while used < size:
+        a, b, c = rng.choice(WORDS), rng.choice(WORDS), rng.choice(WORDS)
+        if extension == ".py":
+            line = f"def {a}_{b}({c}):\n    return {c}.{a}({rng.randint(0, 999)})\n"
+        elif extension in (".js", ".ts"):
+            line = f"export function {a}{b.title()}({c}) {{ return {c}.{a}({rng.randint(0, 999)}); }}\n"
+        elif extension == ".go":
+            line = f"func {a.title()}{b.title()}({c} int) int {{ return {c} + {rng.randint(0, 999)} }}\n"
+        elif extension == ".json":
+            line = f'{{"{a}": "{b}", "{c}": {rng.randint(0, 999)}}}\n'
+        else:
+            line = f"The {a} {b} handles {c} number {rng.randint(0, 999)}.\n"
+        lines.append(line)
+        used += len(line)
+    return "".join(lines)
+
+
+def NotebookText(rng, size):
+    """A notebook whose code cells hold about size bytes, with a base64 image output per cell."""
+    cells = []
+    used = 0
+    while used < size:
+        source = SourceText(rng, 400, ".py")
+        image = base64.b64encode(RandomBytes(rng, 8 * 1024)).decode("ascii")
+        cells.append({"cell_type": "markdown", "metadata": {}, "source": ["## Step\n"]})
+        cells.append({
+            "cell_type": "code",
+            "execution_count": len(cells),
+            "metadata": {},
+            "source": source.splitlines(keepends=True),
+            "outputs": [{"output_type": "display_data", "metadata": {}, "data": {"image/png": image}}],
+        })
+        used += len(source)
+    notebook = {"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+    return json.dumps(notebook, indent=1)
+
+
+def FileSize(rng, mean):
+    """Exponentially distributed sizes, like real repositories: many small files, a few large ones."""
+    return max(16, int(rng.expovariate(1.0 / mean)))
+
+
+def GenerateRepository(path, files=FILES, depth=DEPTH, notebook_share=NOTEBOOK_SHARE,
+                       binary_share=BINARY_SHARE, file_bytes=FILE_BYTES, seed=SEED):
+    """Write a synthetic repository to path and return a summary of what was written."""
+    rng = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+
+    directories = [""]
+    for index in range(max(1, files // 20)):
+        parent = rng.choice([d for d in directories if not d or d.count(os.sep) < depth - 1])
+        name = "tests" if index % 7 == 0 else f"{rng.choice(WORDS)}_{index}"
+        directories.append(os.path.join(parent, name) if parent else name)
+    directories.append(os.path.join("node_modules", "dependency"))
+    for directory in directories:
+        os.makedirs(os.path.join(path, directory), exist_ok=True)
+
+    summary = {"files": 0, "bytes": 0, "notebooks": 0, "binaries": 0, "directories": len(directories)}
+    readme_directories = {""}
+
+    def Write(rel_path, data):
+        with open(os.path.join(path, rel_path), "wb") as f:
+            f.write(data)
+        summary["files"] += 1
+        summary["bytes"] += len(data)
+
+    for name, text in ROOT_FILES.items():
+        Write(name, text.encode("utf-8"))
+
+    for index in range(max(0, files - len(ROOT_FILES))):
+        directory = rng.choice(directories)
+        roll = rng.random()
+        if roll < notebook_share:
+            rel_path = os.path.join(directory, f"analysis_{index}.ipynb")
+            data = NotebookText(rng, FileSize(rng, file_bytes)).encode("utf-8")
+            summary["notebooks"] += 1
+        elif roll < notebook_share + binary_share:
+            rel_path = os.path.join(directory, f"asset_{index}{rng.choice(BINARY_EXTENSIONS)}")
+            data = RandomBytes(rng, FileSize(rng, file_bytes))
+            summary["binaries"] += 1
+        else:
+            extension = rng.choice(SOURCE_EXTENSIONS)
+            stem = "test_" if os.path.basename(directory) == "tests" else ""
+            if rng.random() < 0.02 and directory not in readme_directories:
+                readme_directories.add(directory)
+                rel_path = os.path.join(directory, "README.md")
+            else:
+                rel_path = os.path.join(directory, f"{stem}{rng.choice(WORDS)}_{index}{extension}")
+            data = SourceText(rng, FileSize(rng, file_bytes), extension).encode("utf-8")
+        Write(rel_path, data)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic repository")
+    parser.add_argument("path", help="Directory to write the repository to")
+    parser.add_argument("--files", type=int, default=FILES, help="Number of files")
+    parser.add_argument("--depth", type=int, default=DEPTH, help="Maximum directory depth")
+    parser.add_argument("--notebook-share", type=float, default=NOTEBOOK_SHARE, help="Fraction of notebooks")
+    parser.add_argument("--binary-share", type=float, default=BINARY_SHARE, help="Fraction of binary files")
+    parser.add_argument("--file-bytes", type=int, default=FILE_BYTES, help="Mean size of text files")
+    parser.add_argument("--seed", type=int, default=SEED, help="Random seed")
+    args = parser.parse_args()
+
+    print(json.dumps(GenerateRepository(args.path, args.files, args.depth, args.notebook_share,
+                                        args.binary_share, args.file_bytes, args.seed)))
@@ -0,0 +1,186 @@
+# Batch README generation.
+# Reads a file of repository URLs (one per line, '#' starts a comment) and runs
+# clone, read and generate as a pipeline of worker threads connected by bounded
+# queues. Clones, file reads and LLM calls for different repositories overlap.
+# One README is written per repository.
+# python batch.py repos.txt --provider gemini --output readmes
+
+import os
+import queue
+import shutil
+import logging
+import argparse
+import tempfile
+import importlib
+import threading
+import time
+from repo_clone import CloneRepository
+
+import bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Provider name -> script. The OpenAI script is not called openai.py, since the
+# scripts directory is on sys.path and that would shadow the OpenAI SDK.
+PROVIDERS = {"gemini": "gemini", "openai": "openai_gpt", "mistral": "mistral"}
+CLONE_WORKERS = 4
+READ_WORKERS = 2
+GENERATE_WORKERS = 4
+QUEUE_DEPTH = 2  # Items buffered between stages per downstream worker
+
+_DONE = object()
+
+
+def ReadRepositoryUrls(path):
+    """Read repository URLs from a file, skipping blank lines and comments."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def RepositoryName(repo_url):
+    """Turn https://github.com/owner/repo(.git) into owner__repo."""
+    repo_url = repo_url.rstrip('/')
+    if repo_url.endswith('.git'):
+        repo_url = repo_url[:-len('.git')]
+    parts = repo_url.split('/')
+    return '__'.join(parts[-2:])
+
+
+class Pipeline:
+    """Clone -> read -> generate stages running concurrently across repositories."""
+
+    def __init__(self, provider, output_dir, clone_workers=CLONE_WORKERS, read_workers=READ_WORKERS,
+                 generate_workers=GENERATE_WORKERS, checkout_root=None, no_checkout=False):
+        self.provider = provider
+        self.output_dir = output_dir
+        self.checkout_root = checkout_root
+        # Checkouts under a given root are kept, so the next run fetches into them.
+        self.keep_checkouts = checkout_root is not None
+        self.no_checkout = no_checkout
+        self.workers = {"clone": clone_workers, "read": read_workers, "generate": generate_workers}
+        self.failures = {}
+        self.timings = {"clone": 0.0, "read": 0.0, "generate": 0.0}
+        self._lock = threading.Lock()
+
+    def _Clone(self, item):
+        item["path"] = os.path.join(self.checkout_root, item["name"])
+        CloneRepository(item["url"], item["path"], no_checkout=self.no_checkout)
+        return item
+
+    def _Read(self, item):
+        try:
+            item["contents"] = self.provider.ReadRepositoryContents(item["path"])
+        finally:
+            # The checkout is not needed once its contents are in memory.
+            if not self.keep_checkouts:
+                shutil.rmtree(item["path"], ignore_errors=True)
+        return item
+
+    def _Generate(self, item):
+        readme_content = self.provider.GenerateReadme(item["contents"])
+        output_file = os.path.join(self.output_dir, item["name"], "README.md")
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        with open(output_file, "w", encoding='utf-8') as f:
+            f.write(readme_content)
+        logger.info(f"README for {item['url']} written to {output_file}")
+        return item
+
+    def _Worker(self, stage, func, inbox, outbox):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            start = time.monotonic()
+            try:
+                with metrics.span(f"batch_{stage}", repository=item["name"]):
+                    result = func(item)
+            except Exception as e:
+                logger.error(f"{stage} failed for {item['url']}: {e}")
+                metrics.increment("batch_failures", stage=stage)
+                with self._lock:
+                    self.failures[item["url"]] = f"{stage}: {e}"
+                continue
+            finally:
+                with self._lock:
+                    self.timings[stage] += time.monotonic() - start
+            if outbox is not None:
+                outbox.put(result)
+
+    def _StartStage(self, stage, func, inbox, outbox):
+        threads = [
+            threading.Thread(target=self._Worker, args=(stage, func, inbox, outbox), name=f"{stage}-{i}", daemon=True)
+            for i in range(self.workers[stage])
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def Run(self, repo_urls):
+        """Generate READMEs for all URLs and return {url: error} for the ones that failed."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Bounded queues apply backpressure, so fast clones cannot fill the disk
+        # while the LLM stage is the bottleneck.
+        clone_queue = queue.Queue()
+        read_queue = queue.Queue(maxsize=self.workers["read"] * QUEUE_DEPTH)
+        generate_queue = queue.Queue(maxsize=self.workers["generate"] * QUEUE_DEPTH)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.checkout_root = self.checkout_root or temp_dir
+            stages = [
+                ("clone", self._Clone, clone_queue, read_queue),
+                ("read", self._Read, read_queue, generate_queue),
+                ("generate", self._Generate, generate_queue, None),
+            ]
+            threads = {stage: self._StartStage(stage, func, inbox, outbox) for stage, func, inbox, outbox in stages}
+
+            for repo_url in repo_urls:
+                clone_queue.put({"url": repo_url, "name": RepositoryName(repo_url)})
+
+            # Shut the stages down in order, once the previous stage has drained.
+            for stage, _, inbox, _ in stages:
+                for _ in threads[stage]:
+                    inbox.put(_DONE)
+                for thread in threads[stage]:
+                    thread.join()
+
+        return self.failures
+
+
+def main(urls_file, provider_name, output_dir, **options):
+    provider = importlib.import_module(PROVIDERS[provider_name])
+    repo_urls = ReadRepositoryUrls(urls_file)
+    logger.info(f"Generating READMEs for {len(repo_urls)} repositories with {provider_name}")
+
+    start = time.monotonic()
+    pipeline = Pipeline(provider, output_dir, **options)
+    failures = pipeline.Run(repo_urls)
+
+    busy = ', '.join(f"{stage} {seconds:.1f}s" for stage, seconds in pipeline.timings.items())
+    logger.info(f"Generated {len(repo_urls) - len(failures)}/{len(repo_urls)} READMEs in "
+                f"{time.monotonic() - start:.1f}s (worker time: {busy})")
+    for repo_url, error in failures.items():
+        logger.error(f"Failed: {repo_url} ({error})")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate READMEs for a list of GitHub repositories")
+    parser.add_argument("urls_file", help="File with one repository URL per line")
+    parser.add_argument("--provider", choices=list(PROVIDERS), default="gemini", help="Model provider to use")
+    parser.add_argument("--output", default="readmes", help="Directory to write <owner>__<repo>/README.md into")
+    parser.add_argument("--clone-workers", type=int, default=CLONE_WORKERS)
+    parser.add_argument("--read-workers", type=int, default=READ_WORKERS)
+    parser.add_argument("--generate-workers", type=int, default=GENERATE_WORKERS)
+    parser.add_argument("--checkout-root",
+                        help="Keep the clones under this directory and update them in place on later runs")
+    parser.add_argument("--no-checkout", action="store_true",
+                        help="Clone without a worktree and read files from the git object store")
+    args = parser.parse_args()
+
+    metrics.export_at_exit()
+    failures = main(args.urls_file, args.provider, args.output, clone_workers=args.clone_workers,
+                    read_workers=args.read_workers, generate_workers=args.generate_workers,
+                    checkout_root=args.checkout_root, no_checkout=args.no_checkout)
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,11 @@
+# Makes the shared `common` package in src/ importable from the scripts.
+# Import this before `common` in any module that can be run or imported from
+# this directory: `import bootstrap  # noqa: F401`.
+
+import os
+import sys
+
+SRC_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+
+if os.path.abspath(SRC_DIRECTORY) not in map(os.path.abspath, sys.path):
+    sys.path.insert(0, os.path.abspath(SRC_DIRECTORY))
@@ -0,0 +1,116 @@
+# Token-aware chunk packing for the README generator scripts.
+# Files are measured with the target model's tokenizer, kept whole wherever they
+# fit, and bin-packed (first-fit decreasing) into as few context-sized chunks as
+# possible. Only files larger than a whole chunk are split, and then on line
+# boundaries.
+
+import logging
+from functools import lru_cache
+from repo_reader import CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+FILE_OVERHEAD_TOKENS = 8  # Slack per file for separators and tokenizer merges at boundaries
+
+
+@lru_cache(maxsize=None)
+def GetTokenCounter(model):
+    """Return a function counting tokens for the given model.
+
+    OpenAI models use tiktoken and Hugging Face models use their tokenizer from
+    the hub. If neither can be loaded, tokens are estimated from the length.
+    """
+    try:
+        import tiktoken
+        encoding = tiktoken.encoding_for_model(model)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        pass
+
+    try:
+        from tokenizers import Tokenizer
+        tokenizer = Tokenizer.from_pretrained(model)
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+    except Exception as e:
+        logger.warning(f"No tokenizer available for {model} ({e}), estimating tokens from length")
+        return lambda text: len(text) // CHARS_PER_TOKEN + 1
+
+
+def RenderFile(path, text):
+    """Format a file the way it appears inside a prompt."""
+    return f"File: {path}\n\n{text}\n"
+
+
+def SplitFile(path, text, max_tokens, count_tokens):
+    """Split an oversized file into line-aligned parts that each fit max_tokens."""
+    parts = []
+    lines = []
+    used = 0
+    part_number = 1
+    for line in text.splitlines(keepends=True):
+        line_tokens = count_tokens(line)
+        if line_tokens > max_tokens:
+            # A single huge line (minified code, data blobs) has to be cut by length.
+            step = max(1, len(line) * max_tokens // line_tokens)
+            pieces = [line[i:i + step] for i in range(0, len(line), step)]
+        else:
+            pieces = [line]
+
+        for piece in pieces:
+            piece_tokens = line_tokens if len(pieces) == 1 else count_tokens(piece)
+            if lines and used + piece_tokens > max_tokens:
+                parts.append((f"{path} (part {part_number})", ''.join(lines)))
+                part_number += 1
+                lines = []
+                used = 0
+            lines.append(piece)
+            used += piece_tokens
+
+    if lines:
+        parts.append((f"{path} (part {part_number})" if part_number > 1 else path, ''.join(lines)))
+    return parts
+
+
+def TruncateToTokens(text, max_tokens, count_tokens):
+    """Cut text at a line boundary (or mid-line if it must) so it counts at most max_tokens."""
+    tokens = count_tokens(text)
+    while tokens > max_tokens and text:
+        keep = max(0, min(len(text) - 1, len(text) * max_tokens // tokens))
+        cut = text.rfind("\n", 0, keep)
+        text = text[:cut if cut > keep // 2 else keep]
+        tokens = count_tokens(text)
+    return text
+
+
+def PackChunks(files, max_tokens, count_tokens):
+    """Bin-pack (path, text) files into the fewest chunks of at most max_tokens.
+
+    Returns a list of chunk strings. Files keep their original relative order
+    inside each chunk.
+    """
+    items = []
+    for path, text in files:
+        rendered = RenderFile(path, text)
+        tokens = count_tokens(rendered) + FILE_OVERHEAD_TOKENS
+        if tokens <= max_tokens:
+            items.append((tokens, len(items), rendered))
+            continue
+        header_tokens = count_tokens(RenderFile(path, "")) + FILE_OVERHEAD_TOKENS
+        for part_path, part_text in SplitFile(path, text, max_tokens - header_tokens, count_tokens):
+            rendered = RenderFile(part_path, part_text)
+            items.append((count_tokens(rendered) + FILE_OVERHEAD_TOKENS, len(items), rendered))
+
+    # First-fit decreasing: place the largest files first, each into the first chunk with room.
+    bins = []
+    for tokens, index, rendered in sorted(items, key=lambda item: (-item[0], item[1])):
+        for chunk in bins:
+            if chunk["tokens"] + tokens <= max_tokens:
+                break
+        else:
+            chunk = {"tokens": 0, "items": []}
+            bins.append(chunk)
+        chunk["tokens"] += tokens
+        chunk["items"].append((index, rendered))
+
+    bins.sort(key=lambda chunk: min(index for index, _ in chunk["items"]))
+    return ['\n'.join(rendered for _, rendered in sorted(chunk["items"])) for chunk in bins]
@@ -0,0 +1,366 @@
+# Compact repository digest for the README generator prompts.
+# Raw file contents spend most of their tokens on comments, license headers,
+# badges, indentation and repeated files. The digest keeps what a README author
+# needs: a compact file tree, the signatures and docstrings of source files,
+# manifests and docs with the noise stripped, and each distinct file only once.
+# Token savings are logged and recorded as metrics.
+
+import os
+import re
+import ast
+import json
+import hashlib
+import logging
+from repo_reader import CHARS_PER_TOKEN, SOURCE_EXTENSIONS, ENTRY_POINTS
+from chunking import RenderFile
+
+import bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
+
+logger = logging.getLogger(__name__)
+
+TREE_PATH = "(file tree)"  # Path under which the tree appears among the files
+MAX_TREE_CHARS = 2000  # Deeper directories are collapsed into file counts beyond this
+MAX_TREE_FILES = 12  # File names listed per directory, the rest are counted
+OUTLINE_MIN_LINES = 40  # Shorter source files are kept whole
+MAX_DOC_CHARS = 160  # Docstrings are cut to their first paragraph and this length
+MAX_VALUE_CHARS = 80  # Longest constant value shown in an outline
+MAX_MAIN_LINES = 30  # Lines of an `if __name__ == "__main__":` block kept in an outline
+MAX_LICENSE_LINES = 3  # A license file is reduced to its title and copyright lines
+MAX_REPARSES = 5  # Trailing top-level statements dropped from a Python file read only in part
+LICENSE_NAMES = ("license", "licence", "copying")
+
+NOTICE_PATTERN = re.compile(r"licen[cs]e|copyright|spdx-license-identifier|\(c\) \d{4}", re.IGNORECASE)
+COMMENT_PATTERN = re.compile(r"^\s*(#|//|/\*|\*|--)")
+LINE_COMMENT_PATTERN = re.compile(r"^\s*(#(?![a-z])|//|--)")  # Not C preprocessor lines
+BADGE_PATTERN = re.compile(r"^\s*(\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)\s*|!\[[^\]]*\]\(https?://[^)]*shields\.io[^)]*\)\s*)+$")
+CELL_PATTERN = re.compile(r'"cell_type":\s*"(\w+)"')
+SOURCE_KEY_PATTERN = re.compile(r'"source":\s*')
+HTML_COMMENT_PATTERN = re.compile(r"<!--.*?-->", re.DOTALL)
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+# Declarations worth keeping from languages without a parser here, one per line.
+DECLARATION_PATTERN = re.compile(
+    r"^\s*(?:(?:export|default|public|private|protected|internal|static|abstract|final|async|pub(?:\([a-z]+\))?"
+    r"|override|open|sealed|data|inline|extern|unsafe|const)\s+)*"
+    r"(?:function\*?|class|interface|enum|struct|trait|impl|fn|func|fun|def|type|module|namespace|object|record)\b"
+    r"|^\s*(?:(?:public|private|protected|internal|static|abstract|final|override|async|virtual)\s+)+"
+    r"[\w<>\[\],.? ]+\([^;=]*$"  # Methods
+    r"|^\s*export\s+(?:const|let|var)\b"
+    r"|^\s*module\.exports\b"
+    r"|^[A-Za-z_][\w\s\*&:<>,]*\b[A-Za-z_]\w*\s*\([^;]*\)\s*(?:const\s*)?\{?\s*$"  # C-family definitions
+)
+CONTROL_PATTERN = re.compile(r"^\s*(?:if|for|while|switch|catch|return|else|do|try)\b")
+TOP_LEVEL_PATTERN = re.compile(r"^(?=[^\s#)\]}])", re.MULTILINE)  # Lines that may start a top-level statement
+
+
+def EstimateTokens(text):
+    return len(text) // CHARS_PER_TOKEN
+
+
+def StripLicenseHeader(lines):
+    """Drop a leading comment block that is a license or copyright notice, with any shebang above it."""
+    start = 1 if lines and lines[0].startswith("#!") else 0
+    end = start
+    if end < len(lines) and lines[end].lstrip().startswith("/*"):
+        while end < len(lines) and "*/" not in lines[end]:
+            end += 1
+        end += 1
+    else:
+        while end < len(lines) and LINE_COMMENT_PATTERN.match(lines[end]):
+            end += 1
+    if end > start and NOTICE_PATTERN.search("\n".join(lines[start:end])):
+        return lines[end:]
+    return lines
+
+
+def StripNoise(path, text):
+    """Remove license headers, badges, HTML comments, trailing spaces and runs of blank lines."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".md", ".rst", ".html"):
+        text = HTML_COMMENT_PATTERN.sub("", text)
+    lines = [line.rstrip() for line in text.splitlines()]
+    if extension in SOURCE_EXTENSIONS:
+        lines = StripLicenseHeader(lines)
+    if extension in (".md", ".rst"):
+        lines = [line for line in lines if not BADGE_PATTERN.match(line)]
+    return BLANK_LINES_PATTERN.sub("\n\n", "\n".join(lines)).strip("\n")
+
+
+def _FirstParagraph(docstring):
+    paragraph = " ".join(docstring.strip().split("\n\n")[0].split())
+    return paragraph if len(paragraph) <= MAX_DOC_CHARS else paragraph[:MAX_DOC_CHARS - 3] + "..."
+
+
+def _Shorten(text, limit=MAX_VALUE_CHARS):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _OutlineFunction(node, indent, out):
+    for decorator in node.decorator_list:
+        out.append(f"{indent}@{_Shorten(ast.unparse(decorator))}")
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    out.append(f"{indent}{prefix} {node.name}({ast.unparse(node.args)}){returns}:")
+    docstring = ast.get_docstring(node)
+    if docstring:
+        out.append(f'{indent}  """{_FirstParagraph(docstring)}"""')
+
+
+def _OutlineClass(node, indent, out):
+    for decorator in node.decorator_list:
+        out.append(f"{indent}@{_Shorten(ast.unparse(decorator))}")
+    bases = [ast.unparse(base) for base in node.bases] + [ast.unparse(keyword) for keyword in node.keywords]
+    out.append(f"{indent}class {node.name}{'(' + ', '.join(bases) + ')' if bases else ''}:")
+    docstring = ast.get_docstring(node)
+    if docstring:
+        out.append(f'{indent}  """{_FirstParagraph(docstring)}"""')
+    for child in node.body:
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if not child.name.startswith("_") or child.name == "__init__":
+                _OutlineFunction(child, indent + "  ", out)
+        elif isinstance(child, ast.ClassDef) and not child.name.startswith("_"):
+            _OutlineClass(child, indent + "  ", out)
+
+
+def _IsMainGuard(node):
+    return isinstance(node, ast.If) and "__name__" in ast.unparse(node.test) and "__main__" in ast.unparse(node.test)
+
+
+def _ParsePython(text):
+    """Parse Python source, or only the statements before the cut if the file was read in part."""
+    ends = [len(text)] + [match.start() for match in TOP_LEVEL_PATTERN.finditer(text)][::-1][:MAX_REPARSES]
+    for end in ends:
+        try:
+            return ast.parse(text[:end]), text[:end]
+        except (SyntaxError, ValueError):
+            continue
+    return None, text
+
+
+def OutlinePython(text):
+    """Module docstring, imported packages, constants, and public signatures with docstrings."""
+    tree, text = _ParsePython(text)
+    if tree is None:
+        return None
+    out = []
+    docstring = ast.get_docstring(tree)
+    if docstring:
+        out.append(f'"""{_FirstParagraph(docstring)}"""')
+
+    packages = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        packages.extend(name.split(".")[0] for name in names)
+    if packages:
+        out.append(f"# imports: {', '.join(dict.fromkeys(packages))}")
+
+    lines = text.splitlines()
+    for node in tree.body:
+        if isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            if node.value is not None and all(isinstance(target, ast.Name) and target.id.isupper() for target in targets):
+                out.append(f"{' = '.join(target.id for target in targets)} = {_Shorten(ast.unparse(node.value))}")
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith("_"):
+            _OutlineFunction(node, "", out)
+        elif isinstance(node, ast.ClassDef) and not node.name.startswith("_"):
+            _OutlineClass(node, "", out)
+        elif _IsMainGuard(node):
+            block = lines[node.lineno - 1:node.end_lineno]
+            out.extend(block[:MAX_MAIN_LINES])
+            if len(block) > MAX_MAIN_LINES:
+                out.append("    ...")
+    return "\n".join(out)
+
+
+def _Signature(line):
+    """A declaration line without the body that follows its parameter list on the same line."""
+    start = line.find("(")
+    if start >= 0:
+        depth = 0
+        for index in range(start, len(line)):
+            depth += {"(": 1, ")": -1}.get(line[index], 0)
+            if depth == 0:
+                start = index
+                break
+    brace = line.find("{", max(start, 0))
+    return (line[:brace] if brace >= 0 else line).rstrip()
+
+
+def OutlineSource(text):
+    """Declaration lines of a C-family, Go, Rust, JVM, Ruby or shell file, each with the comment above it."""
+    out = []
+    comment = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if COMMENT_PATTERN.match(line):
+            words = stripped.lstrip("/*#-;! ").rstrip("*/ ")
+            if words and not words.startswith("@") and comment is None:
+                comment = words
+            continue
+        if stripped and DECLARATION_PATTERN.match(line) and not CONTROL_PATTERN.match(line):
+            if comment:
+                out.append(f"{line[:len(line) - len(line.lstrip())]}// {_Shorten(comment, MAX_DOC_CHARS)}")
+            out.append(_Signature(line))
+        comment = None
+    return "\n".join(out)
+
+
+def _ScanNotebook(text):
+    """(cell type, source) of the complete cells of a truncated notebook."""
+    decoder = json.JSONDecoder()
+    matches = list(CELL_PATTERN.finditer(text))
+    cells = []
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(text)
+        source = SOURCE_KEY_PATTERN.search(text, match.end(), end)
+        if source is None:
+            continue
+        try:
+            cells.append((match.group(1), decoder.raw_decode(text, source.end())[0]))
+        except ValueError:
+            break
+    return cells
+
+
+def ReadNotebook(text):
+    """Markdown and code cells of a notebook, without outputs or metadata."""
+    try:
+        notebook = [(cell.get("cell_type"), cell.get("source", [])) for cell in json.loads(text).get("cells", [])]
+    except (ValueError, AttributeError):
+        notebook = _ScanNotebook(text)
+    cells = []
+    for cell_type, source in notebook:
+        source = source if isinstance(source, str) else "".join(source)
+        if cell_type == "markdown":
+            cells.append("\n".join(f"# {line}" if line else "#" for line in source.splitlines()))
+        elif cell_type == "code":
+            cells.append(source)
+    return "\n\n".join(cell for cell in cells if cell.strip())
+
+
+def DigestFile(path, text):
+    """The compact form of one file, and whether it was reduced to an outline."""
+    name = os.path.basename(path)
+    stem, extension = os.path.splitext(name)
+    extension = extension.lower()
+    if extension == ".ipynb":
+        text = ReadNotebook(text)
+    elif extension == ".json":
+        try:
+            text = json.dumps(json.loads(text), separators=(",", ":"), ensure_ascii=False)
+        except ValueError:
+            pass
+    text = StripNoise(path, text)
+    if stem.lower().startswith(LICENSE_NAMES):
+        return "\n".join([line for line in text.splitlines() if line.strip()][:MAX_LICENSE_LINES]), False
+
+    # Short files and entry points read better whole; long sources shrink to their outline.
+    if extension not in SOURCE_EXTENSIONS or extension == ".ipynb" or stem.lower() in ENTRY_POINTS \
+            or text.count("\n") < OUTLINE_MIN_LINES:
+        return text, False
+    outline = OutlinePython(text) if extension == ".py" else OutlineSource(text)
+    if not outline or len(outline) >= len(text):
+        return text, False
+    return outline, True
+
+
+def RenderTree(paths, max_chars=MAX_TREE_CHARS, max_files=MAX_TREE_FILES):
+    """Render '/'-separated paths as an indented tree, one line of file names per directory.
+
+    Chains of single-directory folders are merged (src/pkg/), at most
+    max_files names are listed per directory, and if the tree is longer than
+    max_chars, the deepest directories are shown as file counts.
+    """
+    root = {}
+    for path in paths:
+        node = root
+        *directories, name = path.split("/")
+        for directory in directories:
+            node = node.setdefault(directory + "/", {})
+        node[name] = None
+
+    def count(node):
+        return sum(1 if child is None else count(child) for child in node.values())
+
+    def render(node, indent, depth, max_depth, out):
+        files = sorted(name for name, child in node.items() if child is None)
+        if len(files) > max_files:
+            files = files[:max_files] + [f"... ({len(files) - max_files} more)"]
+        if files:
+            out.append(indent + ", ".join(files))
+        for name in sorted(name for name, child in node.items() if child is not None):
+            child = node[name]
+            while len(child) == 1 and next(iter(child.values())) is not None:
+                only = next(iter(child))
+                name, child = name + only, child[only]
+            if depth >= max_depth:
+                out.append(f"{indent}{name} ({count(child)} files)")
+            else:
+                out.append(indent + name)
+                render(child, indent + " ", depth + 1, max_depth, out)
+        return out
+
+    max_depth = max((path.count("/") for path in paths), default=0)
+    tree = "\n".join(render(root, "", 0, max_depth, []))
+    while len(tree) > max_chars and max_depth > 0:
+        max_depth -= 1
+        tree = "\n".join(render(root, "", 0, max_depth, []))
+    return tree
+
+
+def DigestRepository(files, tree_paths=None, max_lines=None, baseline=None):
+    """Digest (relative path, text) pairs into a shorter list of pairs for the prompt.
+
+    The first pair is the file tree of tree_paths (by default the paths of the
+    files themselves). Identical files appear once, later copies only name the
+    first one. max_lines caps each digested file. Savings are measured against
+    baseline, the text the prompt would hold without the digest, which by
+    default is every file rendered whole.
+    """
+    with metrics.span("digest") as attributes:
+        files = list(files)
+        tree = RenderTree(tree_paths if tree_paths is not None else [path for path, _ in files])
+        digested = [(TREE_PATH, tree)] if tree else []
+        seen = {}
+        duplicates = outlined = 0
+        for path, text in files:
+            text, is_outline = DigestFile(path, text)
+            if not text:
+                continue
+            key = hashlib.sha1(text.encode("utf-8", errors="surrogatepass")).digest()
+            if key in seen:
+                digested.append((path, f"(identical to {seen[key]})"))
+                duplicates += 1
+                continue
+            seen[key] = path
+            outlined += is_outline
+            if max_lines is not None and text.count("\n") >= max_lines:
+                text = "\n".join(text.splitlines()[:max_lines]) + "\n..."
+            digested.append((path, text))
+
+        if baseline is None:
+            tokens_before = sum(EstimateTokens(RenderFile(path, text)) for path, text in files)
+        else:
+            tokens_before = EstimateTokens(baseline)
+        tokens_after = sum(EstimateTokens(RenderFile(path, text)) for path, text in digested)
+        attributes.update(files=len(files), duplicates=duplicates, outlined=outlined,
+                          tokens_before=tokens_before, tokens_after=tokens_after)
+    metrics.increment("digest_tokens_before", tokens_before)
+    metrics.increment("digest_tokens_after", tokens_after)
+    metrics.increment("digest_duplicates", duplicates)
+    metrics.increment("digest_outlined", outlined)
+    saved = 1 - tokens_after / tokens_before if tokens_before else 0
+    logger.info(f"Digest of {len(files)} files: ~{tokens_before} -> ~{tokens_after} tokens ({saved:.0%} saved, "
+                f"{outlined} outlined, {duplicates} duplicates)")
+    return digested
+
+
+def RenderDigest(digested):
+    """Join digested pairs into one prompt section."""
+    return "\n".join(RenderFile(path, text) for path, text in digested)
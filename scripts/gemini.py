@@ -2,74 +2,137 @@
 # Description: This script generates a README file for a GitHub repository using the Gemini API.
 # python gemini.py <repository_url>
 
+import io
 import os
-import git
-import shutil
+import heapq
 import tempfile
+from itertools import islice
+from contextlib import nullcontext
 from pathlib import Path
-from google.generativeai import GenerativeModel, configure
 from dotenv import load_dotenv
 import logging
 import argparse
-import time
+import repo_clone
+from llm_cache import CachedCompletion, GetResponseCache
+from rate_limiter import CallWithRateLimit
+from repo_reader import CHARS_PER_TOKEN, FilePriority, OpenObjects, WalkRepository
+from digest import DigestRepository, RenderDigest
+from providers import RegisterProvider, GetClient
+
+import bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = GenerativeModel('gemini-pro')
-
-MAX_CONTENT_LENGTH = 100000  # Adjust this based on Gemini's actual limit
-RATE_LIMIT_DELAY = 60  # Delay in seconds when rate limit is hit
-
-def CloneRepository(repo_url, local_path):
+MODEL_NAME = 'gemini-pro'
+
+@RegisterProvider("gemini")
+def CreateModel():
+    """Configure the Gemini SDK and build the model client."""
+    from google.generativeai import GenerativeModel, configure
+    configure(api_key=os.getenv('GEMINI_API_KEY'))
+    return GenerativeModel(MODEL_NAME)
+
+MAX_CONTENT_LENGTH = 100000  # Characters of repository contents sent in one prompt
+MAX_IMPORTANT_FILES = 10
+MAX_PREVIEW_LINES = 50
+MAX_READ_BYTES = 32 * 1024  # Bytes read from each important file, enough to outline MAX_PREVIEW_LINES
+
+IMPORTANT_EXTENSIONS = {'.py', '.js', '.ts', '.java', '.cpp', '.h'}
+IMPORTANT_NAMES = {
+    'Dockerfile', 'docker-compose.yml',
+    'requirements.txt', 'package.json', 'pom.xml', 'build.gradle',
+    '.gitignore', '.env.example',
+    'LICENSE', 'CONTRIBUTING.md'
+}
+
+def CloneRepository(repo_url, local_path, **clone_options):
     """Clone the given repository to the specified local path."""
+    import git
     try:
-        if os.path.exists(local_path):
-            shutil.rmtree(local_path)
-        git.Repo.clone_from(repo_url, local_path)
-        logger.info(f"Repository cloned successfully to {local_path}")
+        repo_clone.CloneRepository(repo_url, local_path, **clone_options)
     except git.GitCommandError as e:
         logger.error(f"Failed to clone repository: {e}")
         raise
 
-def GetImportantFiles(repo_path):
-    """Get a list of important files for README generation."""
-    important_files = []
-    important_patterns = [
-        '*.py', '*.js', '*.ts', '*.java', '*.cpp', '*.h',
-        'Dockerfile', 'docker-compose.yml',
-        'requirements.txt', 'package.json', 'pom.xml', 'build.gradle',
-        '.gitignore', '.env.example',
-        'LICENSE', 'CONTRIBUTING.md'
-    ]
-    
-    for pattern in important_patterns:
-        important_files.extend(Path(repo_path).glob('**/' + pattern))
-    
-    return important_files[:10]  # Limit to top 10 files
-
-def ReadFilePreview(file_path, max_lines=50):
+def IsImportantFile(name):
+    """Whether a file name matches one of the patterns worth previewing."""
+    return name in IMPORTANT_NAMES or os.path.splitext(name)[1] in IMPORTANT_EXTENSIONS
+
+def RankImportantFiles(walked, max_files=MAX_IMPORTANT_FILES):
+    """Pick the top (relative path, full path) pairs from WalkRepository output."""
+    # FilePriority ranks manifests and entry points first, then shallow and small files.
+    candidates = (
+        (FilePriority(rel_path, size), rel_path, full_path)
+        for rel_path, full_path, size in walked
+        if size > 0 and IsImportantFile(os.path.basename(rel_path))
+    )
+    return [(rel_path, full_path) for _, rel_path, full_path in heapq.nsmallest(max_files, candidates)]
+
+def GetImportantFiles(repo_path, max_files=MAX_IMPORTANT_FILES, objects=None):
+    """Get the top files for README generation from a single pruned walk of the repository."""
+    walked = WalkRepository(repo_path, include_hidden=True, objects=objects)
+    return [Path(full_path) for _, full_path in RankImportantFiles(walked, max_files)]
+
+def RenderPreview(file_path, lines, max_lines=MAX_PREVIEW_LINES):
+    """Format the first max_lines of an iterable of lines as a file preview."""
+    preview = ''.join(islice(lines, max_lines))
+    return f"File: {file_path}\n\n{preview}\n\n"
+
+def ReadFilePreview(file_path, max_lines=MAX_PREVIEW_LINES, opener=open):
     """Read a preview of the file contents."""
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-            preview = ''.join(lines[:max_lines])
-            return f"File: {file_path}\n\n{preview}\n\n"
+        with opener(str(file_path), 'rb') as f:
+            text = f.read(MAX_READ_BYTES).decode('utf-8', errors='ignore')
+        return RenderPreview(file_path, io.StringIO(text, newline=None), max_lines)
     except Exception as e:
         logger.warning(f"Failed to read file {file_path}: {e}")
         return ""
 
-def ReadRepositoryContents(repo_path):
-    """Read the contents of important files in the repository."""
-    important_files = GetImportantFiles(repo_path)
-    contents = [ReadFilePreview(file) for file in important_files]
-    return '\n'.join(contents)
+def ReadFileText(file_path, opener=open):
+    """Read the start of a file (up to MAX_READ_BYTES) as text."""
+    try:
+        with opener(str(file_path), 'rb') as f:
+            return f.read(MAX_READ_BYTES).decode('utf-8', errors='ignore')
+    except Exception as e:
+        logger.warning(f"Failed to read file {file_path}: {e}")
+        return ""
+
+def ReadRepositoryContents(repo_path, digest=True):
+    """Read the contents of important files in the repository, from its object store if it has no worktree.
+
+    With digest, the first MAX_READ_BYTES of each file are digested (see
+    digest.py) and cut to MAX_PREVIEW_LINES, under a tree of every file;
+    otherwise the first lines of each file are sent as they are. The digest's
+    savings are measured against those previews. Either way the contents are
+    cut to MAX_CONTENT_LENGTH characters.
+    """
+    objects = OpenObjects(repo_path)
+    opener = objects.open if objects else open
+    with objects or nullcontext():
+        walked = list(WalkRepository(repo_path, include_hidden=True, objects=objects))
+        important_files = RankImportantFiles(walked)
+        if not digest:
+            return LimitContents('\n'.join(ReadFilePreview(Path(full_path), opener=opener)
+                                           for _, full_path in important_files))
+        files = [(rel_path, ReadFileText(full_path, opener)) for rel_path, full_path in important_files]
+    previews = '\n'.join(RenderPreview(Path(full_path), io.StringIO(text, newline=None)) if text else ""
+                         for (_, full_path), (_, text) in zip(important_files, files))
+    return LimitContents(RenderDigest(DigestRepository(files, [rel_path for rel_path, _, _ in walked],
+                                                       MAX_PREVIEW_LINES, baseline=previews)))
+
+def LimitContents(contents, max_length=MAX_CONTENT_LENGTH):
+    """Cut repository contents to the length one prompt may carry."""
+    if len(contents) > max_length:
+        logger.warning(f"Repository contents cut from {len(contents)} to {max_length} characters")
+        contents = contents[:max_length]
+    return contents
 
 def GenerateReadme(repo_contents):
-    """Generate a README file using Gemini API with rate limit handling."""
+    """Generate a README file using Gemini API under the shared rate limiter."""
     prompt = f"""
     Given the following repository preview, create a professional and comprehensive README.md file.
 
@@ -91,26 +154,27 @@ def GenerateReadme(repo_contents):
     Please make sure to format the README file correctly using Markdown syntax.
     """
     
-    max_retries = 3
-    for attempt in range(max_retries):
+    def Generate():
         try:
-            response = model.generate_content(prompt)
+            response = CallWithRateLimit("gemini", lambda: GetClient("gemini").generate_content(prompt),
+                                         tokens=len(prompt) // CHARS_PER_TOKEN)
             return response.text.strip()
         except Exception as e:
-            if 'Resource has been exhausted' in str(e) and attempt < max_retries - 1:
-                logger.warning(f"Rate limit hit. Waiting for {RATE_LIMIT_DELAY} seconds before retrying...")
-                time.sleep(RATE_LIMIT_DELAY)
-            else:
-                logger.error(f"Failed to generate README: {e}")
-                raise
-
-def main(repo_url, output_path):
+            logger.error(f"Failed to generate README: {e}")
+            raise
+
+    with metrics.span("generate_readme", labels={"provider": "gemini"}):
+        return CachedCompletion("gemini", MODEL_NAME, {}, prompt, Generate)
+
+def main(repo_url, output_path, checkout_dir=None, digest=True, **clone_options):
     with tempfile.TemporaryDirectory() as temp_dir:
+        # A persistent checkout directory lets reruns fetch in place instead of cloning.
+        local_path = checkout_dir or temp_dir
         try:
-            CloneRepository(repo_url, temp_dir)
+            CloneRepository(repo_url, local_path, **clone_options)
             
             logger.info("Reading repository contents...")
-            repo_contents = ReadRepositoryContents(temp_dir)
+            repo_contents = ReadRepositoryContents(local_path, digest)
             
             logger.info("Generating README...")
             readme_content = GenerateReadme(repo_contents)
@@ -120,6 +184,7 @@ def main(repo_url, output_path):
                 f.write(readme_content)
             
             logger.info(f"README.md has been generated successfully at {output_file}")
+            logger.info(f"Response cache: {GetResponseCache().stats()}")
         
         except Exception as e:
             logger.error(f"An error occurred: {e}")
@@ -131,6 +196,18 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate README for a GitHub repository")
     parser.add_argument("repo_url", help="URL of the GitHub repository")
     parser.add_argument("--output", default=".", help="Output directory for README.md")
+    parser.add_argument("--checkout-dir", help="Keep the clone here and update it in place on later runs")
+    parser.add_argument("--depth", type=int, default=repo_clone.CLONE_DEPTH,
+                        help="Clone depth (0 for full history)")
+    parser.add_argument("--blob-limit", default=repo_clone.BLOB_LIMIT,
+                        help="Skip blobs larger than this size, e.g. 1m")
+    parser.add_argument("--sparse", nargs="+", metavar="PATTERN", default=repo_clone.SPARSE_PATHS,
+                        help="Only check out paths matching these sparse-checkout patterns")
+    parser.add_argument("--no-checkout", action="store_true", default=repo_clone.NO_CHECKOUT,
+                        help="Read files from the git object store instead of writing a worktree")
+    parser.add_argument("--no-digest", action="store_true", help="Send raw file previews instead of a compact digest")
     args = parser.parse_args()
 
-    main(args.repo_url, args.output)
\ No newline at end of file
+    metrics.export_at_exit()
+    main(args.repo_url, args.output, checkout_dir=args.checkout_dir, digest=not args.no_digest,
+         depth=args.depth, blob_limit=args.blob_limit, sparse_paths=args.sparse, no_checkout=args.no_checkout)
\ No newline at end of file
@@ -0,0 +1,139 @@
+# Persistent, content-addressed cache for LLM responses.
+# Responses are keyed by provider, model, generation parameters and a hash of
+# the prompt, stored in a small SQLite file, and evicted least-recently-used
+# first once the cache grows past its size limit. Re-running a batch after a
+# crash returns the READMEs that were already generated without a new request.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from repo_reader import CHARS_PER_TOKEN
+
+import bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv("README_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "readme-generator", "responses.sqlite"))
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of LLM responses on disk, with hit/miss counters."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._db.commit()
+
+    @staticmethod
+    def key(provider, model, params, prompt):
+        """Content address of a request: provider, model, parameters and prompt hash."""
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        request = json.dumps([provider, model, params, prompt_hash], sort_keys=True, default=str)
+        return hashlib.sha256(request.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss."""
+        with self._lock:
+            row = self._db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return row[0]
+
+    def put(self, key, response):
+        """Store a response and evict the least recently used ones past the size limit."""
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def stats(self):
+        """Hit/miss counters for this process plus the current size of the cache."""
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+@lru_cache(maxsize=None)
+def GetResponseCache(path=CACHE_PATH):
+    """Shared cache instance, opened on first use."""
+    return ResponseCache(path)
+
+
+def CachedCompletion(provider, model, params, prompt, complete):
+    """Return the cached response for this request, or call complete() and cache its result."""
+    cache = GetResponseCache()
+    key = ResponseCache.key(provider, model, params, prompt)
+    response = cache.get(key)
+    if response is not None:
+        metrics.increment("cache_hits", provider=provider)
+        return response
+    metrics.increment("cache_misses", provider=provider)
+    with metrics.span("llm_request", labels={"provider": provider}, model=model):
+        response = complete()
+    _CountTokens(provider, prompt, response)
+    cache.put(key, response)
+    return response
+
+
+async def CachedCompletionAsync(provider, model, params, prompt, complete):
+    """Async variant of CachedCompletion; complete is an async callable."""
+    cache = GetResponseCache()
+    key = ResponseCache.key(provider, model, params, prompt)
+    response = cache.get(key)
+    if response is not None:
+        metrics.increment("cache_hits", provider=provider)
+        return response
+    metrics.increment("cache_misses", provider=provider)
+    with metrics.span("llm_request", labels={"provider": provider}, model=model):
+        response = await complete()
+    _CountTokens(provider, prompt, response)
+    cache.put(key, response)
+    return response
+
+
+def _CountTokens(provider, prompt, response):
+    # Estimated like the rate limiter does; providers do not all report usage.
+    metrics.increment("tokens_sent", len(prompt) // CHARS_PER_TOKEN, provider=provider)
+    metrics.increment("tokens_received", len(response) // CHARS_PER_TOKEN, provider=provider)
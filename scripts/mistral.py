@@ -3,51 +3,46 @@
 # Make sure to delete that before using this script again.
 
 import os
-import git
 import shutil
-from langchain.schema import HumanMessage, SystemMessage
+import asyncio
+import argparse
 from dotenv import load_dotenv
-from langchain.llms import HuggingFaceEndpoint
+from repo_clone import CloneRepository
+from repo_reader import IterRepositoryFiles
+from digest import DigestRepository
+from chunking import FILE_OVERHEAD_TOKENS, GetTokenCounter, PackChunks, RenderFile, TruncateToTokens
+from llm_cache import CachedCompletionAsync, GetResponseCache
+from rate_limiter import CallWithRateLimitAsync
+from providers import RegisterProvider, GetClient
+
+import bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
 
 load_dotenv()
 
-api_key = os.getenv("huggingfacehub_api_token")
-if not api_key:
-    raise ValueError("HUGGINGFACEHUB_API_TOKEN not found in environment variables")
-
-llm = HuggingFaceEndpoint(
-    huggingfacehub_api_token=api_key,
-    repo_id="mistralai/Mixtral-8x7B-Instruct-v0.1", # Change this to the model you want to use
-    temperature=0.8,
-    max_new_tokens=512,
-    streaming=True,
-)
-
-def CloneRepository(repo_url, local_path):
-    """Clone the given repository to the specified local path."""
-    if os.path.exists(local_path):
-        shutil.rmtree(local_path) 
-    git.Repo.clone_from(repo_url, local_path)
-
-def ReadRepositoryContents(repo_path):
-    """Read the contents of all files in the repository."""
-    contents = []
-    for root, _, files in os.walk(repo_path):
-        for file in files:
-            if file.startswith('.') or file == 'README.md':
-                continue
-            file_path = os.path.join(root, file)
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                contents.append(f.read())
-    return '\n'.join(contents)
-
-def GenerateReadme(repo_contents):
-    chunk_size = 16384  # Adjust this value based on the model's limit
-    chunks = [repo_contents[i:i + chunk_size] for i in range(0, len(repo_contents), chunk_size)]
-    readme_contents = []
-    
-    for chunk in chunks:
-        prompt = f"""Based on the following repository contents, generate a comprehensive README.md file
+MODEL_ID = "mistralai/Mixtral-8x7B-Instruct-v0.1"  # Change this to the model you want to use
+CONTEXT_WINDOW = 32768  # Tokens the model accepts, prompt and completion included
+MAX_NEW_TOKENS = 512
+TEMPERATURE = 0.8
+MAX_CONCURRENT_REQUESTS = 4  # Chunk summaries in flight at once
+
+@RegisterProvider("huggingface")
+def CreateModel():
+    """Build the Hugging Face endpoint client; fails here, not on import, if the token is missing."""
+    from langchain.llms import HuggingFaceEndpoint
+    api_key = os.getenv("huggingfacehub_api_token")
+    if not api_key:
+        raise ValueError("HUGGINGFACEHUB_API_TOKEN not found in environment variables")
+    return HuggingFaceEndpoint(
+        huggingfacehub_api_token=api_key,
+        repo_id=MODEL_ID,
+        temperature=TEMPERATURE,
+        max_new_tokens=MAX_NEW_TOKENS,
+        streaming=True,
+    )
+
+SYSTEM_PROMPT = " You are the master of README generation. No repository is too complex for you. Making readme files is a child's play for you."
+PROMPT_TEMPLATE = """Based on the following repository contents, generate a comprehensive README.md file
         Include these sections:
             1. Project Title
             2. Brief Description
@@ -57,34 +52,125 @@ def GenerateReadme(repo_contents):
 
         Keep it informative. It should cover all the necssary contents in the repository.
         :\n\n{chunk}\n\nREADME.md:"""
+SUMMARY_PROMPT_TEMPLATE = """The following is one part of a larger repository. Write concise notes for a README author:
+        the project's purpose, key features, installation steps, usage examples and license, as far as
+        this part shows them. Do not write a full README.
+        :\n\n{chunk}\n\nNotes:"""
+MERGE_PROMPT_TEMPLATE = """The following are notes written about different parts of the same repository.
+        Merge them into one comprehensive README.md file without repeating sections.
+        Include these sections:
+            1. Project Title
+            2. Brief Description
+            3. Key Features
+            4. Basic Installation & Usage
+            5. License (if found)
+        :\n\n{chunk}\n\nREADME.md:"""
 
-        messages = [
-            SystemMessage(content=" You are the master of README generation. No repository is too complex for you. Making readme files is a child's play for you."),
-            HumanMessage(content=prompt)
-        ]
-        response = llm.invoke(messages)
-        readme_contents.append(response)  
-    
-    return '\n'.join(readme_contents)
+def ReadRepositoryContents(repo_path, digest=True):
+    """Read the most relevant files in the repository as (path, text) pairs, within the read budget.
+
+    Unless digest is disabled, the pairs are a compact digest led by the file tree.
+    """
+    if digest:
+        tree = []
+        return DigestRepository(IterRepositoryFiles(repo_path, tree=tree), tree)
+    return list(IterRepositoryFiles(repo_path))
+
+async def _Complete(model, prompt_template, chunk, semaphore):
+    """Run one prompt against the model, limited by the shared semaphore and served from the cache when possible."""
+    from langchain.schema import HumanMessage, SystemMessage
+    prompt = prompt_template.format(chunk=chunk)
+    messages = [
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(content=prompt)
+    ]
 
-def main():
-    repo_url = input("Enter the GitHub repository URL: ")
-    local_path = "./temp_repo"
+    async def Invoke():
+        async with semaphore:
+            response = await CallWithRateLimitAsync("huggingface", lambda: model.ainvoke(messages))
+        # LLM endpoints return text, chat models return a message.
+        return getattr(response, "content", response).strip()
+
+    params = {"temperature": TEMPERATURE, "max_new_tokens": MAX_NEW_TOKENS}
+    return await CachedCompletionAsync("huggingface", MODEL_ID, params, SYSTEM_PROMPT + prompt, Invoke)
+
+async def GenerateReadmeAsync(repo_files, model=None, max_concurrency=MAX_CONCURRENT_REQUESTS):
+    """Map-reduce README generation over token-sized chunks of (path, text) pairs.
+
+    Each chunk is summarized concurrently, at most max_concurrency at a time, and
+    the summaries are merged into a single README. A repository that fits in one
+    chunk is answered with a single call.
+    """
+    with metrics.span("generate_readme", labels={"provider": "huggingface"}) as attributes:
+        return await _GenerateReadme(repo_files, model, max_concurrency, attributes)
+
+async def _GenerateReadme(repo_files, model, max_concurrency, attributes):
+    model = model or GetClient("huggingface")
+    semaphore = asyncio.Semaphore(max_concurrency)
+    count_tokens = GetTokenCounter(MODEL_ID)
+
+    def chunk_budget(template):
+        return CONTEXT_WINDOW - MAX_NEW_TOKENS - count_tokens(SYSTEM_PROMPT + template.format(chunk=""))
+
+    chunks = PackChunks(repo_files, chunk_budget(PROMPT_TEMPLATE), count_tokens)
+    attributes["chunks"] = len(chunks)
+    if len(chunks) <= 1:
+        return await _Complete(model, PROMPT_TEMPLATE, chunks[0] if chunks else "", semaphore)
+
+    summaries = await asyncio.gather(*(_Complete(model, SUMMARY_PROMPT_TEMPLATE, chunk, semaphore) for chunk in chunks))
+
+    # Keep summarizing groups of summaries until they fit in one merge prompt.
+    merge_budget = chunk_budget(MERGE_PROMPT_TEMPLATE)
+    while True:
+        parts = [(f"Part {i + 1}", summary) for i, summary in enumerate(summaries)]
+        groups = PackChunks(parts, merge_budget, count_tokens)
+        if len(groups) >= len(summaries) > 1:
+            # No two summaries fit together: cut each to half a prompt so they merge in pairs.
+            parts = [(path, TruncateToTokens(summary, _HalfPromptTokens(path, merge_budget, count_tokens), count_tokens))
+                     for path, summary in parts]
+            groups = PackChunks(parts, merge_budget, count_tokens)
+        if len(groups) <= 1:
+            break
+        summaries = await asyncio.gather(*(_Complete(model, SUMMARY_PROMPT_TEMPLATE, group, semaphore) for group in groups))
+
+    return await _Complete(model, MERGE_PROMPT_TEMPLATE, '\n'.join(groups), semaphore)
+
+def _HalfPromptTokens(path, budget, count_tokens):
+    """Tokens a summary may use so that two of them, with headers, fit in one prompt."""
+    return max(1, budget // 2 - count_tokens(RenderFile(path, "")) - FILE_OVERHEAD_TOKENS)
+
+def GenerateReadme(repo_files, model=None):
+    """Generate a README from (path, text) pairs, packed into as few context-sized chunks as possible."""
+    return asyncio.run(GenerateReadmeAsync(repo_files, model))
+
+def main(repo_url=None, digest=True, checkout_dir=None):
+    repo_url = repo_url or input("Enter the GitHub repository URL: ")
+    # A persistent checkout directory lets reruns fetch in place instead of cloning.
+    local_path = checkout_dir or "./temp_repo"
     
     try:
         CloneRepository(repo_url, local_path)
         
-        repo_contents = ReadRepositoryContents(local_path)
+        repo_files = ReadRepositoryContents(local_path, digest)
         
-        readme_content = GenerateReadme(repo_contents)
+        readme_content = GenerateReadme(repo_files)
         
         with open("README.md", "w") as f:
             f.write(readme_content)
         
         print("README.md has been generated successfully!")
+        print(f"Response cache: {GetResponseCache().stats()}")
     
     finally:
-        shutil.rmtree(local_path, ignore_errors=True)
+        if not checkout_dir:
+            shutil.rmtree(local_path, ignore_errors=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate README for a GitHub repository with Mixtral")
+    parser.add_argument("repo_url", nargs="?", help="URL of the GitHub repository (prompted for if omitted)")
+    parser.add_argument("--no-digest", action="store_true", help="Send raw file contents instead of a compact digest")
+    parser.add_argument("--checkout-dir", help="Keep the clone here and update it in place on later runs")
+    args = parser.parse_args()
+
+    metrics.export_at_exit()
+    main(args.repo_url, digest=not args.no_digest, checkout_dir=args.checkout_dir)
\ No newline at end of file
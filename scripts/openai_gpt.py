@@ -0,0 +1,89 @@
+# !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
+# This script has the highest accuracy in making readme files. When you run this script it will make a directory 
+# called temp_repo and clone the repository in it. Make sure to delete that before using this script again.
+
+import os
+import shutil
+import argparse
+from dotenv import load_dotenv
+from repo_clone import CloneRepository
+from repo_reader import IterRepositoryFiles, CHARS_PER_TOKEN
+from digest import DigestRepository, RenderDigest
+from llm_cache import CachedCompletion, GetResponseCache
+from rate_limiter import CallWithRateLimit
+from providers import RegisterProvider, GetClient
+
+import bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
+
+
+load_dotenv()
+MODEL_NAME = 'gpt-4o-mini'
+SYSTEM_PROMPT = "You are a helpful assistant that generates README files for GitHub repositories."
+
+
+@RegisterProvider("openai")
+def CreateModel():
+    """Build the ChatOpenAI client."""
+    from langchain_openai import ChatOpenAI
+    os.environ['OPENAI_API_KEY'] = os.getenv('OPENAI_API_KEY')
+    return ChatOpenAI(model_name=MODEL_NAME)
+
+
+def ReadRepositoryContents(repo_path, digest=True):
+    """Read the most relevant files in the repository, within the read budget, as a compact digest unless disabled."""
+    if digest:
+        tree = []
+        return RenderDigest(DigestRepository(IterRepositoryFiles(repo_path, tree=tree), tree))
+    contents = [f"File: {path}\n\n{text}\n\n" for path, text in IterRepositoryFiles(repo_path)]
+    return '\n'.join(contents)
+
+def GenerateReadme(repo_contents):
+    """Generate a README file using GPT-4o-mini."""
+    from langchain.schema import HumanMessage, SystemMessage
+    prompt = f"Based on the following repository contents, generate a comprehensive README.md file:\n\n{repo_contents}\n\nREADME.md:"
+    
+    messages = [
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(content=prompt)
+    ]
+    
+    def Generate():
+        response = CallWithRateLimit("openai", lambda: GetClient("openai").invoke(messages),
+                                     tokens=len(SYSTEM_PROMPT + prompt) // CHARS_PER_TOKEN)
+        return response.content.strip()
+
+    with metrics.span("generate_readme", labels={"provider": "openai"}):
+        return CachedCompletion("openai", MODEL_NAME, {}, SYSTEM_PROMPT + prompt, Generate)
+
+def main(repo_url=None, digest=True, checkout_dir=None):
+    repo_url = repo_url or input("Enter the GitHub repository URL: ")
+    # A persistent checkout directory lets reruns fetch in place instead of cloning.
+    local_path = checkout_dir or "./temp_repo"
+    
+    try:
+        CloneRepository(repo_url, local_path)
+        
+        repo_contents = ReadRepositoryContents(local_path, digest)
+        
+        readme_content = GenerateReadme(repo_contents)
+        
+        with open("README.md", "w", encoding='utf-8') as f:
+            f.write(readme_content)
+        
+        print("README.md has been generated successfully!")
+        print(f"Response cache: {GetResponseCache().stats()}")
+    
+    finally:
+        if not checkout_dir:
+            shutil.rmtree(local_path, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate README for a GitHub repository with OpenAI")
+    parser.add_argument("repo_url", nargs="?", help="URL of the GitHub repository (prompted for if omitted)")
+    parser.add_argument("--no-digest", action="store_true", help="Send raw file contents instead of a compact digest")
+    parser.add_argument("--checkout-dir", help="Keep the clone here and update it in place on later runs")
+    args = parser.parse_args()
+
+    metrics.export_at_exit()
+    main(args.repo_url, digest=not args.no_digest, checkout_dir=args.checkout_dir)
\ No newline at end of file
@@ -0,0 +1,38 @@
+# Lazy registry of LLM provider clients.
+# Scripts register a factory per provider at import time, which is cheap. The
+# client, its SDK imports and its credential checks only happen the first time
+# GetClient() is called, so --help, argument errors and library imports never
+# pay for them.
+
+import threading
+
+_FACTORIES = {}
+_CLIENTS = {}
+_LOCK = threading.Lock()
+
+
+def RegisterProvider(name):
+    """Decorator registering a zero-argument factory that builds the client for `name`."""
+    def Register(factory):
+        _FACTORIES[name] = factory
+        return factory
+    return Register
+
+
+def GetClient(name):
+    """Return the client for a provider, creating it on first use."""
+    client = _CLIENTS.get(name)
+    if client is None:
+        with _LOCK:
+            client = _CLIENTS.get(name)
+            if client is None:
+                if name not in _FACTORIES:
+                    raise KeyError(f"Unknown provider '{name}'. Registered: {', '.join(sorted(_FACTORIES))}")
+                client = _CLIENTS[name] = _FACTORIES[name]()
+    return client
+
+
+def SetClient(name, client):
+    """Install a ready-made client, e.g. a fake backend in tests or benchmarks."""
+    with _LOCK:
+        _CLIENTS[name] = client
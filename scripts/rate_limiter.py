@@ -0,0 +1,190 @@
+# Shared rate limiting for all LLM providers.
+# Each provider gets one limiter with a request bucket and an optional token
+# bucket. Every thread and asyncio task of the process draws from the same
+# limiter. When the provider still throttles us, callers back off exponentially
+# with jitter, or as long as the provider's retry-after hint says. The limiter
+# pauses every other caller for that long and lowers its rate (AIMD). The rate
+# creeps back up as requests succeed, so throughput tracks the real quota
+# instead of stalling for a fixed minute.
+
+import re
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+import bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0  # Seconds before the first retry, doubled on every attempt
+BACKOFF_CAP = 60.0
+BURST_FRACTION = 1.0  # Bucket size as a fraction of the per-minute quota
+MIN_RATE_FRACTION = 0.1  # Never throttle below this fraction of the configured quota
+RECOVERY_FRACTION = 0.05  # Quota fraction regained after each successful request
+
+# Per-provider quotas: (requests per minute, tokens per minute or None).
+PROVIDER_LIMITS = {
+    "gemini": (60, 32000),
+    "openai": (500, 200000),
+    "huggingface": (60, None),
+}
+
+RATE_LIMIT_MESSAGES = ("resource has been exhausted", "rate limit", "too many requests")
+
+
+class _Bucket:
+    """Token bucket that allows reservations past empty; the deficit becomes a wait."""
+
+    def __init__(self, per_minute):
+        self.configured_rate = per_minute / 60.0
+        self.rate = self.configured_rate
+        self.capacity = max(1.0, per_minute * BURST_FRACTION)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # A request larger than the whole bucket only has to wait for a full bucket, never longer.
+        self.level -= min(amount, self.capacity)
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def slow_down(self):
+        # Drop the saved-up burst too, otherwise the lower rate only applies once it is spent.
+        self.level = min(self.level, 0.0)
+        self.rate = max(self.configured_rate * MIN_RATE_FRACTION, self.rate / 2)
+
+    def speed_up(self):
+        self.rate = min(self.configured_rate, self.rate + self.configured_rate * RECOVERY_FRACTION)
+
+
+class RateLimiter:
+    """Request and token rate limiter shared by every worker of a provider."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute=None):
+        self._requests = _Bucket(requests_per_minute)
+        self._tokens = _Bucket(tokens_per_minute) if tokens_per_minute else None
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._requests.reserve(1, now)
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self, tokens=0):
+        """Block until a request of `tokens` tokens may be sent."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=0):
+        """Async variant of acquire()."""
+        import asyncio  # Deferred: asyncio is slow to import and only async callers need it
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def throttled(self, delay):
+        """Record a rate-limit response: pause every caller for `delay` seconds and halve the rate."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            for bucket in (self._requests, self._tokens):
+                if bucket is not None:
+                    bucket.slow_down()
+
+    def succeeded(self):
+        """Record a successful request so the rate recovers towards the quota."""
+        with self._lock:
+            for bucket in (self._requests, self._tokens):
+                if bucket is not None:
+                    bucket.speed_up()
+
+
+@lru_cache(maxsize=None)
+def GetRateLimiter(provider):
+    """The process-wide limiter for a provider."""
+    requests_per_minute, tokens_per_minute = PROVIDER_LIMITS[provider]
+    return RateLimiter(requests_per_minute, tokens_per_minute)
+
+
+def IsRateLimitError(error):
+    """Whether an exception from a provider client means we are being throttled."""
+    response = getattr(error, "response", None)
+    for status in (getattr(error, "status_code", None), getattr(error, "code", None),
+                   getattr(response, "status_code", None)):
+        if status == 429:
+            return True
+    message = str(error).lower()
+    return any(text in message for text in RATE_LIMIT_MESSAGES)
+
+
+def RetryAfter(error):
+    """Seconds the provider asked us to wait, if it said so."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    # Some clients only mention the delay in the message, e.g. "retry in 12.5s".
+    match = re.search(r"retry(?:[ _-]after| in)?\D{0,10}(\d+(?:\.\d+)?)\s*s", str(error), re.IGNORECASE)
+    return float(match.group(1)) if match else None
+
+
+def BackoffDelay(attempt):
+    """Exponential backoff with full jitter for the given zero-based attempt."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _RetryDelay(limiter, error, attempt, max_retries):
+    if not IsRateLimitError(error) or attempt >= max_retries:
+        raise error
+    delay = RetryAfter(error)
+    if delay is None:
+        delay = BackoffDelay(attempt)
+    limiter.throttled(delay)
+    logger.warning(f"Rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+
+
+def CallWithRateLimit(provider, call, tokens=0, max_retries=MAX_RETRIES):
+    """Run call() under the provider's rate limit, retrying when it is throttled."""
+    limiter = GetRateLimiter(provider)
+    for attempt in range(max_retries + 1):
+        limiter.acquire(tokens)
+        try:
+            result = call()
+        except Exception as e:
+            _RetryDelay(limiter, e, attempt, max_retries)
+            metrics.increment("llm_retries", provider=provider)
+            continue
+        limiter.succeeded()
+        return result
+
+
+async def CallWithRateLimitAsync(provider, call, tokens=0, max_retries=MAX_RETRIES):
+    """Async variant of CallWithRateLimit; call is an async callable."""
+    limiter = GetRateLimiter(provider)
+    for attempt in range(max_retries + 1):
+        await limiter.acquire_async(tokens)
+        try:
+            result = await call()
+        except Exception as e:
+            _RetryDelay(limiter, e, attempt, max_retries)
+            metrics.increment("llm_retries", provider=provider)
+            continue
+        limiter.succeeded()
+        return result
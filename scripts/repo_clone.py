@@ -0,0 +1,80 @@
+# Shared clone helper for the README generator scripts.
+# Clones are shallow by default, can skip large blobs or check out only part of
+# the tree, and an existing checkout of the same repository is updated in place
+# with a fetch instead of being deleted and cloned again. A clone can also skip
+# the worktree entirely; repo_reader then reads files from the object store.
+# GitPython is imported inside the functions so that importing this module
+# stays cheap.
+
+import os
+import shutil
+import logging
+
+import bootstrap  # noqa: F401  Makes `common` importable
+from common.git_objects import is_object_store
+
+logger = logging.getLogger(__name__)
+
+CLONE_DEPTH = 1  # Number of commits to fetch, None for full history
+BLOB_LIMIT = None  # e.g. "1m" to leave blobs larger than this on the server
+SPARSE_PATHS = None  # e.g. ["/*", "!/tests/"] to check out only matching paths
+NO_CHECKOUT = False  # Clone only the object store, without writing a worktree
+
+
+def CloneOptions(depth=CLONE_DEPTH, blob_limit=BLOB_LIMIT, sparse_paths=SPARSE_PATHS, no_checkout=NO_CHECKOUT):
+    """Build the git clone/fetch options for the requested clone mode."""
+    options = {}
+    if depth:
+        options["depth"] = depth
+    if blob_limit:
+        options["filter"] = f"blob:limit={blob_limit}"
+    if no_checkout:
+        options["no_checkout"] = True
+    elif sparse_paths:
+        options["sparse"] = True
+    return options
+
+
+def IsCheckoutOf(repo_url, local_path):
+    """Check whether local_path already holds a clone of repo_url."""
+    import git
+    try:
+        repo = git.Repo(local_path)
+        return repo.remotes.origin.url == repo_url
+    except (git.InvalidGitRepositoryError, git.NoSuchPathError, AttributeError, ValueError):
+        return False
+
+
+def UpdateRepository(local_path, depth=CLONE_DEPTH, sparse_paths=SPARSE_PATHS):
+    """Fetch the remote HEAD into an existing clone and reset the worktree to it.
+
+    A clone without a worktree only has its HEAD moved.
+    """
+    import git
+    repo = git.Repo(local_path)
+    fetch_options = {"depth": depth} if depth else {}
+    # Partial clones remember their blob filter, so it does not need repeating.
+    repo.git.fetch("origin", "HEAD", **fetch_options)
+    if is_object_store(local_path):
+        repo.git.update_ref("HEAD", "FETCH_HEAD")
+    else:
+        if sparse_paths:
+            repo.git.sparse_checkout("set", "--no-cone", *sparse_paths)
+        repo.git.reset("--hard", "FETCH_HEAD")
+    logger.info(f"Repository at {local_path} updated to {repo.head.commit.hexsha}")
+
+
+def CloneRepository(repo_url, local_path, depth=CLONE_DEPTH, blob_limit=BLOB_LIMIT, sparse_paths=SPARSE_PATHS,
+                    no_checkout=NO_CHECKOUT):
+    """Clone the given repository to the specified local path, or update it if already cloned."""
+    import git
+    if IsCheckoutOf(repo_url, local_path):
+        UpdateRepository(local_path, depth=depth, sparse_paths=sparse_paths)
+        return
+
+    if os.path.exists(local_path):
+        shutil.rmtree(local_path)
+    repo = git.Repo.clone_from(repo_url, local_path, **CloneOptions(depth, blob_limit, sparse_paths, no_checkout))
+    if sparse_paths and not no_checkout:
+        repo.git.sparse_checkout("set", "--no-cone", *sparse_paths)
+    logger.info(f"Repository cloned successfully to {local_path}")
@@ -0,0 +1,122 @@
+# Streaming, budget-aware repository reader shared by the README generator scripts.
+# Files are yielded lazily in priority order (manifests, entry points and license
+# first, tests last), and reading stops as soon as the byte/token budget is used
+# up, so memory and I/O stay bounded regardless of repository size. Which files
+# are considered (.gitignore, vendored directories, binaries, generated and
+# oversized files) is decided by the FileFilter shared with the dataset builder.
+# Clones without a worktree are read straight from the git object store.
+
+import os
+import logging
+from contextlib import nullcontext
+
+import bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
+from common.file_filter import FileFilter
+from common.git_objects import GitObjectReader, is_object_store
+
+logger = logging.getLogger(__name__)
+
+READ_BUDGET_BYTES = 400_000  # Total bytes of file content handed to the prompt
+READ_BUDGET_TOKENS = None  # Optional token budget, estimated with CHARS_PER_TOKEN
+CHARS_PER_TOKEN = 4
+MAX_FILE_BYTES = 128 * 1024  # Larger files are truncated to this many bytes
+
+MANIFESTS = {
+    "setup.py", "pyproject.toml", "setup.cfg", "requirements.txt", "package.json", "Cargo.toml",
+    "go.mod", "pom.xml", "build.gradle", "Gemfile", "composer.json", "Dockerfile",
+    "docker-compose.yml", "Makefile", "environment.yml",
+}
+PROJECT_DOCS = {"LICENSE", "LICENSE.md", "LICENSE.txt", "COPYING", "CONTRIBUTING.md"}
+ENTRY_POINTS = {"main", "app", "index", "cli", "server", "__main__", "manage", "run"}
+SOURCE_EXTENSIONS = {
+    ".py", ".js", ".ts", ".tsx", ".jsx", ".java", ".go", ".rs", ".rb", ".php", ".c", ".cc",
+    ".cpp", ".h", ".hpp", ".cs", ".kt", ".swift", ".scala", ".sh", ".ipynb",
+}
+
+
+def FilePriority(rel_path, size):
+    """Sort key for a file: lower is more useful for describing the repository."""
+    name = os.path.basename(rel_path)
+    stem, extension = os.path.splitext(name)
+    parts = rel_path.split("/")
+    depth = len(parts) - 1
+    is_test = any(part in ("test", "tests", "spec", "__tests__") for part in parts[:-1]) or stem.startswith("test_")
+
+    if name in MANIFESTS:
+        rank = 0
+    elif name in PROJECT_DOCS or (stem.lower() in ENTRY_POINTS and extension in SOURCE_EXTENSIONS):
+        rank = 1
+    elif is_test:
+        rank = 4
+    elif extension in SOURCE_EXTENSIONS:
+        rank = 2
+    else:
+        rank = 3
+    return (rank, depth, size, rel_path)
+
+
+def OpenObjects(repo_path):
+    """A GitObjectReader for a clone without a worktree, or None for a regular checkout."""
+    return GitObjectReader(repo_path) if is_object_store(repo_path) else None
+
+
+def WalkRepository(repo_path, include_hidden=False, file_filter=None, objects=None):
+    """Yield (relative path, full path, size) for candidate files, pruning ignored directories.
+
+    Dotfiles are skipped unless include_hidden is set; hidden directories always are.
+    With objects (see OpenObjects) the committed tree is walked, and the full
+    path is the path in the tree, to be opened with objects.open.
+    """
+    file_filter = file_filter or FileFilter(hidden_files=include_hidden, hidden_directories=False)
+    if objects is not None:
+        objects.load_sizes()  # Every candidate is sized below
+    for rel_path, entry, is_dir in file_filter.walk(repo_path, objects):
+        if is_dir or entry.name == 'README.md':
+            continue
+        try:
+            size = entry.stat(follow_symlinks=False).st_size
+        except OSError as e:
+            logger.warning(f"Failed to inspect {entry.path}: {e}")
+            continue
+        if file_filter.wanted(entry.name, size):
+            yield rel_path, entry.path, size
+
+
+def IterRepositoryFiles(repo_path, max_bytes=READ_BUDGET_BYTES, max_tokens=READ_BUDGET_TOKENS, tree=None):
+    """Lazily yield (relative path, text) for the most useful files until the budget runs out.
+
+    If tree is a list, the relative paths of all candidate files, read or not,
+    are appended to it before the first file is yielded.
+    """
+    budget = max_bytes
+    if max_tokens is not None:
+        budget = min(budget, max_tokens * CHARS_PER_TOKEN)
+
+    file_filter = FileFilter(hidden_files=False, hidden_directories=False)
+    objects = OpenObjects(repo_path)
+    with objects or nullcontext():
+        candidates = sorted(WalkRepository(repo_path, file_filter=file_filter, objects=objects),
+                            key=lambda item: FilePriority(item[0], item[2]))
+        if tree is not None:
+            tree.extend(sorted(rel_path for rel_path, _, _ in candidates))
+        for rel_path, full_path, size in candidates:
+            if budget <= 0:
+                logger.info(f"Read budget exhausted, skipping the remaining files in {repo_path}")
+                return
+            try:
+                data = file_filter.read(full_path, min(budget, MAX_FILE_BYTES),
+                                        opener=objects.open if objects else open)
+            except OSError as e:
+                logger.warning(f"Failed to read file {full_path}: {e}")
+                continue
+            if data is None:
+                continue
+
+            text = data.decode('utf-8', errors='ignore')
+            if not text.strip():
+                continue
+            budget -= len(data)
+            metrics.increment("files_read")
+            metrics.increment("bytes_read", len(data))
+            yield rel_path, text
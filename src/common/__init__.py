@@ -0,0 +1 @@
+"""Helpers shared by the README generator scripts and the dataset pipeline."""
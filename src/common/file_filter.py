@@ -0,0 +1,310 @@
+import os
+import re
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Constants
+SNIFF_BYTES = 8192  # A null byte in this first block marks a file as binary
+MAX_FILE_BYTES = 1024 * 1024  # Larger files are skipped as generated or data
+MAX_REPO_BYTES = 4 * 1024 * 1024  # File content read per repository
+LONG_LINE_BYTES = 4096  # A first block without a newline this early is minified
+GENERATED_MARKER_BYTES = 1024  # Generated-file markers are looked for this close to the top
+
+SKIP_DIRECTORIES = frozenset({
+    ".git", "node_modules", "vendor", "third_party", "dist", "build", "__pycache__",
+    ".venv", "venv", "env", ".tox", ".mypy_cache", ".pytest_cache", "site-packages",
+})
+# Directories that are bundles rather than source, matched by extension
+SKIP_DIRECTORY_EXTENSIONS = frozenset({".xcodeproj", ".xcworkspace", ".egg-info"})
+# Lowercased, so matching is case-insensitive
+EXCLUDED_EXTENSIONS = frozenset({
+    # Images and video
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tiff", ".mp4", ".mov", ".avi", ".jfif",
+    # Documents
+    ".key", ".pdf", ".docx", ".xlsx", ".pptx",
+    # Audio
+    ".flac", ".ogg", ".mid", ".webm", ".wav", ".mp3", ".pcm", ".opus",
+    # Archives
+    ".jar", ".aar", ".gz", ".tgz", ".zip", ".bz2", ".xz", ".7z", ".rar", ".whl", ".unitypackage",
+    # Models and data
+    ".onnx", ".pickle", ".pkl", ".model", ".neuron", ".npy", ".pt", ".pth", ".ckpt", ".safetensors", ".h5",
+    # Compiled code
+    ".pyc", ".so", ".dll", ".dylib", ".exe", ".o", ".a", ".class",
+    # Fonts, 3D assets and miscellaneous binaries
+    ".ttf", ".otf", ".woff", ".woff2", ".eot", ".glb", ".gltf",
+    ".index", ".inv", ".ds_store", ".rdb", ".pack", ".idx", ".len",
+})
+GENERATED_NAMES = frozenset({
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock",
+    "Cargo.lock", "composer.lock", "Gemfile.lock", "go.sum", "uv.lock",
+})
+GENERATED_SUFFIXES = (".min.js", ".min.css", ".map", ".bundle.js", ".pb.go", "_pb2.py")
+GENERATED_MARKERS = (b"@generated", b"Code generated by", b"DO NOT EDIT")
+GITIGNORE_FILES = (".gitignore",)
+EXCLUDE_FILE = os.path.join(".git", "info", "exclude")
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore glob into a regular expression over '/'-separated paths."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/") \
+                    and (i + 2 == n or pattern[i + 2] == "/"):
+                if i + 2 == n:
+                    out.append(".*")  # "dir/**" matches everything inside
+                    i += 2
+                else:
+                    out.append("(?:.*/)?")  # "**/" matches zero or more directories
+                    i += 3
+                continue
+            while i < n and pattern[i] == "*":
+                i += 1
+            out.append("[^/]*")
+            continue
+        if c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            while j < n and pattern[j] != "]":
+                j += 1
+            if j >= n:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j].replace("\\", "\\\\")
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def _parse_rule(line: str) -> Optional[Tuple[str, bool, bool]]:
+    """Parse one gitignore line into (regex, negated, directories only), or None for blanks and comments."""
+    line = line.rstrip("\r\n")
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "  # An escaped trailing space is kept
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    directories_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # A pattern with a slash before its end is relative to the .gitignore
+    # directory; otherwise it matches a name at any depth below it.
+    anchored = "/" in line
+    regex = _translate(line.lstrip("/"))
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return regex, negated, directories_only
+
+
+def _compile(rules: List[Tuple[str, bool, bool]]):
+    """One regex for a list of rules, with the last rule first so the first match is the one git applies."""
+    if not rules:
+        return None
+    rules = rules[::-1]
+    pattern = re.compile("|".join(f"({regex})" for regex, _, _ in rules), re.DOTALL)
+    return pattern, [negated for _, negated, _ in rules]
+
+
+class IgnoreRules:
+    """The compiled patterns of one .gitignore file, scoped to its directory."""
+
+    def __init__(self, base: str, lines: List[str]):
+        self.base = base
+        rules = [rule for rule in map(_parse_rule, lines) if rule]
+        self._files = _compile([rule for rule in rules if not rule[2]])
+        self._directories = _compile(rules)
+
+    @classmethod
+    def load(cls, path: str, base: str, opener=open) -> Optional["IgnoreRules"]:
+        try:
+            with opener(path, 'rb') as f:
+                return cls(base, f.read().decode('utf-8', errors='replace').splitlines())
+        except OSError as e:
+            logger.warning(f"Error reading {path}: {e}")
+            return None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True if the path is ignored, False if a negation re-includes it, None if no pattern applies."""
+        compiled = self._directories if is_dir else self._files
+        if compiled is None:
+            return None
+        pattern, negations = compiled
+        if self.base:
+            rel_path = rel_path[len(self.base) + 1:]
+        match = pattern.fullmatch(rel_path)
+        if match is None:
+            return None
+        return not negations[match.lastindex - 1]
+
+
+def _extension(name: str) -> str:
+    dot = name.rfind(".")
+    return name[dot:].lower() if dot >= 0 else ""
+
+
+class FileFilter:
+    """Decides which files of a repository are listed and which are worth reading.
+
+    The tree filter prunes vendored and build directories, drops files by
+    extension with a set lookup, and applies the repository's .gitignore files
+    (and .git/info/exclude) with each file's patterns compiled into a single
+    regex. The content filter skips lockfiles, minified and generated files and
+    files over max_file_bytes, and read() rejects content whose first block is
+    binary or marked as generated. max_repo_bytes is the budget callers spend
+    across one repository.
+    """
+
+    def __init__(self, max_file_bytes: int = MAX_FILE_BYTES, max_repo_bytes: int = MAX_REPO_BYTES,
+                 sniff_bytes: int = SNIFF_BYTES, gitignore: bool = True,
+                 hidden_files: bool = True, hidden_directories: bool = True):
+        self.max_file_bytes = max_file_bytes
+        self.max_repo_bytes = max_repo_bytes
+        self.sniff_bytes = sniff_bytes
+        self.gitignore = gitignore
+        self.hidden_files = hidden_files
+        self.hidden_directories = hidden_directories
+
+    @staticmethod
+    def _ignored(rel_path: str, is_dir: bool, rules: Tuple[IgnoreRules, ...]) -> bool:
+        # Deeper .gitignore files take precedence over their parents.
+        for layer in reversed(rules):
+            ignored = layer.match(rel_path, is_dir)
+            if ignored is not None:
+                return ignored
+        return False
+
+    def skip_directory(self, name: str, rel_path: str, rules: Tuple[IgnoreRules, ...] = ()) -> bool:
+        """Whether a directory is left out of the tree, along with everything below it."""
+        return (name in SKIP_DIRECTORIES
+                or (not self.hidden_directories and name.startswith("."))
+                or _extension(name) in SKIP_DIRECTORY_EXTENSIONS
+                or self._ignored(rel_path, True, rules))
+
+    def skip_file(self, name: str, rel_path: str, rules: Tuple[IgnoreRules, ...] = ()) -> bool:
+        """Whether a file is left out of the tree."""
+        return ((not self.hidden_files and name.startswith("."))
+                or _extension(name) in EXCLUDED_EXTENSIONS
+                or self._ignored(rel_path, False, rules))
+
+    def wanted(self, name: str, size: int) -> bool:
+        """Whether a listed file's content is worth reading, judging by its name and size."""
+        return (size <= self.max_file_bytes and name not in GENERATED_NAMES
+                and not name.lower().endswith(GENERATED_SUFFIXES))
+
+    def is_binary(self, block: bytes) -> bool:
+        """Treat content with a null byte in its first block as binary."""
+        return b"\0" in block
+
+    def is_generated(self, block: bytes) -> bool:
+        """Whether a file's first block carries a generated-file marker or looks minified."""
+        top = block[:GENERATED_MARKER_BYTES]
+        if any(marker in top for marker in GENERATED_MARKERS):
+            return True
+        return len(block) > LONG_LINE_BYTES and b"\n" not in block[:LONG_LINE_BYTES]
+
+    def read(self, path: str, limit: Optional[int] = None, skip_generated: bool = True,
+             opener=open) -> Optional[bytes]:
+        """Read up to limit bytes of a file, or None if its first block is binary or generated.
+
+        opener opens path for binary reading, e.g. GitObjectReader.open for
+        files that are only in the object store. Raises OSError like open() does.
+        """
+        with opener(path, 'rb') as f:
+            head = f.read(self.sniff_bytes)
+            if self.is_binary(head) or (skip_generated and self.is_generated(head)):
+                return None
+            if limit is None:
+                return head + f.read()
+            data = head[:limit]
+            if len(data) < limit:
+                data += f.read(limit - len(data))
+            return data
+
+    def _root_rules(self, repo_path: str, objects=None) -> Tuple[IgnoreRules, ...]:
+        # info/exclude is local to a clone and not part of a committed tree.
+        if not self.gitignore or objects is not None:
+            return ()
+        exclude_path = os.path.join(repo_path, EXCLUDE_FILE)
+        if os.path.isfile(exclude_path):
+            rules = IgnoreRules.load(exclude_path, "")
+            if rules is not None:
+                return (rules,)
+        return ()
+
+    def _list(self, path: str, rel_dir: str, rules: Tuple[IgnoreRules, ...], objects=None):
+        """List a directory: the rules that apply inside it and its kept entries, sorted by name."""
+        if objects is not None:
+            entries = objects.listdir(rel_dir)
+        else:
+            try:
+                with os.scandir(path) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                logger.warning(f"Error listing {path}: {e}")
+                return rules, []
+
+        if self.gitignore:
+            for entry in entries:
+                if entry.name in GITIGNORE_FILES and entry.is_file(follow_symlinks=False):
+                    layer = IgnoreRules.load(entry.path, rel_dir, objects.open if objects else open)
+                    if layer is not None:
+                        rules = rules + (layer,)
+
+        kept = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                # DirEntry caches the d_type from the directory listing, so these
+                # checks only stat when the file system did not report a type.
+                if entry.is_dir(follow_symlinks=False):
+                    if not self.skip_directory(entry.name, rel_path, rules):
+                        kept.append((rel_path, entry, True))
+                elif entry.is_file(follow_symlinks=False):
+                    if not self.skip_file(entry.name, rel_path, rules):
+                        kept.append((rel_path, entry, False))
+            except OSError as e:
+                logger.warning(f"Error inspecting {entry.path}: {e}")
+        return rules, kept
+
+    def walk(self, repo_path: str, objects=None) -> Iterator[Tuple[str, os.DirEntry, bool]]:
+        """Yield (relative path, entry, is directory) for the kept tree in sorted pre-order.
+
+        Relative paths are '/'-separated. Ignored directories are not entered.
+        With a GitObjectReader as objects, the committed tree is walked instead
+        of the worktree and the entries are GitEntry objects.
+        """
+        rules, entries = self._list(repo_path, "", self._root_rules(repo_path, objects), objects)
+        stack = [(iter(entries), rules)]
+        while stack:
+            entries, rules = stack[-1]
+            item = next(entries, None)
+            if item is None:
+                stack.pop()
+                continue
+            yield item
+            rel_path, entry, is_dir = item
+            if is_dir:
+                child_rules, children = self._list(entry.path, rel_path, rules, objects)
+                stack.append((iter(children), child_rules))
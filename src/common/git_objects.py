@@ -0,0 +1,235 @@
+import io
+import os
+import re
+import logging
+import functools
+import threading
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Modes git uses for tree entries
+TREE_MODE = "040000"
+SYMLINK_MODE = "120000"
+SUBMODULE_MODE = "160000"
+BATCH_COMMAND_VERSION = (2, 36)  # First git with `cat-file --batch-command`
+STREAM_BYTES = 64 * 1024  # Larger blobs are streamed by open() instead of read whole
+
+
+@functools.lru_cache(maxsize=None)
+def git_version() -> Tuple[int, int]:
+    """(major, minor) of the installed git, or (0, 0) if it cannot be told."""
+    try:
+        output = subprocess.run(["git", "--version"], capture_output=True, text=True).stdout
+    except OSError:
+        return (0, 0)
+    match = re.search(r"(\d+)\.(\d+)", output)
+    return (int(match.group(1)), int(match.group(2))) if match else (0, 0)
+
+
+def is_object_store(repo_path: str) -> bool:
+    """Whether repo_path is a bare repository or a clone without a checked-out worktree.
+
+    `git clone --no-checkout` never writes an index, so a .git directory
+    without one means the files only exist in the object store.
+    """
+    git_dir = os.path.join(repo_path, ".git")
+    if os.path.isdir(git_dir):
+        return not os.path.exists(os.path.join(git_dir, "index"))
+    return os.path.isfile(os.path.join(repo_path, "HEAD")) and os.path.isdir(os.path.join(repo_path, "objects"))
+
+
+class GitStat:
+    """The part of os.stat_result the readers use."""
+
+    def __init__(self, size: int):
+        self.st_size = size
+
+
+class GitEntry:
+    """A tree entry that quacks like os.DirEntry, so filters and walkers can treat both alike.
+
+    `path` is the '/'-separated path in the tree; open it with GitObjectReader.open.
+    """
+
+    def __init__(self, reader: "GitObjectReader", mode: str, oid: str, path: str):
+        self._reader = reader
+        self.mode = mode
+        self.oid = oid
+        self.path = path
+        self.name = path.rpartition("/")[2]
+
+    def is_dir(self, *, follow_symlinks: bool = True) -> bool:
+        return self.mode == TREE_MODE
+
+    def is_file(self, *, follow_symlinks: bool = True) -> bool:
+        # Symlinks and submodules have no content of their own in the tree.
+        return self.mode not in (TREE_MODE, SYMLINK_MODE, SUBMODULE_MODE)
+
+    def stat(self, *, follow_symlinks: bool = True) -> GitStat:
+        return GitStat(self._reader.size(self.oid, self.path))
+
+    def __repr__(self):
+        return f"<GitEntry {self.path!r}>"
+
+
+class _BlobStream(io.BufferedReader):
+    """A blob read from its own `git cat-file blob` process, which is stopped when the stream is closed."""
+
+    def __init__(self, process: subprocess.Popen):
+        super().__init__(process.stdout.detach())
+        self._process = process
+
+    def close(self):
+        if not self.closed:
+            self._process.kill()
+            super().close()
+            self._process.wait()
+
+
+class GitObjectReader:
+    """Lists and reads the files of a commit straight from a repository's object store.
+
+    The tree is listed once with `git ls-tree`, and blob sizes and contents
+    are streamed through one long-lived `git cat-file --batch-command`
+    process (a `--batch-check` and a `--batch` process before git 2.36), so
+    nothing is written to disk and there is no process per file. Blobs over
+    STREAM_BYTES are the exception: open() streams them from a process of
+    their own, so a caller reading the first lines does not pay for the rest.
+    Callers that need the size of every file can look them all up at once
+    with load_sizes(). Works on bare repositories and on clones made with
+    --no-checkout.
+    """
+
+    def __init__(self, repo_path: str, rev: str = "HEAD"):
+        self.repo_path = repo_path
+        self.rev = rev
+        self._processes: Dict[str, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+        self._directories: Optional[Dict[str, List[GitEntry]]] = None
+        self._entries: Dict[str, GitEntry] = {}
+        self._sizes: Dict[str, Optional[int]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Stop the cat-file processes."""
+        for process in self._processes.values():
+            process.stdin.close()
+            process.wait()
+            process.stdout.close()
+        self._processes = {}
+
+    def _git(self, *args: str) -> List[str]:
+        return ["git", "-C", self.repo_path, *args]
+
+    def _list_tree(self) -> Dict[str, List[GitEntry]]:
+        if self._directories is not None:
+            return self._directories
+        self._directories = {"": []}
+        result = subprocess.run(self._git("ls-tree", "-r", "-t", "-z", self.rev), capture_output=True)
+        if result.returncode != 0:
+            logger.warning(f"Error listing {self.rev} in {self.repo_path}: "
+                           f"{result.stderr.decode(errors='replace').strip()}")
+            return self._directories
+
+        for record in result.stdout.split(b"\0"):
+            if not record:
+                continue
+            info, _, path = record.partition(b"\t")
+            mode, _, oid = info.decode().split(" ")
+            entry = GitEntry(self, mode, oid, path.decode("utf-8", errors="surrogateescape"))
+            self._entries[entry.path] = entry
+            self._directories.setdefault(entry.path.rpartition("/")[0], []).append(entry)
+            if entry.is_dir():
+                self._directories.setdefault(entry.path, [])
+        for entries in self._directories.values():
+            entries.sort(key=lambda entry: entry.name)
+        return self._directories
+
+    def listdir(self, rel_dir: str = "") -> List[GitEntry]:
+        """Entries of a directory of the tree, sorted by name."""
+        return self._list_tree().get(rel_dir, [])
+
+    def _git_env(self) -> Dict[str, str]:
+        # Do not let a partial clone fetch missing blobs one request at a time.
+        return dict(os.environ, GIT_NO_LAZY_FETCH="1")
+
+    def load_sizes(self):
+        """Look up the sizes of all blobs in the tree with one cat-file run."""
+        self._list_tree()
+        oids = {entry.oid for entry in self._entries.values() if entry.is_file()} - set(self._sizes)
+        if not oids:
+            return
+        result = subprocess.run(self._git("cat-file", "--batch-check"), input="\n".join(oids).encode() + b"\n",
+                                capture_output=True, env=self._git_env())
+        for line in result.stdout.decode().splitlines():
+            fields = line.split()
+            if len(fields) == 3:
+                self._sizes[fields[0]] = int(fields[2])
+            elif len(fields) == 2 and fields[1] == "missing":
+                self._sizes[fields[0]] = None
+
+    def _request(self, command: str, oid: str):
+        """Send an info or contents request to cat-file.
+
+        Returns the process, whose output holds the contents next, and
+        (type, size), or None if the object is missing.
+        """
+        if git_version() >= BATCH_COMMAND_VERSION:
+            option, line = "--batch-command", f"{command} {oid}\n"
+        else:
+            option, line = ("--batch-check" if command == "info" else "--batch"), f"{oid}\n"
+        process = self._processes.get(option)
+        if process is None:
+            process = self._processes[option] = subprocess.Popen(
+                self._git("cat-file", option), env=self._git_env(), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        process.stdin.write(line.encode())
+        process.stdin.flush()
+        header = process.stdout.readline().split()
+        if len(header) != 3:
+            if not header:
+                raise OSError(f"git cat-file exited while reading {self.repo_path}")
+            return process, None
+        return process, (header[1].decode(), int(header[2]))
+
+    def size(self, oid: str, path: str = "") -> int:
+        """Size of a blob; raises FileNotFoundError if it is not in the object store."""
+        if oid not in self._sizes:
+            with self._lock:
+                _, info = self._request("info", oid)
+            self._sizes[oid] = info[1] if info else None
+        size = self._sizes[oid]
+        if size is None:
+            raise FileNotFoundError(f"{path or oid} is not in the object store of {self.repo_path}")
+        return size
+
+    def read(self, oid: str, path: str = "") -> bytes:
+        """Contents of a blob; raises FileNotFoundError if it is not in the object store."""
+        with self._lock:
+            process, info = self._request("contents", oid)
+            if info is None:
+                self._sizes[oid] = None
+                raise FileNotFoundError(f"{path or oid} is not in the object store of {self.repo_path}")
+            data = process.stdout.read(info[1] + 1)[:-1]
+        self._sizes[oid] = info[1]
+        return data
+
+    def open(self, path: str, mode: str = "rb") -> io.BufferedIOBase:
+        """Open a file of the tree for reading, like open(path, 'rb')."""
+        if "b" not in mode:
+            raise ValueError("Objects can only be opened in binary mode")
+        self._list_tree()
+        entry = self._entries.get(path)
+        if entry is None or not entry.is_file():
+            raise FileNotFoundError(f"{path} is not a file in {self.rev} of {self.repo_path}")
+        if self.size(entry.oid, path) <= STREAM_BYTES:
+            return io.BytesIO(self.read(entry.oid, path))
+        process = subprocess.Popen(self._git("cat-file", "blob", entry.oid), env=self._git_env(),
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return _BlobStream(process)
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Constants
+METRIC_PREFIX = "readme_gen_"
+MAX_SPANS = 10000  # Finished spans kept for the run report; timers keep aggregating past this
+REPORT_PATH_ENV = "METRICS_REPORT"  # Write the JSON run report here at exit
+TEXTFILE_PATH_ENV = "METRICS_TEXTFILE"  # Write a Prometheus textfile here at exit
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _key(name: str, labels: Dict) -> Tuple:
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+class Metrics:
+    """Counters, timers and spans for one run of the pipeline.
+
+    Counters add up quantities such as bytes read or tokens sent, timers
+    aggregate how long each stage took, and spans record individual timed
+    operations with their parent, so a run report shows both totals and where
+    a slow run spent its time. All methods are thread-safe, and the contents of
+    another process (e.g. a pool worker) can be folded in with merge().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_span_id = 0  # Not reset, so span ids stay unique within a process
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.counters: Dict[Tuple, float] = {}
+            self.timers: Dict[Tuple, Dict] = {}
+            self.spans = []
+            self.dropped_spans = 0
+
+    def increment(self, name: str, value: float = 1, **labels):
+        """Add value to a counter."""
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Record one duration for a timer."""
+        key = _key(name, labels)
+        with self._lock:
+            timer = self.timers.setdefault(key, {"count": 0, "total": 0.0, "max": 0.0})
+            timer["count"] += 1
+            timer["total"] += seconds
+            timer["max"] = max(timer["max"], seconds)
+
+    @contextmanager
+    def span(self, name: str, labels: Optional[Dict] = None, **attributes):
+        """Time a block as a span nested under the enclosing one.
+
+        The duration also feeds the timer `name` with the given labels. The
+        yielded attributes dict can be filled in while the block runs.
+        """
+        labels = labels or {}
+        attributes.update(labels)
+        with self._lock:
+            span_id = self._next_span_id
+            self._next_span_id += 1
+        parent = _current_span.get()
+        token = _current_span.set(span_id)
+        start = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield attributes
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            _current_span.reset(token)
+            self.observe(name, duration, **labels)
+            record = {"id": span_id, "parent": parent, "name": name, "start": start,
+                      "duration": duration, "attributes": attributes, "pid": os.getpid()}
+            if error:
+                record["error"] = error
+            with self._lock:
+                if len(self.spans) < MAX_SPANS:
+                    self.spans.append(record)
+                else:
+                    self.dropped_spans += 1
+
+    def timed(self, name: str):
+        """Decorator running the function inside a span called name."""
+        def decorate(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def snapshot(self) -> Dict:
+        """Picklable copy of everything recorded so far."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timers": {key: dict(timer) for key, timer in self.timers.items()},
+                "spans": list(self.spans),
+                "dropped_spans": self.dropped_spans,
+            }
+
+    def merge(self, snapshot: Dict):
+        """Fold a snapshot from another process into this one."""
+        with self._lock:
+            for key, value in snapshot["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, other in snapshot["timers"].items():
+                timer = self.timers.setdefault(key, {"count": 0, "total": 0.0, "max": 0.0})
+                timer["count"] += other["count"]
+                timer["total"] += other["total"]
+                timer["max"] = max(timer["max"], other["max"])
+            room = MAX_SPANS - len(self.spans)
+            self.spans.extend(snapshot["spans"][:room])
+            self.dropped_spans += snapshot["dropped_spans"] + max(0, len(snapshot["spans"]) - room)
+
+    def report(self) -> Dict:
+        """The run report: totals per counter and timer, plus the recorded spans."""
+        snapshot = self.snapshot()
+
+        def entry(key, **values):
+            name, labels = key
+            return {"name": name, "labels": dict(labels), **values}
+
+        return {
+            "started": self.started,
+            "duration": time.time() - self.started,
+            "counters": [entry(key, value=value) for key, value in sorted(snapshot["counters"].items())],
+            "timers": [entry(key, **timer) for key, timer in sorted(snapshot["timers"].items())],
+            "spans": snapshot["spans"],
+            "dropped_spans": snapshot["dropped_spans"],
+        }
+
+    def write_report(self, path: str):
+        """Write the run report as JSON."""
+        _write_atomically(path, json.dumps(self.report(), indent=2, default=str))
+        logger.info(f"Wrote metrics report to {path}")
+
+    def prometheus_text(self) -> str:
+        """Counters and timers in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        declared = set()
+
+        def declare(metric, kind):
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} {kind}")
+
+        def labels_text(labels):
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            metric = f"{METRIC_PREFIX}{name}_total"
+            declare(metric, "counter")
+            lines.append(f"{metric}{labels_text(labels)} {value}")
+        for (name, labels), timer in sorted(snapshot["timers"].items()):
+            stage = labels + (("stage", name),)
+            declare(f"{METRIC_PREFIX}stage_seconds", "summary")
+            lines.append(f"{METRIC_PREFIX}stage_seconds_sum{labels_text(stage)} {timer['total']}")
+            lines.append(f"{METRIC_PREFIX}stage_seconds_count{labels_text(stage)} {timer['count']}")
+        for (name, labels), timer in sorted(snapshot["timers"].items()):
+            declare(f"{METRIC_PREFIX}stage_seconds_max", "gauge")
+            lines.append(f"{METRIC_PREFIX}stage_seconds_max{labels_text(labels + (('stage', name),))} {timer['max']}")
+        declare(f"{METRIC_PREFIX}run_start_timestamp_seconds", "gauge")
+        lines.append(f"{METRIC_PREFIX}run_start_timestamp_seconds {self.started}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write a textfile for the node_exporter textfile collector."""
+        _write_atomically(path, self.prometheus_text())
+        logger.info(f"Wrote Prometheus metrics to {path}")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomically(path: str, text: str):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+METRICS = Metrics()
+increment = METRICS.increment
+observe = METRICS.observe
+span = METRICS.span
+timed = METRICS.timed
+
+
+def export_at_exit(report_path: Optional[str] = None, textfile_path: Optional[str] = None):
+    """Write the run report and Prometheus textfile when the process exits.
+
+    Paths default to the METRICS_REPORT and METRICS_TEXTFILE environment
+    variables; nothing is written for a path that is not set.
+    """
+    report_path = report_path or os.getenv(REPORT_PATH_ENV)
+    textfile_path = textfile_path or os.getenv(TEXTFILE_PATH_ENV)
+
+    def export():
+        if report_path:
+            METRICS.write_report(report_path)
+        if textfile_path:
+            METRICS.write_prometheus(textfile_path)
+
+    if report_path or textfile_path:
+        atexit.register(export)
@@ -0,0 +1,126 @@
+import os
+import json
+import hashlib
+import logging
+import subprocess
+from typing import Dict, Optional
+
+import data_bootstrap  # noqa: F401  Makes `common` importable
+from common.git_objects import is_object_store
+
+logger = logging.getLogger(__name__)
+
+# Constants
+MANIFEST_DIRECTORY = ".dataset-manifest"
+# Bump whenever the extraction logic changes so old rows are rebuilt.
+MANIFEST_VERSION = 5
+
+
+def _read_ref(git_dir: str, ref: str) -> Optional[str]:
+    """Resolve a ref such as refs/heads/main from loose refs or packed-refs."""
+    ref_path = os.path.join(git_dir, ref)
+    if os.path.isfile(ref_path):
+        with open(ref_path, 'r') as f:
+            return f.read().strip()
+
+    packed_refs = os.path.join(git_dir, "packed-refs")
+    if os.path.isfile(packed_refs):
+        with open(packed_refs, 'r') as f:
+            for line in f:
+                if line.startswith(('#', '^')):
+                    continue
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    return None
+
+
+def resolve_head(repo_path: str) -> Optional[str]:
+    """Return the HEAD commit SHA of a repository, or None if it has none."""
+    git_dir = os.path.join(repo_path, ".git")
+    try:
+        if os.path.isfile(git_dir):
+            # Worktrees and submodules point at their git directory instead.
+            with open(git_dir, 'r') as f:
+                git_dir = os.path.join(repo_path, f.read().split(":", 1)[1].strip())
+        if not os.path.isdir(git_dir):
+            # Bare mirrors keep HEAD and their refs in repo_path itself.
+            if not is_object_store(repo_path):
+                return None
+            git_dir = repo_path
+
+        with open(os.path.join(git_dir, "HEAD"), 'r') as f:
+            head = f.read().strip()
+        if not head.startswith("ref:"):
+            return head
+        sha = _read_ref(git_dir, head[4:].strip())
+        if sha:
+            return sha
+    except (OSError, IndexError) as e:
+        logger.warning(f"Error reading HEAD of {repo_path}: {e}")
+
+    # Fall back to git for layouts the fast path does not understand.
+    result = subprocess.run(["git", "-C", repo_path, "rev-parse", "HEAD"], capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def hash_row(row: Dict) -> str:
+    """Hash the extracted output of a repository."""
+    return hashlib.sha256(json.dumps(row, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class BuildManifest:
+    """Persistent map of repo_id to the HEAD commit of its last build.
+
+    An incremental build processes only repositories whose HEAD moved and
+    publishes just their rows, so the manifest keeps no rows of its own and an
+    unchanged repository costs one HEAD lookup. A build records or keeps each
+    repository and swaps the next manifest in on commit().
+    """
+
+    def __init__(self, directory: str = MANIFEST_DIRECTORY):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.entries = self._load_entries()
+        self._next_entries = {}
+
+    def _load_entries(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {self.manifest_path}: {e}")
+            return {}
+
+        if manifest.get("version") != MANIFEST_VERSION:
+            logger.info("Manifest is from an older build layout, rebuilding all repositories")
+            return {}
+        return manifest.get("repos", {})
+
+    def is_current(self, repo_id: str, head: Optional[str]) -> bool:
+        """Whether the last build of `repo_id` was made from commit `head`."""
+        entry = self.entries.get(repo_id)
+        return head is not None and entry is not None and entry["head"] == head
+
+    def keep(self, repo_id: str):
+        """Carry an unchanged repository over to the next build."""
+        self._next_entries[repo_id] = self.entries[repo_id]
+
+    def record(self, repo_id: str, head: Optional[str]):
+        """Add a repository built from commit `head` to the next build."""
+        if head is not None:
+            self._next_entries[repo_id] = {"head": head}
+
+    def commit(self):
+        """Replace the stored manifest with the one recorded in this build."""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_manifest = self.manifest_path + ".tmp"
+        with open(tmp_manifest, 'w') as f:
+            json.dump({"version": MANIFEST_VERSION, "repos": self._next_entries}, f)
+        os.replace(tmp_manifest, self.manifest_path)
+
+        logger.info(f"Recorded {len(self._next_entries)} repositories in {self.manifest_path}")
+        self.entries = self._next_entries
+        self._next_entries = {}
@@ -0,0 +1,13 @@
+# Makes the shared `common` package in src/ importable from the dataset scripts.
+# Import this before `common` in any module that can be run or imported from
+# this directory: `import data_bootstrap  # noqa: F401`. It is not named
+# bootstrap like its counterpart in scripts/, since the tests put both
+# directories on sys.path and one would shadow the other.
+
+import os
+import sys
+
+SRC_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+if os.path.abspath(SRC_DIRECTORY) not in map(os.path.abspath, sys.path):
+    sys.path.insert(0, os.path.abspath(SRC_DIRECTORY))
@@ -0,0 +1,210 @@
+import os
+import re
+import json
+import shutil
+import logging
+import tempfile
+from typing import Dict, List, Optional, Set
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from shard_writer import ShardWriter, PARQUET_FORMAT, ROWS_PER_SHARD
+from build_manifest import hash_row
+from dataset_reader import read_shard
+
+logger = logging.getLogger(__name__)
+
+# Constants
+INDEX_FILENAME = ".repo-index.json"
+INDEX_VERSION = 1
+SHARD_DIRECTORY = "data"
+# Named like the shards Dataset.push_to_hub writes. When any file has this form,
+# hub split inference loads only those, and the card's data_files is data/train-*.
+SHARD_NAME = "train-{number:05d}-of-{count:05d}.parquet"
+SHARD_NUMBER = re.compile(r"train-(\d{5})-of-\d{5}|df_chunk_(\d+)_")
+
+
+class LocalDatasetRepo:
+    """A local folder standing in for a dataset repository on the hub."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def download(self, filename: str) -> Optional[str]:
+        local_path = os.path.join(self.path, filename)
+        return local_path if os.path.exists(local_path) else None
+
+    def list_files(self) -> List[str]:
+        """Paths of all files in the repository, '/'-separated."""
+        return [os.path.relpath(os.path.join(root, name), self.path).replace(os.sep, "/")
+                for root, _, names in os.walk(self.path) for name in names]
+
+    def commit(self, additions: Dict[str, str], deletions: List[str], message: str):
+        """Copy additions in and remove deletions; the index is written last."""
+        for path_in_repo in sorted(additions, key=lambda name: name == INDEX_FILENAME):
+            destination = os.path.join(self.path, path_in_repo)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copyfile(additions[path_in_repo], destination + ".tmp")
+            os.replace(destination + ".tmp", destination)
+        for path_in_repo in deletions:
+            os.remove(os.path.join(self.path, path_in_repo))
+        logger.info(f"{message} in {self.path}")
+
+
+class HubDatasetRepo:
+    """A dataset repository on the Hugging Face Hub, updated in single commits."""
+
+    def __init__(self, repo_id: str):
+        self.repo_id = repo_id
+
+    def download(self, filename: str) -> Optional[str]:
+        from huggingface_hub import hf_hub_download
+        from huggingface_hub.utils import EntryNotFoundError, RepositoryNotFoundError
+        try:
+            return hf_hub_download(repo_id=self.repo_id, filename=filename, repo_type="dataset")
+        except (EntryNotFoundError, RepositoryNotFoundError):
+            return None
+
+    def list_files(self) -> List[str]:
+        from huggingface_hub import HfApi
+        from huggingface_hub.utils import RepositoryNotFoundError
+        try:
+            return HfApi().list_repo_files(repo_id=self.repo_id, repo_type="dataset")
+        except RepositoryNotFoundError:
+            return []
+
+    def commit(self, additions: Dict[str, str], deletions: List[str], message: str):
+        """Add and delete files in one hub commit, so readers never see half an update."""
+        from huggingface_hub import HfApi, CommitOperationAdd, CommitOperationDelete
+        api = HfApi()
+        api.create_repo(repo_id=self.repo_id, repo_type="dataset", exist_ok=True)
+        operations = [CommitOperationAdd(path_in_repo=path_in_repo, path_or_fileobj=local_path)
+                      for path_in_repo, local_path in additions.items()]
+        operations += [CommitOperationDelete(path_in_repo=path_in_repo) for path_in_repo in deletions]
+        api.create_commit(repo_id=self.repo_id, repo_type="dataset", operations=operations,
+                          commit_message=message)
+        logger.info(f"{message} in {self.repo_id}")
+
+
+def open_dataset_repo(target: str):
+    """Use target as a local stand-in if it is a directory, otherwise as a hub repo id."""
+    return LocalDatasetRepo(target) if os.path.isdir(target) else HubDatasetRepo(target)
+
+
+class DatasetIndex:
+    """Map of repo_id to the shard holding its row and the row's hash.
+
+    The index lives next to the shards in the dataset repository. Appending
+    consults it to drop rows that are already present unchanged and to find
+    the shards holding rows that an upsert replaces, so an update only reads
+    and writes the new rows and the few shards they touch. A dataset uploaded
+    without an index (e.g. by the full upload in push_to_hub.py) is indexed
+    from its shards the first time.
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self.repos: Dict[str, Dict] = {}
+        # Shards holding older copies of a repository's row, found when bootstrapping
+        self.stale_shards: Dict[str, Set[str]] = {}
+        self.next_shard = 0
+        index_path = repo.download(INDEX_FILENAME)
+        if not index_path:
+            self._bootstrap()
+        else:
+            with open(index_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.repos = data["repos"]
+                self.next_shard = data["next_shard"]
+            else:
+                logger.warning(f"Ignoring repo index with version {data.get('version')}")
+
+    def _bootstrap(self):
+        """Index the rows already in the repository's shards."""
+        shards = sorted(name for name in self.repo.list_files()
+                        if name.startswith(f"{SHARD_DIRECTORY}/") and name.endswith(f".{PARQUET_FORMAT}"))
+        for shard in shards:
+            for row in self._read_shard(shard).to_pylist():
+                entry = self.repos.get(row["repo_id"])
+                if entry and entry["shard"] != shard:
+                    self.stale_shards.setdefault(row["repo_id"], set()).add(entry["shard"])
+                self.repos[row["repo_id"]] = {"shard": shard, "hash": hash_row(row)}
+            # New shards must not reuse the name of one written by an earlier build.
+            match = SHARD_NUMBER.match(os.path.basename(shard))
+            if match:
+                self.next_shard = max(self.next_shard, int(match.group(1) or match.group(2)) + 1)
+        if shards:
+            logger.info(f"No repo index found, indexed {len(self.repos)} existing rows from {len(shards)} shards")
+
+    def append(self, table: pa.Table, rows_per_shard: int = ROWS_PER_SHARD) -> int:
+        """Upsert the rows of table into the repository and return how many were written."""
+        latest = {}
+        for row in table.to_pylist():
+            latest[row["repo_id"]] = row  # The last row for a repository wins
+
+        pending = {}
+        replaced_shards = set()
+        for repo_id, row in latest.items():
+            row_hash = hash_row(row)
+            entry = self.repos.get(repo_id)
+            if entry and entry["hash"] == row_hash and repo_id not in self.stale_shards:
+                continue
+            if entry:
+                replaced_shards.add(entry["shard"])
+                replaced_shards.update(self.stale_shards.get(repo_id, ()))
+            pending[repo_id] = (row, row_hash)
+
+        if not pending:
+            logger.info("All rows are already in the dataset, nothing to append")
+            return 0
+        # Shards appended under their df_chunk names are invisible to load_dataset;
+        # their rows move to new shards along with the others.
+        replaced_shards.update(entry["shard"] for entry in self.repos.values()
+                               if not os.path.basename(entry["shard"]).startswith("train-"))
+        logger.info(f"Appending {len(pending)} rows, rewriting {len(replaced_shards)} shards with replaced rows")
+
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            written = []
+            writer = ShardWriter(tmpdirname, PARQUET_FORMAT, rows_per_shard=rows_per_shard, schema=table.schema,
+                                 first_shard=self.next_shard)
+            with writer:
+                # Rows of a touched shard that are not being replaced move to the new shards.
+                for shard in sorted(replaced_shards):
+                    kept = self._read_shard(shard)
+                    kept = kept.filter(pc.invert(pc.is_in(kept["repo_id"], value_set=pa.array(list(pending)))))
+                    for row in kept.to_pylist():
+                        if self.repos[row["repo_id"]]["shard"] != shard:
+                            continue  # An older copy of a row indexed in another shard
+                        writer.write_row(row)
+                        written.append((row["repo_id"], self.repos[row["repo_id"]]["hash"]))
+                for repo_id, (row, row_hash) in pending.items():
+                    writer.write_row(row)
+                    written.append((repo_id, row_hash))
+
+            shard_names = [f"{SHARD_DIRECTORY}/" + SHARD_NAME.format(number=number, count=writer.chunk_flag)
+                           for number in range(self.next_shard, writer.chunk_flag)]
+            for position, (repo_id, row_hash) in enumerate(written):
+                self.repos[repo_id] = {"shard": shard_names[position // rows_per_shard], "hash": row_hash}
+            self.next_shard = writer.chunk_flag
+
+            index_path = os.path.join(tmpdirname, INDEX_FILENAME)
+            with open(index_path, 'w') as f:
+                json.dump({"version": INDEX_VERSION, "next_shard": self.next_shard, "repos": self.repos}, f)
+
+            additions = dict(zip(shard_names, writer.shard_paths))
+            additions[INDEX_FILENAME] = index_path
+            self.repo.commit(additions, sorted(replaced_shards),
+                             f"Append {len(pending)} rows in {len(shard_names)} shards")
+        for repo_id in list(self.stale_shards):
+            self.stale_shards[repo_id] -= replaced_shards
+            if not self.stale_shards[repo_id]:
+                del self.stale_shards[repo_id]
+        return len(pending)
+
+    def _read_shard(self, shard: str) -> pa.Table:
+        local_path = self.repo.download(shard)
+        if local_path is None:
+            raise FileNotFoundError(f"Shard {shard} listed in the repo index is missing")
+        return read_shard(local_path)
@@ -0,0 +1,152 @@
+import json
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from shard_writer import DATASET_SCHEMA, PARQUET_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# Columns that shards written before the nested schema stored as JSON strings
+NESTED_COLUMNS = ("file_structure", "key_code_snippets")
+
+
+def flatten_file_structure(tree: Dict, prefix: str = "") -> List[Dict]:
+    """Turn a legacy nested {"name", "type", "children"} tree into pre-order path entries."""
+    entries = []
+    for child in tree.get("children", []):
+        path = f"{prefix}/{child['name']}" if prefix else child["name"]
+        entries.append({"path": path, "type": child["type"]})
+        if child["type"] == "directory":
+            entries.extend(flatten_file_structure(child, path))
+    return entries
+
+
+def nest_file_structure(entries: Iterable[Dict], name: str) -> Dict:
+    """Rebuild the nested directory tree of a repository from its path entries."""
+    root = {"type": "directory", "name": name, "children": []}
+    directories = {"": root}
+    for entry in entries:
+        parent, _, entry_name = entry["path"].rpartition("/")
+        node = {"type": entry["type"], "name": entry_name}
+        if entry["type"] == "directory":
+            node["children"] = []
+            directories[entry["path"]] = node
+        directories.get(parent, root)["children"].append(node)
+    return root
+
+
+def _upgrade_column(name: str, column: pa.ChunkedArray) -> pa.Array:
+    """Parse a legacy JSON-string column into its nested type."""
+    values = []
+    for text in column.to_pylist():
+        value = json.loads(text) if text else None
+        if name == "file_structure":
+            values.append(flatten_file_structure(value) if value else [])
+        else:
+            values.append([{"path": path, "content": content} for path, content in (value or {}).items()])
+    return pa.array(values, type=DATASET_SCHEMA.field(name).type)
+
+
+def _conforms(column_type: pa.DataType, target: pa.DataType) -> bool:
+    """Whether a column already has the schema type, including the list item name."""
+    if column_type != target:
+        return False
+    return not pa.types.is_list(target) or column_type.value_field.name == target.value_field.name
+
+
+def upgrade_table(table: pa.Table) -> pa.Table:
+    """Convert a table read from any shard to the dataset schema.
+
+    JSON-string columns from older shards are parsed into their nested types,
+    and large_string columns written by pandas and list columns named
+    "element" by Parquet are cast, so tables from any shard can be
+    concatenated. Columns holding a projection of a nested type are kept.
+    """
+    for index, name in enumerate(table.column_names):
+        if name not in DATASET_SCHEMA.names:
+            continue
+        column_type = table.schema.field(name).type
+        target = DATASET_SCHEMA.field(name)
+        if _conforms(column_type, target.type):
+            continue
+        if name in NESTED_COLUMNS and (pa.types.is_string(column_type) or pa.types.is_large_string(column_type)):
+            table = table.set_column(index, target, _upgrade_column(name, table[name]))
+        elif name not in NESTED_COLUMNS or column_type.value_type == target.type.value_type:
+            table = table.set_column(index, target, table[name].cast(target.type))
+    return table.replace_schema_metadata(None)
+
+
+def _split_columns(columns: Optional[List[str]]):
+    """Split "column" and "column.field" projections into top-level columns and struct fields."""
+    if columns is None:
+        return None, {}
+    top_level = []
+    fields = {}
+    whole = set()
+    for column in columns:
+        name, _, field = column.partition(".")
+        if name not in top_level:
+            top_level.append(name)
+        if field:
+            fields.setdefault(name, []).append(field)
+        else:
+            whole.add(name)
+    return top_level, {name: selected for name, selected in fields.items() if name not in whole}
+
+
+def _select_fields(column: pa.ChunkedArray, fields: List[str]) -> pa.ChunkedArray:
+    """Keep only some fields of a list<struct> column."""
+    chunks = []
+    for chunk in column.chunks:
+        values = chunk.values
+        struct = pa.StructArray.from_arrays([values.field(field) for field in fields], names=fields)
+        chunks.append(pa.ListArray.from_arrays(chunk.offsets, struct))
+    return pa.chunked_array(chunks) if chunks else column
+
+
+def read_shard(path: str, columns: Optional[List[str]] = None) -> pa.Table:
+    """Read a Feather or Parquet shard as an Arrow table in the nested schema.
+
+    `columns` projects the read: "repo_id" selects a column and
+    "key_code_snippets.path" a single field of a nested column. Parquet shards
+    only read the column chunks that are needed; Feather shards are memory
+    mapped, so unselected columns are never touched. Older shards with
+    JSON-string columns are upgraded on the fly.
+    """
+    top_level, fields = _split_columns(columns)
+    if path.endswith(f".{PARQUET_FORMAT}"):
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        legacy = any(not pa.types.is_list(parquet_file.schema_arrow.field(name).type)
+                     for name in fields if name in parquet_file.schema_arrow.names)
+        if fields and not legacy:
+            # Read only the leaf columns of the requested struct fields.
+            schema = parquet_file.schema
+            leaf_paths = [schema.column(i).path for i in range(len(schema))]
+            leaves = []
+            for name in top_level:
+                if name not in fields:
+                    leaves.append(name)
+                    continue
+                leaves.extend(leaf for leaf in leaf_paths
+                              if leaf.startswith(f"{name}.") and leaf.rsplit(".", 1)[1] in fields[name])
+            return upgrade_table(parquet_file.read(columns=leaves))
+        table = parquet_file.read(columns=top_level)
+    else:
+        table = feather.read_table(path, columns=top_level, memory_map=True)
+
+    table = upgrade_table(table)
+    for name, selected in fields.items():
+        index = table.column_names.index(name)
+        column = _select_fields(table[name], selected)
+        table = table.set_column(index, pa.field(name, column.type), column)
+    return table
+
+
+def read_shards(paths: List[str], columns: Optional[List[str]] = None) -> Optional[pa.Table]:
+    """Read several shards with the same projection and concatenate them."""
+    tables = [read_shard(path, columns) for path in paths]
+    return pa.concat_tables(tables) if tables else None
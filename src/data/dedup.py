@@ -0,0 +1,223 @@
+import os
+import re
+import json
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from shard_writer import ShardWriter, DEFAULT_COMPRESSION, COMPRESSION_LEVEL
+from dataset_reader import read_shard
+
+logger = logging.getLogger(__name__)
+
+# Constants
+DEDUP_THRESHOLD = 0.85  # Estimated Jaccard similarity above which repositories are duplicates
+NUM_PERMUTATIONS = 128
+NUM_BANDS = 16  # LSH bands; NUM_PERMUTATIONS must be a multiple of this
+SHINGLE_BYTES = 9  # Length of the character shingles
+MAX_TEXT_BYTES = 256 * 1024  # Text hashed per repository
+SHINGLE_BLOCK = 1024  # Shingles permuted at once; keeps the work matrix in cache
+SEED = 0
+DEDUP_REPORT_PATH = "dedup-report.json"
+
+SHARD_NAME = re.compile(r"df_chunk_(\d+)_\d+\.(\w+)$")
+_ROLLING_BASE = np.uint64(0x100000001B3)
+_MAX_HASH = np.uint32(0xFFFFFFFF)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer, spreading polynomial hashes over all 64 bits."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def repository_text(readme_content: Optional[str], snippets: Optional[List[Dict]]) -> str:
+    """Text a repository is compared on: its README and key file contents."""
+    parts = [readme_content or ""]
+    parts.extend(snippet["content"] or "" for snippet in snippets or [])
+    return "\n".join(parts)
+
+
+class MinHashLSH:
+    """MinHash signatures over character shingles, clustered with banded LSH.
+
+    Shingling, hashing and the permutations are NumPy array operations, so the
+    Python work per repository is constant. Candidate pairs only come from
+    repositories sharing a band, which keeps clustering far below quadratic,
+    and every candidate is confirmed against the estimated Jaccard similarity.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_permutations: int = NUM_PERMUTATIONS,
+                 num_bands: int = NUM_BANDS, shingle_bytes: int = SHINGLE_BYTES, seed: int = SEED):
+        if num_permutations % num_bands:
+            raise ValueError("num_permutations must be a multiple of num_bands")
+        self.threshold = threshold
+        self.num_permutations = num_permutations
+        self.num_bands = num_bands
+        self.shingle_bytes = shingle_bytes
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: odd multipliers, keeping the high 32 bits.
+        self._multipliers = rng.integers(0, 2 ** 63, num_permutations, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._increments = rng.integers(0, 2 ** 63, num_permutations, dtype=np.uint64)
+        self._powers = _ROLLING_BASE ** np.arange(shingle_bytes - 1, -1, -1, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Unique 64-bit hashes of the normalized text's byte shingles."""
+        data = " ".join(text.lower().split()).encode("utf-8")[:MAX_TEXT_BYTES]
+        data = np.frombuffer(data, dtype=np.uint8)
+        count = len(data) - self.shingle_bytes + 1
+        if count <= 0:
+            return np.empty(0, dtype=np.uint64)
+        hashes = np.zeros(count, dtype=np.uint64)
+        for offset in range(self.shingle_bytes):
+            hashes += data[offset:offset + count].astype(np.uint64) * self._powers[offset]
+        return np.unique(_mix(hashes))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text, or None if it is too short to compare."""
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        signature = np.full(self.num_permutations, _MAX_HASH, dtype=np.uint64)
+        work = np.empty((self.num_permutations, min(len(shingles), SHINGLE_BLOCK)), dtype=np.uint64)
+        for start in range(0, len(shingles), SHINGLE_BLOCK):
+            block = shingles[start:start + SHINGLE_BLOCK]
+            permuted = work[:, :len(block)]
+            np.multiply(self._multipliers[:, None], block[None, :], out=permuted)
+            permuted += self._increments[:, None]
+            permuted >>= np.uint64(32)
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+    def clusters(self, signatures: np.ndarray) -> List[List[int]]:
+        """Group rows of a signature matrix into clusters of near duplicates.
+
+        Each cluster is sorted, so its first member is the earliest row.
+        """
+        count = len(signatures)
+        parent = list(range(count))
+
+        def find(index):
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        rows_per_band = self.num_permutations // self.num_bands
+        for band in range(self.num_bands):
+            columns = np.ascontiguousarray(signatures[:, band * rows_per_band:(band + 1) * rows_per_band])
+            keys = columns.view(np.dtype((np.void, columns.dtype.itemsize * rows_per_band))).ravel()
+            _, inverse, sizes = np.unique(keys, return_inverse=True, return_counts=True)
+            if sizes.max(initial=0) < 2:
+                continue
+            order = np.argsort(inverse, kind="stable")
+            starts = np.cumsum(sizes) - sizes
+            for group in np.flatnonzero(sizes > 1):
+                bucket = order[starts[group]:starts[group] + sizes[group]]
+                # Compare against one leader at a time instead of every pair.
+                remaining = bucket
+                while len(remaining) > 1:
+                    leader, others = remaining[0], remaining[1:]
+                    similar = (signatures[others] == signatures[leader]).mean(axis=1) >= self.threshold
+                    for other in others[similar]:
+                        root_leader, root_other = find(leader), find(other)
+                        if root_leader != root_other:
+                            parent[max(root_leader, root_other)] = min(root_leader, root_other)
+                    remaining = others[~similar]
+
+        groups = {}
+        for index in range(count):
+            groups.setdefault(find(index), []).append(index)
+        return [members for members in groups.values() if len(members) > 1]
+
+    def similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return float((first == second).mean())
+
+
+def deduplicate_shards(shard_paths: List[str], lsh: Optional[MinHashLSH] = None,
+                       report_path: Optional[str] = DEDUP_REPORT_PATH,
+                       compression: Optional[str] = DEFAULT_COMPRESSION,
+                       compression_level: Optional[int] = COMPRESSION_LEVEL) -> Dict:
+    """Remove near-duplicate repositories from written shards, keeping the first of each cluster.
+
+    Only the repo_id, README and snippet contents are read to build the
+    signatures. Shards that lose rows are rewritten under their shard number
+    with the new row count, and shard_paths is updated in place. Returns the
+    report, which is also written as JSON to report_path.
+    """
+    lsh = lsh or MinHashLSH()
+    repo_ids = []
+    locations = []
+    signatures = []
+    for shard_index, path in enumerate(shard_paths):
+        table = read_shard(path, ["repo_id", "readme_content", "key_code_snippets.content"])
+        for repo_id, readme, snippets in zip(table["repo_id"].to_pylist(),
+                                             table["readme_content"].to_pylist(),
+                                             table["key_code_snippets"].to_pylist()):
+            signature = lsh.signature(repository_text(readme, snippets))
+            if signature is None:
+                continue
+            repo_ids.append(repo_id)
+            locations.append(shard_index)
+            signatures.append(signature)
+
+    report = {
+        "threshold": lsh.threshold,
+        "num_permutations": lsh.num_permutations,
+        "num_bands": lsh.num_bands,
+        "repositories": len(repo_ids),
+        "removed": 0,
+        "clusters": [],
+    }
+    removed_by_shard = {}
+    if signatures:
+        matrix = np.vstack(signatures)
+        for members in lsh.clusters(matrix):
+            kept = members[0]
+            duplicates = []
+            for member in members[1:]:
+                duplicates.append({
+                    "repo_id": repo_ids[member],
+                    "similarity": round(lsh.similarity(matrix[kept], matrix[member]), 4),
+                })
+                removed_by_shard.setdefault(locations[member], set()).add(repo_ids[member])
+            report["clusters"].append({"kept": repo_ids[kept], "removed": duplicates})
+            report["removed"] += len(duplicates)
+
+    for shard_index, removed in sorted(removed_by_shard.items()):
+        shard_paths[shard_index] = _rewrite_shard(shard_paths[shard_index], removed, compression, compression_level)
+    shard_paths[:] = [path for path in shard_paths if path]
+
+    logger.info(f"Removed {report['removed']} near-duplicate repositories in {len(report['clusters'])} clusters")
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Wrote deduplication report to {report_path}")
+    return report
+
+
+def _rewrite_shard(path: str, removed: set, compression: Optional[str],
+                   compression_level: Optional[int]) -> Optional[str]:
+    """Rewrite a shard without the removed repositories and return its new path, if any rows remain."""
+    match = SHARD_NAME.search(os.path.basename(path))
+    if match is None:
+        raise ValueError(f"Unexpected shard name: {path}")
+    table = read_shard(path)
+    table = table.filter(pc.invert(pc.is_in(table["repo_id"], value_set=pa.array(sorted(removed)))))
+
+    writer = ShardWriter(os.path.dirname(path) or ".", match.group(2), rows_per_shard=None,
+                         compression=compression, compression_level=compression_level,
+                         first_shard=int(match.group(1)))
+    with writer:
+        writer.write_table(table)
+    new_path = writer.shard_paths[0] if writer.shard_paths else None
+    if new_path != path:
+        os.remove(path)
+    return new_path
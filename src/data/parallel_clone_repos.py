@@ -1,12 +1,145 @@
 import os
-import subprocess
-from multiprocessing import Pool
-from github import Github
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
 from dotenv import load_dotenv
 load_dotenv()
 
+import data_bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
+from common.git_objects import is_object_store
+
 ORG = "openai"
 MIRROR_DIRECTORY = "open-ai-repos"
+GIT_BASE_URL = "https://github.com"
+CLONE_DEPTH = 1  # Number of commits to fetch, None for full history
+BLOB_LIMIT = None  # e.g. "1m" to leave blobs larger than this on the server
+SPARSE_PATHS = None  # e.g. ["/*", "!/tests/"] to check out only matching paths
+NO_CHECKOUT = False  # Keep only the object store; prepare_dataset reads files from it
+MAX_CONCURRENT_CLONES = 16  # Bounded by network and disk, not by CPU count
+MAX_RETRIES = 3
+RETRY_BACKOFF = 2.0  # Base delay in seconds, doubled on every retry
+CLONE_REPORT_PATH = "clone_report.json"
+GITHUB_API_URL = "https://api.github.com"
+LISTING_CACHE_PATH = ".repo-listing-cache.json"
+LISTING_PAGE_SIZE = 100
+MAX_LISTING_WORKERS = 8
+MIRROR_STATE_FILE = ".mirror-state.json"  # pushed_at of each repository when it was last mirrored
+
+
+def _load_json(path, default):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _save_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _fetch_listing_page(session, url, page, cached_page):
+    """Fetches one page of the listing, revalidating the cached copy by ETag.
+
+    Returns (page entry, response links). A 304 answer reuses the cached repos
+    and does not count against the API rate limit.
+    """
+    headers = {}
+    if cached_page and cached_page.get("etag"):
+        headers["If-None-Match"] = cached_page["etag"]
+
+    response = session.get(url, params={"per_page": LISTING_PAGE_SIZE, "page": page}, headers=headers, timeout=30)
+    if response.status_code == 304:
+        return cached_page, response.links
+    response.raise_for_status()
+
+    repos = [
+        {
+            "name": repo["name"],
+            "fork": repo["fork"],
+            "default_branch": repo.get("default_branch"),
+            "pushed_at": repo.get("pushed_at"),
+        }
+        for repo in response.json()
+    ]
+    return {"etag": response.headers.get("ETag"), "repos": repos}, response.links
+
+
+def _listing_session(access_token=None):
+    session = requests.Session()
+    session.headers["Accept"] = "application/vnd.github+json"
+    if access_token:
+        session.headers["Authorization"] = f"Bearer {access_token}"
+    return session
+
+
+def _last_page(links):
+    """Reads the page number of the rel="last" pagination link, if any."""
+    last = links.get("last", {}).get("url")
+    if not last:
+        return None
+    query = dict(part.split("=", 1) for part in last.split("?", 1)[-1].split("&") if "=" in part)
+    return int(query.get("page", 1))
+
+
+def list_repositories(username, access_token=None, cache_path=LISTING_CACHE_PATH):
+    """Lists a GitHub user's repositories with name, fork, default_branch and pushed_at.
+
+    Pages are cached on disk with their ETags and revalidated with conditional
+    requests. After the first page, the remaining pages are fetched concurrently,
+    each worker thread with its own session.
+    """
+    cache = _load_json(cache_path, {})
+    user_cache = cache.get(username, {})
+    cached_pages = user_cache.get("pages", {})
+    url = f"{GITHUB_API_URL}/users/{username}/repos"
+
+    # requests.Session is not documented as thread-safe, so every thread gets its own.
+    sessions = []
+    local = threading.local()
+
+    def fetch(page):
+        if not hasattr(local, "session"):
+            local.session = _listing_session(access_token)
+            sessions.append(local.session)
+        return _fetch_listing_page(local.session, url, page, cached_pages.get(str(page)))
+
+    try:
+        first_page, links = fetch(1)
+        last_page = _last_page(links)
+        if last_page is None:
+            # A 304 may come without pagination links, so fall back to the cached page count.
+            last_page = user_cache.get("last_page", 1) if first_page is cached_pages.get("1") else 1
+        pages = {1: first_page}
+
+        with ThreadPoolExecutor(max_workers=MAX_LISTING_WORKERS) as executor:
+            futures = {page: executor.submit(fetch, page) for page in range(2, last_page + 1)}
+            for page, future in futures.items():
+                pages[page], links = future.result()
+
+        # The org may have grown past the cached page count since the last run.
+        page = last_page
+        while "next" in links and pages[page]["repos"]:
+            page += 1
+            pages[page], links = fetch(page)
+    finally:
+        for session in sessions:
+            session.close()
+
+    pages = {number: entry for number, entry in pages.items() if entry["repos"]}
+    cache[username] = {"last_page": max(pages, default=1), "pages": {str(n): e for n, e in pages.items()}}
+    _save_json(cache_path, cache)
+
+    return [repo for number in sorted(pages) for repo in pages[number]["repos"]]
 
 
 def get_repos(username, access_token=None, include_fork=False):
@@ -14,30 +147,169 @@ def get_repos(username, access_token=None, include_fork=False):
 
     Courtesy: Chansung Park.
     """
-    g = Github(access_token)
-    user = g.get_user(username)
-
     results = []
-    for repo in user.get_repos():
-        if repo.fork is False:
-            results.append(repo.name)
+    for repo in list_repositories(username, access_token):
+        if repo["fork"] is False:
+            results.append(repo["name"])
         else:
             if include_fork is True:
-                results.append(repo.name)
+                results.append(repo["name"])
 
     return results
 
 
-def mirror_repository(repository):
-    """Locally clones a repository."""
-    repository_url = f"https://github.com/{ORG}/{repository}.git"
+def clone_command(repository_url, repository_path, depth=CLONE_DEPTH, blob_limit=BLOB_LIMIT,
+                  sparse_paths=SPARSE_PATHS, no_checkout=NO_CHECKOUT):
+    """Builds the git clone command for the configured clone mode."""
+    command = ["git", "clone"]
+    if depth:
+        command.append(f"--depth={depth}")
+    if blob_limit:
+        command.append(f"--filter=blob:limit={blob_limit}")
+    if no_checkout:
+        command.append("--no-checkout")
+    elif sparse_paths:
+        command.append("--sparse")
+    command.extend([repository_url, repository_path])
+    return command
+
+
+def fetch_command(repository_path, depth=CLONE_DEPTH):
+    """Builds the git fetch command that updates an existing mirror.
+
+    Partial clones remember their blob filter, so it does not need repeating.
+    """
+    command = ["git", "-C", repository_path, "fetch", "origin", "HEAD"]
+    if depth:
+        command.append(f"--depth={depth}")
+    return command
+
+
+def is_mirrored(repository_path):
+    """Whether repository_path already holds a clone, bare mirrors included."""
+    return os.path.exists(os.path.join(repository_path, ".git")) or is_object_store(repository_path)
+
+
+def mirror_commands(repository, depth=CLONE_DEPTH, blob_limit=BLOB_LIMIT, sparse_paths=SPARSE_PATHS,
+                    no_checkout=NO_CHECKOUT):
+    """Returns the git commands that clone a repository or update its existing mirror.
+
+    An existing mirror keeps its layout: one without a worktree only has its
+    HEAD moved, so updating it writes nothing but the fetched objects.
+    """
+    repository_url = f"{GIT_BASE_URL}/{ORG}/{repository}.git"
+    repository_path = os.path.join(MIRROR_DIRECTORY, repository)
+
+    if is_mirrored(repository_path):
+        if is_object_store(repository_path):
+            update = ["git", "-C", repository_path, "update-ref", "HEAD", "FETCH_HEAD"]
+        else:
+            update = ["git", "-C", repository_path, "reset", "--hard", "FETCH_HEAD"]
+        return [fetch_command(repository_path, depth), update]
+
+    commands = [clone_command(repository_url, repository_path, depth, blob_limit, sparse_paths, no_checkout)]
+    if sparse_paths and not no_checkout:
+        commands.append(["git", "-C", repository_path, "sparse-checkout", "set", "--no-cone", *sparse_paths])
+    return commands
+
+
+def directory_size(path):
+    """Total size in bytes of the files under path."""
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    total += directory_size(entry.path)
+                else:
+                    total += entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        pass
+    return total
+
+
+async def run_git(command):
+    """Runs a git command without blocking the event loop, returning (returncode, stderr)."""
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await process.communicate()
+    return process.returncode, stderr.decode(errors="replace").strip()
+
+
+async def mirror_repository_async(repository, semaphore, update=False, retries=MAX_RETRIES, unchanged=False,
+                                  depth=CLONE_DEPTH, blob_limit=BLOB_LIMIT, sparse_paths=SPARSE_PATHS,
+                                  no_checkout=NO_CHECKOUT):
+    """Mirrors one repository under the shared concurrency limit, retrying with backoff.
+
+    Existing mirrors are skipped unless `update` is set and the repository has
+    been pushed to since it was mirrored (`unchanged` is False). Returns a report
+    entry with the outcome, attempts, duration and bytes on disk.
+    """
     repository_path = os.path.join(MIRROR_DIRECTORY, repository)
+    report = {"repository": repository, "status": "skipped", "attempts": 0, "duration": 0.0, "bytes": 0, "error": None}
+    existing = is_mirrored(repository_path)
+    if existing and (not update or unchanged):
+        return report
+
+    async with semaphore:
+        with metrics.span("mirror_repository", repository=repository) as attributes:
+            start = time.monotonic()
+            for attempt in range(1, retries + 1):
+                report["attempts"] = attempt
+                metrics.increment("mirror_attempts")
+                if attempt > 1:
+                    metrics.increment("mirror_retries")
+                error = None
+                for command in mirror_commands(repository, depth, blob_limit, sparse_paths, no_checkout):
+                    returncode, stderr = await run_git(command)
+                    if returncode != 0:
+                        error = stderr or f"{' '.join(command)} exited with {returncode}"
+                        break
+
+                if error is None:
+                    report["status"] = "updated" if existing else "cloned"
+                    report["error"] = None
+                    break
+
+                report["status"] = "failed"
+                report["error"] = error
+                if attempt < retries:
+                    # Exponential backoff with jitter so retries do not arrive in lockstep.
+                    delay = RETRY_BACKOFF * 2 ** (attempt - 1) * (0.5 + random.random())
+                    await asyncio.sleep(delay)
+
+            report["duration"] = round(time.monotonic() - start, 3)
+            attributes.update(status=report["status"], attempts=report["attempts"])
+
+    # Walking a large mirror would stall the event loop that drives the other clones.
+    report["bytes"] = await asyncio.to_thread(directory_size, repository_path)
+    metrics.increment("repositories_mirrored", status=report["status"])
+    metrics.increment("mirror_bytes", report["bytes"])
+    return report
 
-    # Clone the repository
-    subprocess.run(["git", "clone", repository_url, repository_path])
 
+async def mirror_repositories_async(repositories, concurrency=MAX_CONCURRENT_CLONES, update=False,
+                                    retries=MAX_RETRIES, unchanged=(), no_checkout=NO_CHECKOUT):
+    """Mirrors repositories with at most `concurrency` git processes in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [
+        asyncio.create_task(mirror_repository_async(repository, semaphore, update=update, retries=retries,
+                                                    unchanged=repository in unchanged, no_checkout=no_checkout))
+        for repository in repositories
+    ]
 
-def mirror_repositories():
+    reports = []
+    for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+        report = await task
+        reports.append(report)
+        print(f"[{done}/{len(tasks)}] {report['repository']}: {report['status']} "
+              f"({report['duration']:.1f}s, {report['bytes'] / 1e6:.1f} MB)")
+    return sorted(reports, key=lambda r: r["repository"])
+
+
+def mirror_repositories(concurrency=MAX_CONCURRENT_CLONES, update=False, retries=MAX_RETRIES,
+                        report_path=CLONE_REPORT_PATH, no_checkout=NO_CHECKOUT):
     # Create the mirror directory if it doesn't exist
     if not os.path.exists(MIRROR_DIRECTORY):
         os.makedirs(MIRROR_DIRECTORY)
@@ -45,14 +317,51 @@ def mirror_repositories():
     # Get the list of repositories in the organization
     if not os.environ["GH_ACCESS_TOKEN"]:
         raise ValueError("You must set `GH_ACCESS_TOKEN` as an env variable.")
-    repositories = get_repos(ORG, os.environ["GH_ACCESS_TOKEN"])
+    listing = [repo for repo in list_repositories(ORG, os.environ["GH_ACCESS_TOKEN"]) if not repo["fork"]]
+    repositories = [repo["name"] for repo in listing]
     print(f"Total repositories found: {len(repositories)}.")
 
-    # Mirror repositories using multiprocessing
-    print("Cloning repositories.")
-    with Pool() as pool:
-        pool.map(mirror_repository, repositories)
+    # Repositories not pushed to since they were last mirrored need no fetch.
+    state_path = os.path.join(MIRROR_DIRECTORY, MIRROR_STATE_FILE)
+    mirror_state = _load_json(state_path, {})
+    pushed_at = {repo["name"]: repo["pushed_at"] for repo in listing}
+    unchanged = {name for name, pushed in pushed_at.items() if pushed and mirror_state.get(name) == pushed}
+
+    print(f"Cloning repositories with up to {concurrency} concurrent clones.")
+    reports = asyncio.run(mirror_repositories_async(repositories, concurrency, update, retries, unchanged,
+                                                    no_checkout))
+
+    for report in reports:
+        if report["status"] in ("cloned", "updated"):
+            mirror_state[report["repository"]] = pushed_at[report["repository"]]
+    _save_json(state_path, mirror_state)
+
+    with open(report_path, "w") as f:
+        json.dump(reports, f, indent=2)
+
+    failed = [r["repository"] for r in reports if r["status"] == "failed"]
+    total_time = sum(r["duration"] for r in reports)
+    total_bytes = sum(r["bytes"] for r in reports)
+    print(f"Mirrored {len(reports) - len(failed)} repositories ({total_bytes / 1e6:.1f} MB, "
+          f"{total_time:.1f}s of clone time). Report written to {report_path}.")
+    if failed:
+        print(f"Failed to mirror {len(failed)} repositories: {', '.join(failed)}")
+    return reports
 
 
 if __name__ == "__main__":
-    mirror_repositories()
+    parser = argparse.ArgumentParser(description="Mirror the repositories of a GitHub organization")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_CLONES,
+                        help="Maximum number of clones running at once")
+    parser.add_argument("--retries", type=int, default=MAX_RETRIES,
+                        help="Attempts per repository before giving up")
+    parser.add_argument("--update", action="store_true",
+                        help="Fetch into existing mirrors instead of skipping them")
+    parser.add_argument("--report", default=CLONE_REPORT_PATH,
+                        help="Where to write the per-repository timing report")
+    parser.add_argument("--no-checkout", action="store_true", default=NO_CHECKOUT,
+                        help="Clone without a worktree; prepare_dataset reads files from the object store")
+    args = parser.parse_args()
+
+    metrics.export_at_exit()
+    mirror_repositories(args.concurrency, args.update, args.retries, args.report, args.no_checkout)
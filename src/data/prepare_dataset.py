@@ -1,14 +1,26 @@
 import os
+import re
 import json
-import pandas as pd
+import time
+import signal
 import logging
-from nbformat import reads, NO_CONVERT
+import argparse
+from collections import deque
+from contextlib import nullcontext
+from multiprocessing import Pool, TimeoutError as PoolTimeoutError
 from tqdm import tqdm
 from datasets import Dataset
 from typing import Dict, List, Optional, Tuple
-from huggingface_hub import create_repo, upload_folder
-import tempfile
-import shutil
+from shard_writer import ShardWriter, FEATHER_FORMAT, PARQUET_FORMAT, DEFAULT_COMPRESSION, COMPRESSION_LEVEL
+from build_manifest import BuildManifest, MANIFEST_DIRECTORY, resolve_head
+from dedup import MinHashLSH, deduplicate_shards, DEDUP_THRESHOLD, DEDUP_REPORT_PATH
+from dataset_index import DatasetIndex, open_dataset_repo
+from dataset_reader import read_shard
+
+import data_bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
+from common.file_filter import FileFilter
+from common.git_objects import GitObjectReader, is_object_store
 
 # Set up logging
 logging.basicConfig(
@@ -21,181 +33,399 @@ logger = logging.getLogger(__name__)
 MIRROR_DIRECTORY = "open-ai-repos"
 DATASET_ID = "hamza-amin/readme-gen-data"
 SERIALIZE_IN_CHUNKS = 10000
-FEATHER_FORMAT = "ftr"
-
-# Anti-formats (keeping the original lists)
-IMAGE = ["png", "jpg", "jpeg", "gif"]
-VIDEO = ["mp4", "jfif"]
-DOC = ["key", "PDF", "pdf", "docx", "xlsx", "pptx"]
-AUDIO = ["flac", "ogg", "mid", "webm", "wav", "mp3"]
-ARCHIVE = ["jar", "aar", "gz", "zip", "bz2"]
-MODEL = ["onnx", "pickle", "model", "neuron"]
-OTHERS = [
-    "npy", "index", "inv", "DS_Store", "rdb", "pack", "idx", "glb",
-    "gltf", "len", "otf", "unitypackage", "ttf", "xz", "pcm", "opus"
-]
-ANTI_FORMATS = tuple(IMAGE + VIDEO + DOC + AUDIO + ARCHIVE + MODEL + OTHERS)
+NUM_WORKERS = os.cpu_count() or 1
+REPO_TIMEOUT = 600  # Seconds a worker may spend on one repository before skipping it
+POOL_TIMEOUT_GRACE = 60  # Extra seconds the parent waits before replacing a worker that ignored its timeout
+WORKER_MAX_TASKS = 100  # Repositories a worker process handles before it is replaced
+
+# Notebook outputs are skipped at the byte level before the JSON is parsed
+NOTEBOOK_OUTPUTS = re.compile(rb'"outputs"\s*:\s*\[')
+JSON_STRUCTURAL = re.compile(rb'[\[\]{}"]')
 
 # Key file patterns to identify important code files
 KEY_FILE_PATTERNS = [
     "main", "index", "app", "setup.py", "package.json", 
     "requirements.txt", "Dockerfile", "docker-compose.yml"
 ]
+KEY_FILE_PATTERN = re.compile("|".join(map(re.escape, KEY_FILE_PATTERNS)), re.IGNORECASE)
 
 class RepoProcessor:
-    def __init__(self, directory: str):
+    def __init__(self, directory: str, file_format: str = FEATHER_FORMAT,
+                 compression: Optional[str] = DEFAULT_COMPRESSION, compression_level: Optional[int] = COMPRESSION_LEVEL):
         self.directory = directory
-        self.df = pd.DataFrame(columns=["repo_id", "file_structure", "readme_content", "key_code_snippets"])
-        self.chunk_flag = 0
+        self.file_format = file_format
+        self.compression = compression
+        self.compression_level = compression_level
+        self.file_filter = FileFilter()
 
     def _is_key_file(self, file_path: str) -> bool:
         """Determine if a file is a key file based on patterns."""
-        file_name = os.path.basename(file_path).lower()
-        return any(pattern.lower() in file_name for pattern in KEY_FILE_PATTERNS)
+        return KEY_FILE_PATTERN.search(os.path.basename(file_path)) is not None
 
-    def _read_file_content(self, file_path: str) -> Optional[str]:
-        """Safely read file content."""
+    def _read_file_content(self, file_path: str, opener=open, skip_generated: bool = True) -> Optional[str]:
+        """Safely read file content, skipping files that look binary or, if skip_generated, generated."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if file_path.endswith('.ipynb'):
-                    return self._process_notebook(content)
-                return content
+            if file_path.endswith('.ipynb'):
+                with opener(file_path, 'rb') as f:
+                    content = f.read()
+                metrics.increment("bytes_read", len(content))
+                started = time.perf_counter()
+                notebook = self._process_notebook(content)
+                metrics.observe("parse_notebook", time.perf_counter() - started)
+                metrics.increment("notebooks_parsed")
+                return notebook
+            data = self.file_filter.read(file_path, skip_generated=skip_generated, opener=opener)
+            if data is None:
+                return None
+            metrics.increment("bytes_read", len(data))
+            # Translate newlines like reading in text mode would.
+            return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
         except Exception as e:
             logger.warning(f"Error reading file {file_path}: {e}")
             return None
 
-    def _process_notebook(self, content: str) -> str:
-        """Process Jupyter notebook content."""
+    def _process_notebook(self, content: bytes) -> str:
+        """Extract code cell sources from a Jupyter notebook.
+
+        Cell outputs are cut out of the raw bytes before parsing, so embedded
+        images and large outputs are never decoded or validated.
+        """
         try:
-            notebook = reads(content, NO_CONVERT)
-            code_cells = [
-                c["source"] for c in notebook["cells"]
-                if c["cell_type"] == "code" and not (
-                    c["source"].startswith("!") or 
-                    "%%capture" in c["source"]
-                )
-            ]
+            notebook = json.loads(_strip_notebook_outputs(content))
+            if "cells" in notebook:
+                cells, source_key = notebook["cells"], "source"
+            else:
+                # nbformat 3 keeps cells in worksheets and code in "input".
+                cells = [c for ws in notebook.get("worksheets", []) for c in ws.get("cells", [])]
+                source_key = "input"
+
+            code_cells = []
+            for cell in cells:
+                if cell.get("cell_type") != "code":
+                    continue
+                source = cell.get(source_key, "")
+                if isinstance(source, list):
+                    source = "".join(source)
+                if not (source.startswith("!") or "%%capture" in source):
+                    code_cells.append(source)
             return "\n".join(code_cells)
         except Exception as e:
             logger.warning(f"Error processing notebook: {e}")
             return ""
 
-    def _build_file_structure(self, start_path: str) -> Dict:
-        """Build a JSON representation of the file structure."""
-        structure = {
-            "type": "directory",
-            "name": os.path.basename(start_path),
-            "children": []
-        }
-        
+    def _read_key_file(self, rel_path: str, entry: os.DirEntry, budget: int,
+                       key_code_snippets: Dict[str, str], opener=open) -> int:
+        """Read a key file into key_code_snippets if it fits the budget; return the bytes it used.
+
+        Notebooks are capped and charged by their size on disk like any other
+        file, since that is what has to be read before their outputs are dropped.
+        """
         try:
-            for item in os.listdir(start_path):
-                full_path = os.path.join(start_path, item)
-                if any(k in full_path for k in [".git", "__pycache__", "xcodeproj"]):
+            size = entry.stat(follow_symlinks=False).st_size
+        except OSError as e:
+            logger.warning(f"Error inspecting {entry.path}: {e}")
+            return 0
+        if size > budget or not self.file_filter.wanted(entry.name, size):
+            return 0
+        content = self._read_file_content(entry.path, opener)
+        if not content:
+            return 0
+        key_code_snippets[rel_path] = content
+        return size
+
+    def process_repository(self, repo_path: str) -> Tuple[List[Dict], Dict, Optional[str]]:
+        """Process a single repository in one pass over its tree.
+
+        Key files are read until the filter's per-repository byte budget is
+        spent. Bare and --no-checkout mirrors are read from the git object store.
+        """
+        file_structure = []
+        key_code_snippets = {}
+        readmes = []
+        budget = self.file_filter.max_repo_bytes
+        objects = GitObjectReader(repo_path) if is_object_store(repo_path) else None
+        opener = objects.open if objects else open
+        with metrics.span("process_repository", repository=os.path.basename(repo_path),
+                          source="objects" if objects else "worktree") as attributes, \
+                objects or nullcontext():
+            for rel_path, entry, is_dir in self.file_filter.walk(repo_path, objects):
+                file_structure.append({"path": rel_path, "type": "directory" if is_dir else "file"})
+                if is_dir:
                     continue
-                    
-                if os.path.isfile(full_path) and not item.endswith(ANTI_FORMATS):
-                    structure["children"].append({
-                        "type": "file",
-                        "name": item
-                    })
-                elif os.path.isdir(full_path):
-                    structure["children"].append(
-                        self._build_file_structure(full_path)
-                    )
+                if entry.name.lower().startswith('readme.'):
+                    readmes.append((rel_path.count("/"), entry.path))
+                elif self._is_key_file(entry.name):
+                    budget -= self._read_key_file(rel_path, entry, budget, key_code_snippets, opener)
+
+            # Prefer the README closest to the repository root. It is the training
+            # label, so a long badge line or a "DO NOT EDIT" note does not drop it.
+            readme_content = None
+            if readmes:
+                readme_content = self._read_file_content(min(readmes)[1], opener, skip_generated=False)
+
+            files = sum(entry["type"] == "file" for entry in file_structure)
+            metrics.increment("files_scanned", files)
+            metrics.increment("directories_scanned", len(file_structure) - files)
+            metrics.increment("key_files_read", len(key_code_snippets))
+            attributes.update(files=files, key_files=len(key_code_snippets))
+
+        return file_structure, key_code_snippets, readme_content
+
+    def _build_repo_data(self, repo_dir: str) -> Optional[Dict]:
+        """Process a repository directory into a dataset row."""
+        full_path = os.path.join(self.directory, repo_dir)
+        try:
+            file_structure, key_code_snippets, readme_content = self.process_repository(full_path)
+            return {
+                "repo_id": repo_dir,
+                "file_structure": file_structure,
+                "readme_content": readme_content or "",
+                "key_code_snippets": [{"path": path, "content": content}
+                                      for path, content in key_code_snippets.items()]
+            }
         except Exception as e:
-            logger.error(f"Error building file structure for {start_path}: {e}")
-        
-        return structure
+            logger.error(f"Error processing repository {repo_dir}: {e}")
+            return None
 
-    def process_repository(self, repo_path: str) -> Tuple[Dict, Dict, Optional[str]]:
-        """Process a single repository."""
-        file_structure = self._build_file_structure(repo_path)
-        key_code_snippets = {}
-        readme_content = None
+    def _iter_repo_data(self, repo_dirs: List[str], num_workers: int):
+        """Yield dataset rows in `repo_dirs` order, using a worker pool if requested."""
+        if num_workers <= 1:
+            for repo_dir in repo_dirs:
+                yield self._build_repo_data(repo_dir)
+            return
+
+        # Keep a bounded window of tasks in flight so results stream back in
+        # order without queueing the whole corpus up front.
+        max_pending = num_workers * 4
+        pending = deque()
+        remaining = iter(repo_dirs)
+
+        def start_pool():
+            return Pool(num_workers, initializer=_init_worker, initargs=(self.directory,),
+                        maxtasksperchild=WORKER_MAX_TASKS)
+
+        pool = start_pool()
+        try:
+            for repo_dir in remaining:
+                pending.append((repo_dir, pool.apply_async(_process_repo_worker, (repo_dir,))))
+                if len(pending) >= max_pending:
+                    break
 
-        for root, _, files in os.walk(repo_path):
-            for file in files:
-                if file.lower().startswith('readme.') and not file.endswith(ANTI_FORMATS):
-                    readme_path = os.path.join(root, file)
-                    readme_content = self._read_file_content(readme_path)
+            while pending:
+                repo_dir, result = pending.popleft()
+                try:
+                    # Workers stop themselves after REPO_TIMEOUT; this only fires if one could not.
+                    row, worker_metrics = result.get(timeout=REPO_TIMEOUT + POOL_TIMEOUT_GRACE)
+                    metrics.METRICS.merge(worker_metrics)
+                    yield row
+                except PoolTimeoutError:
+                    logger.error(f"Worker stuck on repository {repo_dir}, restarting the pool and skipping it")
+                    # A stuck worker would hold its slot forever, so replace the whole pool and resubmit.
+                    pool.terminate()
+                    pool.join()
+                    pool = start_pool()
+                    pending = deque((pending_dir, pool.apply_async(_process_repo_worker, (pending_dir,)))
+                                    for pending_dir, _ in pending)
+                    yield None
+                except Exception as e:
+                    logger.error(f"Error processing repository {repo_dir}: {e}")
+                    yield None
+
+                next_dir = next(remaining, None)
+                if next_dir is not None:
+                    pending.append((next_dir, pool.apply_async(_process_repo_worker, (next_dir,))))
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def process_repositories(self, num_workers: int = 1, manifest: Optional[BuildManifest] = None) -> List[str]:
+        """Process the repositories in the directory and return the shard paths written.
+
+        With a manifest, repositories whose HEAD commit matches the last build
+        are skipped and only new or changed ones are processed and written, so
+        the shards hold just the rows to publish. The caller commits the
+        manifest once those rows are published.
+        """
+        repo_dirs = sorted(d for d in os.listdir(self.directory)
+                           if os.path.isdir(os.path.join(self.directory, d)))
+
+        heads = {}
+        to_process = repo_dirs
+        if manifest is not None:
+            heads = {d: resolve_head(os.path.join(self.directory, d)) for d in repo_dirs}
+            to_process = [d for d in repo_dirs if not manifest.is_current(d, heads[d])]
+            for repo_dir in repo_dirs:
+                if manifest.is_current(repo_dir, heads[repo_dir]):
+                    manifest.keep(repo_dir)
+            metrics.increment("repositories_reused", len(repo_dirs) - len(to_process))
+            logger.info(f"{len(repo_dirs) - len(to_process)} repositories unchanged, "
+                        f"{len(to_process)} to process")
+
+        processed_rows = self._iter_repo_data(to_process, num_workers)
+        with ShardWriter(file_format=self.file_format, rows_per_shard=SERIALIZE_IN_CHUNKS,
+                         compression=self.compression, compression_level=self.compression_level) as writer:
+            for repo_dir, repo_data in zip(to_process, tqdm(processed_rows, total=len(to_process),
+                                                             desc="Processing repositories")):
+                if repo_data is None:
+                    metrics.increment("repositories_failed")
                     continue
+                metrics.increment("repositories_processed")
+                writer.write_row(repo_data)
+                if manifest is not None:
+                    manifest.record(repo_dir, heads[repo_dir])
+        return writer.shard_paths
 
-                file_path = os.path.join(root, file)
-                if not file_path.endswith(ANTI_FORMATS) and self._is_key_file(file_path):
-                    content = self._read_file_content(file_path)
-                    if content:
-                        relative_path = os.path.relpath(file_path, repo_path)
-                        key_code_snippets[relative_path] = content
+def _skip_json_string(content: bytes, start: int) -> int:
+    """Return the offset just past the JSON string whose opening quote is at start."""
+    end = start
+    while True:
+        end = content.find(b'"', end + 1)
+        if end < 0:
+            raise ValueError("Unterminated string in notebook")
+        backslashes = 0
+        while content[end - 1 - backslashes] == 0x5C:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return end + 1
 
-        return file_structure, key_code_snippets, readme_content
 
-    def process_repositories(self):
-        """Process all repositories in the directory."""
-        repo_dirs = [d for d in os.listdir(self.directory) 
-                    if os.path.isdir(os.path.join(self.directory, d))]
-        
-        for repo_dir in tqdm(repo_dirs, desc="Processing repositories"):
-            full_path = os.path.join(self.directory, repo_dir)
-            try:
-                file_structure, key_code_snippets, readme_content = self.process_repository(full_path)
-                
-                repo_data = {
-                    "repo_id": repo_dir,
-                    "file_structure": json.dumps(file_structure),
-                    "readme_content": readme_content or "",
-                    "key_code_snippets": json.dumps(key_code_snippets)
-                }
-                
-                self.df = pd.concat([self.df, pd.DataFrame([repo_data])], ignore_index=True)
-                
-                if SERIALIZE_IN_CHUNKS and len(self.df) >= SERIALIZE_IN_CHUNKS:
-                    self._serialize_chunk()
-                    
-            except Exception as e:
-                logger.error(f"Error processing repository {repo_dir}: {e}")
-
-        if not self.df.empty:
-            self._serialize_chunk()
-
-    def _serialize_chunk(self):
-        """Serialize the current DataFrame chunk."""
-        df_path = f"df_chunk_{self.chunk_flag}_{len(self.df)}.{FEATHER_FORMAT}"
-        logger.info(f"Serializing dataframe to {df_path}")
-        self.df.reset_index(drop=True).to_feather(df_path)
-        self.df = pd.DataFrame(columns=["repo_id", "file_structure", "readme_content", "key_code_snippets"])
-        self.chunk_flag += 1
-
-def upload_to_hub(file_format: str, repo_id: str):
-    """Upload files to Hugging Face Hub."""
+def _strip_notebook_outputs(content: bytes) -> bytes:
+    """Replace every "outputs" array in raw notebook JSON with an empty one.
+
+    Strings inside the outputs are jumped over with bytes.find rather than
+    decoded, so embedded images cost little more than a memchr.
+    """
+    pieces = []
+    position = 0
+    for match in NOTEBOOK_OUTPUTS.finditer(content):
+        if match.start() < position:
+            continue
+        depth = 1
+        offset = match.end()
+        while depth:
+            token = JSON_STRUCTURAL.search(content, offset)
+            if token is None:
+                raise ValueError("Unterminated outputs array in notebook")
+            char = content[token.start()]
+            if char == 0x22:  # '"'
+                offset = _skip_json_string(content, token.start())
+                continue
+            offset = token.end()
+            depth += 1 if char in (0x5B, 0x7B) else -1  # '[' '{' open, ']' '}' close
+        pieces.append(content[position:match.end()])
+        pieces.append(b']')
+        position = offset
+    pieces.append(content[position:])
+    return b''.join(pieces)
+
+
+_worker_processor = None
+
+class RepoTimeoutError(BaseException):
+    """Raised in a worker when a repository takes longer than REPO_TIMEOUT.
+
+    A BaseException, so the `except Exception` handlers on the way up do not swallow it.
+    """
+
+def _raise_repo_timeout(signum, frame):
+    raise RepoTimeoutError()
+
+def _init_worker(directory: str):
+    """Create the per-process RepoProcessor used by pool workers."""
+    global _worker_processor
+    _worker_processor = RepoProcessor(directory)
+
+def _process_repo_worker(repo_dir: str) -> Tuple[Optional[Dict], Dict]:
+    """Pool entry point: process one repository in a worker process.
+
+    Returns the row with the metrics recorded for it, which the parent merges.
+    A repository that takes longer than REPO_TIMEOUT is abandoned and its row
+    is None, so a hung repository never keeps the worker from the next one.
+    """
+    metrics.METRICS.reset()
+    alarm = hasattr(signal, "SIGALRM")
+    if alarm:
+        signal.signal(signal.SIGALRM, _raise_repo_timeout)
+        signal.alarm(REPO_TIMEOUT)
     try:
-        create_repo(repo_id=repo_id, exist_ok=True, repo_type="dataset")
-        logger.info(f"Repository '{repo_id}' created or already exists")
-        
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            current_dir = os.getcwd()
-            
-            for file in os.listdir(current_dir):
-                if file.endswith(f".{file_format}"):
-                    src_path = os.path.join(current_dir, file)
-                    dest_path = os.path.join(tmpdirname, file)
-                    shutil.move(src_path, dest_path)
-            
-            upload_folder(repo_id=repo_id, folder_path=tmpdirname, repo_type="dataset")
-            logger.info(f"Uploaded '{file_format}' files to '{repo_id}'")
-            
-    except Exception as e:
-        logger.error(f"Error in upload_to_hub: {e}")
+        row = _worker_processor._build_repo_data(repo_dir)
+    except RepoTimeoutError:
+        logger.error(f"Timed out processing repository {repo_dir} after {REPO_TIMEOUT}s, skipping")
+        metrics.increment("repositories_timed_out")
+        row = None
+    finally:
+        if alarm:
+            signal.alarm(0)
+    return row, metrics.METRICS.snapshot()
+
+def publish_shards(shard_paths: List[str], target: str = DATASET_ID) -> int:
+    """Upsert the rows of the written shards into the dataset repository.
+
+    The repository's index (see dataset_index.py) skips rows already there
+    unchanged and rewrites only the shards holding replaced rows, so an
+    incremental build uploads its changed rows and leaves the rest alone.
+    Shards are appended one at a time so only one is held in memory.
+    """
+    index = DatasetIndex(open_dataset_repo(target))
+    appended = 0
+    for path in shard_paths:
+        appended += index.append(read_shard(path))
+    logger.info(f"Published {appended} rows to '{target}'")
+    return appended
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the README dataset from mirrored repositories")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS,
+                        help="Number of worker processes (1 processes repositories sequentially)")
+    parser.add_argument("--format", default=FEATHER_FORMAT, choices=[FEATHER_FORMAT, PARQUET_FORMAT],
+                        help="File format of the serialized shards")
+    parser.add_argument("--compression", default=DEFAULT_COMPRESSION,
+                        choices=[DEFAULT_COMPRESSION, "zstd", "lz4", "none"],
+                        help="Compression codec for the shards (default: none for Feather, which readers "
+                             "memory-map in place, zstd for Parquet)")
+    parser.add_argument("--compression-level", type=int, default=COMPRESSION_LEVEL,
+                        help="Codec compression level (default: the codec's own default)")
+    parser.add_argument("--manifest-dir", default=MANIFEST_DIRECTORY,
+                        help="Directory holding the incremental build manifest")
+    parser.add_argument("--full", action="store_true",
+                        help="Reprocess every repository instead of only new or changed ones")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="Estimated Jaccard similarity above which repositories count as near duplicates")
+    parser.add_argument("--dedup-report", default=DEDUP_REPORT_PATH,
+                        help="Where to write the JSON report of removed duplicate clusters")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Keep near-duplicate repositories")
+    parser.add_argument("--metrics-report", default=os.getenv(metrics.REPORT_PATH_ENV),
+                        help="Write a JSON report of stage timings, counters and spans here")
+    parser.add_argument("--metrics-textfile", default=os.getenv(metrics.TEXTFILE_PATH_ENV),
+                        help="Write the metrics as a Prometheus textfile here")
+    args = parser.parse_args()
+    metrics.export_at_exit(args.metrics_report, args.metrics_textfile)
+
     try:
-        processor = RepoProcessor(MIRROR_DIRECTORY)
-        processor.process_repositories()
+        manifest = None if args.full else BuildManifest(args.manifest_dir)
+        compression = None if args.compression == "none" else args.compression
+        processor = RepoProcessor(MIRROR_DIRECTORY, file_format=args.format,
+                                  compression=compression, compression_level=args.compression_level)
+        shard_paths = processor.process_repositories(num_workers=args.workers, manifest=manifest)
+
+        if not args.no_dedup:
+            logger.info("Removing near-duplicate repositories")
+            with metrics.span("deduplicate"):
+                report = deduplicate_shards(shard_paths, MinHashLSH(threshold=args.dedup_threshold),
+                                            report_path=args.dedup_report, compression=compression,
+                                            compression_level=args.compression_level)
+            metrics.increment("duplicates_removed", report["removed"])
         
         logger.info("Uploading processed data to Hub")
-        upload_to_hub(file_format=FEATHER_FORMAT, repo_id=DATASET_ID)
-        
+        with metrics.span("upload"):
+            publish_shards(shard_paths, DATASET_ID)
+        # Only now are the recorded rows on the hub; a failed upload retries them next run.
+        if manifest is not None:
+            manifest.commit()
+        for path in shard_paths:
+            os.remove(path)
+
         logger.info("Processing completed successfully")
     except Exception as e:
         logger.error(f"Fatal error in main execution: {e}")
\ No newline at end of file
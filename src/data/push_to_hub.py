@@ -1,11 +1,21 @@
 from huggingface_hub import hf_hub_download
 from datasets import Dataset, load_dataset
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from tqdm import tqdm
-import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
 import tempfile
 import logging
-import shutil
+import argparse
+import contextvars
+
+from dataset_index import DatasetIndex, open_dataset_repo
+from dataset_reader import read_shard, upgrade_table
+
+import data_bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
 
 # Set up logging
 logging.basicConfig(
@@ -20,87 +30,92 @@ TARGET_REPO = "hamza-amin/readme-gen-data-v2"
 FILES_TO_PROCESS = [
     "df_chunk_0_122.ftr"
 ]
+MAX_DOWNLOAD_WORKERS = 8  # Shards downloaded and read at the same time
+
+def safe_download_file(repo_id: str, filename: str) -> Optional[str]:
+    """Return a local path for a shard without copying it.
 
-def safe_download_file(repo_id: str, filename: str) -> str:
-    """Safely download a file from the hub."""
+    Hub files are read where hf_hub_download caches them. If repo_id is a
+    local directory it stands in for the hub and the shard is used directly.
+    """
     try:
-        # Create a temporary directory
-        temp_dir = tempfile.mkdtemp()
-        
-        # Download the file
-        local_path = hf_hub_download(
+        if os.path.isdir(repo_id):
+            return os.path.join(repo_id, filename)
+        return hf_hub_download(
             repo_id=repo_id,
             filename=filename,
             repo_type="dataset",
-            local_dir=temp_dir,
         )
-        
-        # Create a new temporary file and copy the content
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.ftr')
-        shutil.copy2(local_path, temp_file.name)
-        
-        # Clean up the original temporary directory
-        shutil.rmtree(temp_dir)
-        
-        return temp_file.name
     except Exception as e:
         logger.error(f"Error downloading {filename}: {str(e)}")
         return None
 
-def process_files(files_to_process: list) -> pd.DataFrame:
-    """Process specified files and return combined DataFrame."""
-    all_dfs = []
-    temp_files = []
-    
-    for filename in tqdm(files_to_process, desc="Processing files"):
-        try:
-            local_path = safe_download_file(SOURCE_REPO, filename)
-            if local_path and os.path.exists(local_path):
-                try:
-                    df = pd.read_feather(local_path)
-                    all_dfs.append(df)
-                    temp_files.append(local_path)
-                    logger.info(f"Successfully processed {filename} with {len(df)} rows")
-                except Exception as e:
-                    logger.error(f"Error reading feather file {filename}: {str(e)}")
-            else:
-                logger.warning(f"Could not download or find {filename}")
-        except Exception as e:
-            logger.error(f"Error processing {filename}: {str(e)}")
-    
-    # Clean up temporary files
-    for temp_file in temp_files:
-        try:
-            os.unlink(temp_file)
-        except Exception as e:
-            logger.warning(f"Error deleting temporary file {temp_file}: {str(e)}")
-    
-    if not all_dfs:
+def load_shard(repo_id: str, filename: str) -> Optional[pa.Table]:
+    """Download and read one shard, returning None if either step fails.
+
+    Uncompressed Feather shards, which ShardWriter writes by default, are
+    memory-mapped and their buffers used in place; compressed Feather and
+    Parquet shards are decoded into memory.
+    """
+    with metrics.span("download_shard", shard=filename):
+        local_path = safe_download_file(repo_id, filename)
+    if not local_path or not os.path.exists(local_path):
+        logger.warning(f"Could not download or find {filename}")
+        metrics.increment("shards_failed")
+        return None
+    try:
+        with metrics.span("read_shard", shard=filename):
+            table = read_shard(local_path)
+        metrics.increment("shards_loaded")
+        metrics.increment("shard_bytes_read", os.path.getsize(local_path))
+        metrics.increment("rows_loaded", table.num_rows)
+        logger.info(f"Successfully processed {filename} with {table.num_rows} rows")
+        return table
+    except Exception as e:
+        logger.error(f"Error reading shard {filename}: {str(e)}")
+        metrics.increment("shards_failed")
+        return None
+
+def process_files(files_to_process: List[str], repo_id: str = SOURCE_REPO,
+                  max_workers: int = MAX_DOWNLOAD_WORKERS) -> Optional[pa.Table]:
+    """Download and read shards concurrently and return them as one Arrow table."""
+    with metrics.span("process_files", shards=len(files_to_process)), \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Run each load in a copy of this context so its spans nest under this one.
+        context = contextvars.copy_context()
+        results = executor.map(lambda filename: context.copy().run(load_shard, repo_id, filename),
+                               files_to_process)
+        tables = [table for table in tqdm(results, total=len(files_to_process), desc="Processing files")
+                  if table is not None]
+
+    if not tables:
         logger.error("No files were successfully processed")
         return None
-    
-    combined_df = pd.concat(all_dfs, ignore_index=True)
-    logger.info(f"Combined DataFrame has {len(combined_df)} rows")
-    return combined_df
 
-def append_to_existing_dataset(new_df: pd.DataFrame) -> pd.DataFrame:
+    combined = pa.concat_tables(tables)
+    logger.info(f"Combined table has {combined.num_rows} rows")
+    return combined
+
+def append_to_existing_dataset(new_table: pa.Table, repo_id: str = TARGET_REPO) -> pa.Table:
     """Append new data to existing dataset."""
     try:
-        existing_dataset = load_dataset(TARGET_REPO, split="train")
-        existing_df = existing_dataset.to_pandas()
-        logger.info(f"Existing dataset has {len(existing_df)} rows")
-        final_df = pd.concat([existing_df, new_df], ignore_index=True)
-        logger.info(f"Combined dataset has {len(final_df)} rows")
-        return final_df
+        existing_dataset = load_dataset(repo_id, split="train")
+        existing_table = upgrade_table(existing_dataset.with_format("arrow")[:])
+        logger.info(f"Existing dataset has {existing_table.num_rows} rows")
+        if new_table.schema != existing_table.schema:
+            new_table = new_table.select(existing_table.column_names).cast(existing_table.schema)
+        final_table = pa.concat_tables([existing_table, new_table])
+        logger.info(f"Combined dataset has {final_table.num_rows} rows")
+        return final_table
     except Exception as e:
         logger.info(f"No existing dataset found, using only new data: {str(e)}")
-        return new_df
+        return new_table
 
-def save_and_upload_dataset(df: pd.DataFrame, repo_id: str):
-    """Save DataFrame as parquet and upload to hub."""
+def save_and_upload_dataset(table: pa.Table, repo_id: str):
+    """Save table as parquet and upload to hub."""
     with tempfile.TemporaryDirectory() as tmpdirname:
         parquet_path = os.path.join(tmpdirname, "data.parquet")
-        df.to_parquet(parquet_path)
+        pq.write_table(table, parquet_path)
         
         try:
             dataset = Dataset.from_parquet(parquet_path)
@@ -110,24 +125,51 @@ def save_and_upload_dataset(df: pd.DataFrame, repo_id: str):
             logger.error(f"Error uploading to hub: {str(e)}")
             raise
 
-def main():
+def append_shards(new_table: pa.Table, target: str):
+    """Write only the new and changed rows to the target as extra Parquet shards."""
+    index = DatasetIndex(open_dataset_repo(target))
+    appended = index.append(new_table)
+    logger.info(f"Appended {appended} rows to {target}")
+
+def main(files_to_process: List[str] = FILES_TO_PROCESS, source: str = SOURCE_REPO,
+         max_workers: int = MAX_DOWNLOAD_WORKERS, target: str = TARGET_REPO, append: bool = False):
     try:
         # Process specified files
-        new_df = process_files(FILES_TO_PROCESS)
-        if new_df is None or len(new_df) == 0:
+        new_table = process_files(files_to_process, source, max_workers)
+        if new_table is None or new_table.num_rows == 0:
             logger.error("No data to process. Exiting.")
             return
         
-        logger.info(f"Processed {len(new_df)} new rows")
+        logger.info(f"Processed {new_table.num_rows} new rows")
+
+        if append:
+            with metrics.span("append_shards"):
+                append_shards(new_table, target)
+            return
         
         # Append to existing dataset
-        final_df = append_to_existing_dataset(new_df)
+        final_table = append_to_existing_dataset(new_table, target)
         
         # Save and upload dataset
-        save_and_upload_dataset(final_df, TARGET_REPO)
+        with metrics.span("upload"):
+            save_and_upload_dataset(final_table, target)
         
     except Exception as e:
         logger.error(f"An unexpected error occurred: {str(e)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Merge dataset shards and push them to the hub")
+    parser.add_argument("files", nargs="*", default=FILES_TO_PROCESS,
+                        help="Shard files to merge (default: FILES_TO_PROCESS)")
+    parser.add_argument("--source", default=SOURCE_REPO,
+                        help="Hub dataset repo or local directory holding the shards")
+    parser.add_argument("--workers", type=int, default=MAX_DOWNLOAD_WORKERS,
+                        help="Number of shards downloaded and read concurrently")
+    parser.add_argument("--target", default=TARGET_REPO,
+                        help="Hub dataset repo or local directory to update")
+    parser.add_argument("--append", action="store_true",
+                        help="Upload only new and changed rows as extra shards instead of the whole dataset")
+    args = parser.parse_args()
+
+    metrics.export_at_exit()
+    main(args.files, args.source, args.workers, args.target, args.append)
\ No newline at end of file
@@ -0,0 +1,181 @@
+import os
+import time
+import logging
+from typing import Dict, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import data_bootstrap  # noqa: F401  Makes `common` importable
+from common import metrics
+
+logger = logging.getLogger(__name__)
+
+# Constants
+FEATHER_FORMAT = "ftr"
+PARQUET_FORMAT = "parquet"
+ROWS_PER_SHARD = 10000
+BATCH_ROWS = 256  # Rows buffered in memory before a record batch is written
+BATCH_BYTES = 64 * 1024 * 1024  # Flush early if the buffered text grows past this
+# Codec for shard buffers by format: "zstd", "lz4" or None. Feather shards are
+# left uncompressed so readers can memory-map them and use the buffers in
+# place; Parquet pages are decoded on read anyway, so they are compressed.
+COMPRESSION = {FEATHER_FORMAT: None, PARQUET_FORMAT: "zstd"}
+DEFAULT_COMPRESSION = "default"  # Use the codec COMPRESSION lists for the shard's format
+COMPRESSION_LEVEL = None  # None uses the codec's default level
+
+# Arrow has no recursive types, so the directory tree is stored as a pre-order
+# list of paths, and the snippets map as a list of path/content pairs (the
+# physical layout of a map, which datasets can load).
+FILE_STRUCTURE_TYPE = pa.list_(pa.struct([("path", pa.string()), ("type", pa.string())]))
+KEY_CODE_SNIPPETS_TYPE = pa.list_(pa.struct([("path", pa.string()), ("content", pa.string())]))
+
+DATASET_SCHEMA = pa.schema([
+    ("repo_id", pa.string()),
+    ("file_structure", FILE_STRUCTURE_TYPE),
+    ("readme_content", pa.string()),
+    ("key_code_snippets", KEY_CODE_SNIPPETS_TYPE),
+])
+
+
+def _text_size(value) -> int:
+    """Approximate the bytes a row value adds to a batch."""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, list):
+        return sum(_text_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_text_size(item) for item in value.values())
+    return 0
+
+
+class ShardWriter:
+    """Stream dataset rows into Feather or Parquet shard files.
+
+    Rows are buffered column-wise and written as one Arrow record batch at a
+    time, so memory is bounded by a single batch and the cost of adding a row
+    does not depend on how many rows were written before it. A shard is closed
+    and renamed to ``df_chunk_<n>_<rows>.<format>`` once it holds
+    ``rows_per_shard`` rows, with n counting up from ``first_shard``.
+    """
+
+    def __init__(self, output_dir: str = ".", file_format: str = FEATHER_FORMAT,
+                 rows_per_shard: int = ROWS_PER_SHARD, batch_rows: int = BATCH_ROWS,
+                 batch_bytes: int = BATCH_BYTES, schema: pa.Schema = DATASET_SCHEMA,
+                 compression: Optional[str] = DEFAULT_COMPRESSION, compression_level: Optional[int] = COMPRESSION_LEVEL,
+                 first_shard: int = 0):
+        if file_format not in (FEATHER_FORMAT, PARQUET_FORMAT):
+            raise ValueError(f"Unsupported shard format: {file_format}")
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.rows_per_shard = rows_per_shard
+        self.batch_rows = batch_rows
+        self.batch_bytes = batch_bytes
+        self.schema = schema
+        self.compression = COMPRESSION[file_format] if compression == DEFAULT_COMPRESSION else compression
+        self.compression_level = compression_level
+        self.chunk_flag = first_shard
+        self.shard_paths = []
+        self._columns = {name: [] for name in schema.names}
+        self._batch_len = 0
+        self._batch_size = 0
+        self._writer = None
+        self._sink = None
+        self._shard_rows = 0
+        self._tmp_path: Optional[str] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write_row(self, row: Dict):
+        """Buffer a single row, flushing a record batch when the buffer is full."""
+        for name, values in self._columns.items():
+            value = row.get(name)
+            values.append(value)
+            self._batch_size += _text_size(value)
+        self._batch_len += 1
+
+        if self._batch_len >= self.batch_rows or self._batch_size >= self.batch_bytes:
+            self._flush_batch()
+        if self.rows_per_shard and self._shard_rows + self._batch_len >= self.rows_per_shard:
+            self._flush_batch()
+            self._serialize_chunk()
+
+    def write_table(self, table: pa.Table):
+        """Write a whole table, splitting it across shards like write_row would."""
+        self._flush_batch()
+        offset = 0
+        while offset < table.num_rows:
+            if self._writer is None:
+                self._open_shard()
+            room = table.num_rows - offset
+            if self.rows_per_shard:
+                room = min(room, self.rows_per_shard - self._shard_rows)
+            self._writer.write_table(table.slice(offset, room))
+            self._shard_rows += room
+            offset += room
+            if self.rows_per_shard and self._shard_rows >= self.rows_per_shard:
+                self._serialize_chunk()
+
+    def close(self):
+        """Flush buffered rows and finalize the open shard."""
+        self._flush_batch()
+        self._serialize_chunk()
+
+    def _open_shard(self):
+        self._tmp_path = os.path.join(self.output_dir, f"df_chunk_{self.chunk_flag}.{self.file_format}.tmp")
+        if self.file_format == PARQUET_FORMAT:
+            self._writer = pq.ParquetWriter(self._tmp_path, self.schema,
+                                            compression=self.compression or "none",
+                                            compression_level=self.compression_level)
+        else:
+            # Feather V2 is the Arrow IPC file format.
+            self._sink = pa.OSFile(self._tmp_path, "wb")
+            codec = None
+            if self.compression:
+                codec = pa.Codec(self.compression, self.compression_level)
+            options = pa.ipc.IpcWriteOptions(compression=codec)
+            self._writer = pa.ipc.new_file(self._sink, self.schema, options=options)
+
+    def _flush_batch(self):
+        """Write the buffered rows to the open shard as one record batch."""
+        if not self._batch_len:
+            return
+        if self._writer is None:
+            self._open_shard()
+
+        started = time.perf_counter()
+        batch = pa.RecordBatch.from_pydict(self._columns, schema=self.schema)
+        self._writer.write_batch(batch)
+        metrics.observe("write_batch", time.perf_counter() - started, format=self.file_format)
+        metrics.increment("rows_serialized", self._batch_len, format=self.file_format)
+        self._shard_rows += self._batch_len
+
+        self._columns = {name: [] for name in self.schema.names}
+        self._batch_len = 0
+        self._batch_size = 0
+
+    def _serialize_chunk(self):
+        """Close the open shard and give it its final name."""
+        if self._writer is None:
+            return
+        shard_path = os.path.join(self.output_dir, f"df_chunk_{self.chunk_flag}_{self._shard_rows}.{self.file_format}")
+        with metrics.span("serialize_chunk", labels={"format": self.file_format},
+                          shard=os.path.basename(shard_path), rows=self._shard_rows):
+            self._writer.close()
+            if self._sink is not None:
+                self._sink.close()
+            os.replace(self._tmp_path, shard_path)
+        metrics.increment("shard_bytes_written", os.path.getsize(shard_path), format=self.file_format)
+        metrics.increment("shards_written", format=self.file_format)
+        logger.info(f"Serialized {self._shard_rows} rows to {shard_path}")
+        self.shard_paths.append(shard_path)
+
+        self._writer = None
+        self._sink = None
+        self._tmp_path = None
+        self._shard_rows = 0
+        self.chunk_flag += 1
@@ -0,0 +1,10 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The scripts and dataset modules import each other by module name, as they do when run directly.
+for directory in (os.path.join(REPO_ROOT, "src"), os.path.join(REPO_ROOT, "src", "data"),
+                  os.path.join(REPO_ROOT, "scripts")):
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
@@ -0,0 +1,64 @@
+import os
+import shutil
+import subprocess
+import sys
+import types
+
+import pytest
+
+import batch
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def test_provider_scripts_do_not_shadow_their_sdks():
+    # The scripts directory is on sys.path, so a script named like an SDK would be imported in its place.
+    scripts_dir = os.path.dirname(os.path.abspath(batch.__file__))
+    for sdk in ("openai", "mistralai", "google", "langchain", "langchain_openai"):
+        assert not os.path.exists(os.path.join(scripts_dir, f"{sdk}.py"))
+    for script in batch.PROVIDERS.values():
+        assert os.path.exists(os.path.join(scripts_dir, f"{script}.py"))
+
+
+@pytest.fixture
+def remote(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "main.py").write_text("print('hello')\n")
+    subprocess.run(["git", "init", "-q", str(source)], check=True)
+    subprocess.run(["git", "-C", str(source), "add", "."], check=True)
+    subprocess.run(["git", "-C", str(source), "-c", "user.name=t", "-c", "user.email=t@t",
+                    "commit", "-qm", "init"], check=True)
+    return f"file://{source}"
+
+
+@pytest.fixture
+def provider():
+    return types.SimpleNamespace(
+        ReadRepositoryContents=lambda path: sorted(os.listdir(path)),
+        GenerateReadme=lambda contents: "# " + ", ".join(name for name in contents if not name.startswith(".")),
+    )
+
+
+def test_checkouts_are_kept_under_checkout_root(tmp_path, remote, provider):
+    checkout_root = tmp_path / "checkouts"
+    pipeline = batch.Pipeline(provider, str(tmp_path / "readmes"), checkout_root=str(checkout_root))
+
+    assert pipeline.Run([remote]) == {}
+    name = batch.RepositoryName(remote)
+    assert (tmp_path / "readmes" / name / "README.md").read_text() == "# main.py"
+    assert (checkout_root / name / "main.py").exists()
+
+    # A second run updates the kept checkout in place.
+    assert batch.Pipeline(provider, str(tmp_path / "readmes"), checkout_root=str(checkout_root)).Run([remote]) == {}
+
+
+def test_temporary_checkouts_are_removed(tmp_path, remote, provider):
+    pipeline = batch.Pipeline(provider, str(tmp_path / "readmes"))
+    assert pipeline.Run([remote]) == {}
+    assert not os.path.exists(os.path.join(pipeline.checkout_root, batch.RepositoryName(remote)))
+
+
+def test_cli_exposes_checkout_root():
+    result = subprocess.run([sys.executable, batch.__file__, "--help"], capture_output=True, text=True)
+    assert "--checkout-root" in result.stdout
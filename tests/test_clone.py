@@ -0,0 +1,168 @@
+import asyncio
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import parallel_clone_repos
+from common.git_objects import is_object_store
+from repo_clone import CloneRepository
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+LARGE_BLOB = "x" * 4096
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                          cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit(work, files, message):
+    for rel_path, text in files.items():
+        path = os.path.join(work, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+    git("add", "-A", cwd=work)
+    git("commit", "-qm", message, cwd=work)
+    git("push", "-q", "origin", "HEAD", cwd=work)
+
+
+@pytest.fixture
+def remotes(tmp_path):
+    """A directory of bare repositories served over file://, and a helper to push new commits to one."""
+    root = tmp_path / "remotes"
+    root.mkdir()
+
+    def create(name):
+        bare = str(root / f"{name}.git")
+        git("init", "-q", "--bare", bare)
+        # Partial clones need the server to accept object filters.
+        git("config", "uploadpack.allowFilter", "true", cwd=bare)
+        work = str(tmp_path / "work" / name)
+        git("clone", "-q", bare, work)
+        commit(work, {"README.md": "# first\n", "src/main.py": "print(1)\n", "tests/test_main.py": "pass\n",
+                      "assets/large.txt": LARGE_BLOB}, "first")
+        commit(work, {"README.md": "# second\n"}, "second")
+        return work
+
+    create.root = root
+    create.url = lambda name: f"file://{root}/{name}.git"
+    return create
+
+
+def test_clone_is_shallow(remotes, tmp_path):
+    remotes("repo")
+    checkout = str(tmp_path / "checkout")
+    CloneRepository(remotes.url("repo"), checkout)
+
+    assert git("rev-list", "--count", "HEAD", cwd=checkout) == "1"
+    assert open(os.path.join(checkout, "README.md")).read() == "# second\n"
+
+
+def test_blob_filter_leaves_large_blobs_on_the_server(remotes, tmp_path):
+    remotes("repo")
+    checkout = str(tmp_path / "checkout")
+    CloneRepository(remotes.url("repo"), checkout, blob_limit="1k", no_checkout=True)
+
+    missing = git("rev-list", "--objects", "--missing=print", "HEAD", cwd=checkout).splitlines()
+    large = git("rev-parse", "HEAD:assets/large.txt", cwd=checkout)
+    assert f"?{large}" in missing
+    assert git("cat-file", "-t", "HEAD:README.md", cwd=checkout) == "blob"
+
+
+def test_sparse_clone_checks_out_matching_paths(remotes, tmp_path):
+    remotes("repo")
+    checkout = str(tmp_path / "checkout")
+    CloneRepository(remotes.url("repo"), checkout, sparse_paths=["/*", "!/tests/"])
+
+    assert os.path.exists(os.path.join(checkout, "src", "main.py"))
+    assert not os.path.exists(os.path.join(checkout, "tests"))
+
+
+def test_no_checkout_clone_has_only_the_object_store(remotes, tmp_path):
+    remotes("repo")
+    checkout = str(tmp_path / "checkout")
+    CloneRepository(remotes.url("repo"), checkout, no_checkout=True)
+
+    assert is_object_store(checkout)
+    assert os.listdir(checkout) == [".git"]
+
+
+@pytest.mark.parametrize("no_checkout", [False, True])
+def test_existing_clone_is_fetched_and_reset(remotes, tmp_path, no_checkout):
+    work = remotes("repo")
+    checkout = str(tmp_path / "checkout")
+    CloneRepository(remotes.url("repo"), checkout, no_checkout=no_checkout)
+    marker = os.path.join(checkout, ".git", "marker")
+    open(marker, "w").close()
+
+    commit(work, {"README.md": "# third\n"}, "third")
+    CloneRepository(remotes.url("repo"), checkout, no_checkout=no_checkout)
+
+    assert os.path.exists(marker)  # Updated in place, not cloned again
+    assert git("rev-parse", "HEAD", cwd=checkout) == git("rev-parse", "HEAD", cwd=work)
+    assert git("show", "HEAD:README.md", cwd=checkout) == "# third"
+    if not no_checkout:
+        assert open(os.path.join(checkout, "README.md")).read() == "# third\n"
+
+
+@pytest.fixture
+def mirror(remotes, tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel_clone_repos, "GIT_BASE_URL", f"file://{remotes.root.parent}")
+    monkeypatch.setattr(parallel_clone_repos, "ORG", remotes.root.name)
+    monkeypatch.setattr(parallel_clone_repos, "MIRROR_DIRECTORY", str(tmp_path / "mirrors"))
+    monkeypatch.setattr(parallel_clone_repos, "RETRY_BACKOFF", 0)
+
+    def run(repositories, **options):
+        return asyncio.run(parallel_clone_repos.mirror_repositories_async(repositories, concurrency=2, **options))
+    return run
+
+
+def mirror_path(name):
+    return os.path.join(parallel_clone_repos.MIRROR_DIRECTORY, name)
+
+
+@pytest.mark.parametrize("no_checkout", [False, True])
+def test_mirror_clones_and_updates(remotes, mirror, no_checkout):
+    works = {name: remotes(name) for name in ("one", "two")}
+
+    reports = mirror(["one", "two"], no_checkout=no_checkout)
+    assert [(r["repository"], r["status"], r["attempts"]) for r in reports] == [("one", "cloned", 1),
+                                                                                ("two", "cloned", 1)]
+    assert all(r["bytes"] > 0 for r in reports)
+    assert is_object_store(mirror_path("one")) == no_checkout
+    assert git("rev-list", "--count", "HEAD", cwd=mirror_path("one")) == "1"
+
+    commit(works["one"], {"README.md": "# third\n"}, "third")
+    assert [r["status"] for r in mirror(["one", "two"])] == ["skipped", "skipped"]
+    reports = mirror(["one", "two"], update=True, unchanged={"two"})
+    assert [r["status"] for r in reports] == ["updated", "skipped"]
+    assert git("rev-parse", "HEAD", cwd=mirror_path("one")) == git("rev-parse", "HEAD", cwd=works["one"])
+    assert is_object_store(mirror_path("one")) == no_checkout
+
+
+def test_mirror_blob_filter_and_sparse_checkout(remotes, mirror):
+    remotes("repo")
+    semaphore = asyncio.Semaphore(1)
+    report = asyncio.run(parallel_clone_repos.mirror_repository_async(
+        "repo", semaphore, blob_limit="1k", sparse_paths=["/*", "!/tests/", "!/assets/"]))
+
+    assert report["status"] == "cloned"
+    assert os.path.exists(os.path.join(mirror_path("repo"), "src", "main.py"))
+    assert not os.path.exists(os.path.join(mirror_path("repo"), "tests"))
+    # The large blob is outside the sparse checkout, so it is never fetched.
+    missing = git("rev-list", "--objects", "--missing=print", "HEAD", cwd=mirror_path("repo")).splitlines()
+    assert "?" + git("rev-parse", "HEAD:assets/large.txt", cwd=mirror_path("repo")) in missing
+
+
+def test_mirror_retries_and_reports_failures(remotes, mirror):
+    remotes("exists")
+    reports = mirror(["exists", "missing"], retries=2)
+
+    assert [(r["repository"], r["status"], r["attempts"]) for r in reports] == [("exists", "cloned", 1),
+                                                                                ("missing", "failed", 2)]
+    assert "missing" in reports[1]["error"]
+    assert reports[1]["bytes"] == 0
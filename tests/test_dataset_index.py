@@ -0,0 +1,144 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from datasets import load_dataset
+
+from dataset_index import DatasetIndex, LocalDatasetRepo, INDEX_FILENAME, SHARD_DIRECTORY
+from dataset_reader import read_shard
+from shard_writer import DATASET_SCHEMA
+
+
+def make_row(repo_id, readme):
+    return {
+        "repo_id": repo_id,
+        "file_structure": [{"path": "main.py", "type": "file"}],
+        "readme_content": readme,
+        "key_code_snippets": [{"path": "main.py", "content": f"print({readme!r})"}],
+    }
+
+
+def make_table(*rows):
+    return pa.Table.from_pylist(list(rows), schema=DATASET_SCHEMA)
+
+
+def dataset_rows(path):
+    """Every row stored in the repository's shards, as {repo_id: [readme, ...]}."""
+    rows = {}
+    shard_dir = os.path.join(path, SHARD_DIRECTORY)
+    for name in sorted(os.listdir(shard_dir)):
+        for row in read_shard(os.path.join(shard_dir, name)).to_pylist():
+            rows.setdefault(row["repo_id"], []).append(row["readme_content"])
+    return rows
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return LocalDatasetRepo(str(tmp_path))
+
+
+def test_append_upserts_existing_repo(repo):
+    assert DatasetIndex(repo).append(make_table(make_row("a", "old"), make_row("b", "b"))) == 2
+
+    index = DatasetIndex(repo)
+    assert index.append(make_table(make_row("a", "new"), make_row("c", "c"))) == 2
+
+    assert dataset_rows(repo.path) == {"a": ["new"], "b": ["b"], "c": ["c"]}
+    assert set(DatasetIndex(repo).repos) == {"a", "b", "c"}
+
+
+def test_unchanged_rows_are_skipped(repo):
+    table = make_table(make_row("a", "a"), make_row("b", "b"))
+    DatasetIndex(repo).append(table)
+    files = sorted(os.listdir(os.path.join(repo.path, SHARD_DIRECTORY)))
+
+    assert DatasetIndex(repo).append(table) == 0
+    assert sorted(os.listdir(os.path.join(repo.path, SHARD_DIRECTORY))) == files
+
+
+def test_last_row_for_a_repo_wins(repo):
+    DatasetIndex(repo).append(make_table(make_row("a", "first"), make_row("a", "second")))
+    assert dataset_rows(repo.path) == {"a": ["second"]}
+
+
+def test_dataset_without_index_is_bootstrapped_from_its_shards(repo):
+    # What the full upload writes: train shards and no repo index.
+    os.makedirs(os.path.join(repo.path, SHARD_DIRECTORY))
+    pq.write_table(make_table(make_row("a", "old"), make_row("b", "b")),
+                   os.path.join(repo.path, SHARD_DIRECTORY, "train-00000-of-00001.parquet"))
+
+    index = DatasetIndex(repo)
+    assert set(index.repos) == {"a", "b"}
+    assert index.append(make_table(make_row("a", "new"), make_row("c", "c"))) == 2
+
+    assert dataset_rows(repo.path) == {"a": ["new"], "b": ["b"], "c": ["c"]}
+    assert os.path.exists(os.path.join(repo.path, INDEX_FILENAME))
+
+
+def test_bootstrap_removes_duplicates_across_shards(repo):
+    shard_dir = os.path.join(repo.path, SHARD_DIRECTORY)
+    os.makedirs(shard_dir)
+    pq.write_table(make_table(make_row("a", "old"), make_row("b", "b")),
+                   os.path.join(shard_dir, "train-00000-of-00002.parquet"))
+    pq.write_table(make_table(make_row("a", "older copy"), make_row("c", "c")),
+                   os.path.join(shard_dir, "train-00001-of-00002.parquet"))
+
+    DatasetIndex(repo).append(make_table(make_row("a", "new")))
+
+    assert dataset_rows(repo.path) == {"a": ["new"], "b": ["b"], "c": ["c"]}
+
+
+# The card push_to_hub writes for a dataset uploaded with Dataset.push_to_hub
+DATASET_CARD = """---
+configs:
+- config_name: default
+  data_files:
+  - split: train
+    path: data/train-*
+---
+"""
+
+
+def loaded_rows(path, cache_dir):
+    dataset = load_dataset(path, split="train", cache_dir=str(cache_dir))
+    return {row["repo_id"]: row["readme_content"] for row in dataset}
+
+
+@pytest.mark.parametrize("card", [None, DATASET_CARD])
+def test_appended_rows_are_loaded_with_the_uploaded_ones(repo, tmp_path, card):
+    os.makedirs(os.path.join(repo.path, SHARD_DIRECTORY))
+    pq.write_table(make_table(make_row("a", "old"), make_row("b", "b")),
+                   os.path.join(repo.path, SHARD_DIRECTORY, "train-00000-of-00001.parquet"))
+    if card:
+        with open(os.path.join(repo.path, "README.md"), "w") as f:
+            f.write(card)
+
+    DatasetIndex(repo).append(make_table(make_row("a", "new"), make_row("c", "c")))
+
+    assert loaded_rows(repo.path, tmp_path / "cache") == {"a": "new", "b": "b", "c": "c"}
+
+
+def test_appended_shards_are_loaded_next_to_untouched_uploaded_ones(repo, tmp_path):
+    os.makedirs(os.path.join(repo.path, SHARD_DIRECTORY))
+    pq.write_table(make_table(make_row("a", "a")),
+                   os.path.join(repo.path, SHARD_DIRECTORY, "train-00000-of-00001.parquet"))
+
+    DatasetIndex(repo).append(make_table(make_row("b", "b")))
+    DatasetIndex(repo).append(make_table(make_row("c", "c")))
+
+    assert sorted(os.listdir(os.path.join(repo.path, SHARD_DIRECTORY))) == [
+        "train-00000-of-00001.parquet", "train-00001-of-00002.parquet", "train-00002-of-00003.parquet"]
+    assert loaded_rows(repo.path, tmp_path / "cache") == {"a": "a", "b": "b", "c": "c"}
+
+
+def test_shards_appended_under_chunk_names_are_renamed(repo, tmp_path):
+    shard_dir = os.path.join(repo.path, SHARD_DIRECTORY)
+    os.makedirs(shard_dir)
+    pq.write_table(make_table(make_row("a", "a")), os.path.join(shard_dir, "train-00000-of-00001.parquet"))
+    pq.write_table(make_table(make_row("b", "b")), os.path.join(shard_dir, "df_chunk_0_1.parquet"))
+
+    DatasetIndex(repo).append(make_table(make_row("c", "c")))
+
+    assert all(name.startswith("train-") for name in os.listdir(shard_dir))
+    assert loaded_rows(repo.path, tmp_path / "cache") == {"a": "a", "b": "b", "c": "c"}
@@ -0,0 +1,111 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+from dataset_reader import read_shard
+from dedup import MinHashLSH, deduplicate_shards
+from shard_writer import PARQUET_FORMAT, ShardWriter
+
+
+def random_text(seed, words=400):
+    rng = random.Random(seed)
+    return " ".join("".join(rng.choice("abcdefghij") for _ in range(rng.randint(3, 8))) for _ in range(words))
+
+
+def edit(text, seed, changes=3):
+    """The text with a few words replaced, as a lightly modified fork would be."""
+    rng = random.Random(seed)
+    words = text.split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = "changed"
+    return " ".join(words)
+
+
+def jaccard(lsh, first, second):
+    a, b = set(lsh.shingles(first).tolist()), set(lsh.shingles(second).tolist())
+    return len(a & b) / len(a | b)
+
+
+def make_row(repo_id, readme):
+    return {
+        "repo_id": repo_id,
+        "file_structure": [{"path": "README.md", "type": "file"}],
+        "readme_content": readme,
+        "key_code_snippets": [{"path": "main.py", "content": f"print({repo_id!r})"}],
+    }
+
+
+def test_signature_estimates_jaccard():
+    lsh = MinHashLSH(num_permutations=256, num_bands=16)
+    text = random_text(0)
+    for changes in (5, 40, 150):
+        other = edit(text, changes, changes)
+        estimate = lsh.similarity(lsh.signature(text), lsh.signature(other))
+        assert estimate == pytest.approx(jaccard(lsh, text, other), abs=0.1)
+
+
+def test_signature_ignores_case_and_whitespace():
+    lsh = MinHashLSH()
+    text = random_text(1)
+    assert np.array_equal(lsh.signature(text), lsh.signature("  " + text.upper().replace(" ", "\n\t ")))
+    assert lsh.signature("short") is None
+
+
+def test_clusters_group_near_duplicates_only():
+    lsh = MinHashLSH()
+    first, second, unrelated = random_text(1), random_text(2), random_text(3)
+    texts = [first, second, edit(first, 10), unrelated, edit(second, 11), edit(first, 12), edit(unrelated, 13, 150)]
+    signatures = np.vstack([lsh.signature(text) for text in texts])
+
+    assert sorted(lsh.clusters(signatures)) == [[0, 2, 5], [1, 4]]
+
+
+def test_clusters_join_chains_through_union_find():
+    # a~b and b~c share bands and agree on 7 of 8 columns; a and c agree on
+    # only 6, below the threshold, yet all three end up in one cluster.
+    lsh = MinHashLSH(threshold=0.8, num_permutations=8, num_bands=4)
+    a = np.arange(8, dtype=np.uint32)
+    b = a.copy()
+    b[7] = 100
+    c = b.copy()
+    c[0] = 100
+    # d shares a band with a but agrees on too few columns to join.
+    d = np.array([0, 1, 200, 201, 202, 203, 204, 205], dtype=np.uint32)
+    signatures = np.vstack([c, d, a, b])
+
+    assert lsh.similarity(a, c) < lsh.threshold
+    assert lsh.clusters(signatures) == [[0, 2, 3]]
+
+
+def test_clusters_without_duplicates():
+    lsh = MinHashLSH()
+    signatures = np.vstack([lsh.signature(random_text(seed)) for seed in range(5)])
+    assert lsh.clusters(signatures) == []
+    assert lsh.clusters(signatures[:0]) == []
+
+
+def test_num_permutations_must_split_into_bands():
+    with pytest.raises(ValueError):
+        MinHashLSH(num_permutations=100, num_bands=16)
+
+
+def test_deduplicate_shards_keeps_first_of_each_cluster(tmp_path):
+    original, other = random_text(1), random_text(2)
+    writer = ShardWriter(str(tmp_path), PARQUET_FORMAT, rows_per_shard=2)
+    with writer:
+        for row in (make_row("a", original), make_row("b", other),
+                    make_row("fork-of-a", edit(original, 5)), make_row("c", random_text(3))):
+            writer.write_row(row)
+    shard_paths = list(writer.shard_paths)
+    report_path = tmp_path / "report.json"
+
+    report = deduplicate_shards(shard_paths, report_path=str(report_path))
+
+    assert report["removed"] == 1
+    assert [cluster["kept"] for cluster in report["clusters"]] == ["a"]
+    assert [duplicate["repo_id"] for duplicate in report["clusters"][0]["removed"]] == ["fork-of-a"]
+    assert json.loads(report_path.read_text()) == report
+    remaining = [repo_id for path in shard_paths for repo_id in read_shard(path)["repo_id"].to_pylist()]
+    assert remaining == ["a", "b", "c"]
@@ -0,0 +1,103 @@
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from common.file_filter import EXCLUDE_FILE, FileFilter, _translate
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+ROOT_GITIGNORE = """\
+# Comments and blank lines are ignored
+
+*.log
+!keep.log
+/root_only.txt
+build_out/
+docs/**/*.tmp
+**/cache
+a/**/z.txt
+data/*
+!data/keep/
+secret?.txt
+[abc]x.txt
+[!a-c]y.txt
+\\#hash.txt
+\\!bang.txt
+trailing\\ 
+"""
+
+SUB_GITIGNORE = """\
+local.txt
+/anchored.txt
+!important.log
+nested/
+deeper/**
+!deeper/kept.txt
+"""
+
+FILES = [
+    "app.log", "keep.log", "sub/app.log", "sub/important.log",
+    "root_only.txt", "sub/root_only.txt",
+    "build_out/x.py", "sub/build_out/x.py", "lib/build_out",
+    "docs/a.tmp", "docs/x/y/b.tmp", "docs/c.txt", "other/docs/d.tmp",
+    "cache/f.py", "src/cache/g.py", "src/cachex/h.py",
+    "a/z.txt", "a/b/c/z.txt", "a/b/y.txt", "b/a/z.txt",
+    "data/d.csv", "data/keep/k.csv", "data/sub/s.csv",
+    "secret1.txt", "secret12.txt", "ax.txt", "dx.txt", "ay.txt", "dy.txt",
+    "#hash.txt", "!bang.txt", "trailing ", "trailing",
+    "sub/local.txt", "sub/x/local.txt", "sub/anchored.txt", "sub/x/anchored.txt",
+    "sub/nested/n.py", "nested/n.py", "sub/deeper/kept.txt", "sub/deeper/gone.txt",
+    "excluded_by_info.txt", "sub/excluded_by_info.txt",
+]
+
+
+def git(repo, *args):
+    return subprocess.run(["git", "-c", "core.excludesFile=", *args], cwd=repo, check=True,
+                          capture_output=True).stdout
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q")
+    for rel_path in FILES:
+        path = tmp_path / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(rel_path)
+    (tmp_path / ".gitignore").write_text(ROOT_GITIGNORE)
+    (tmp_path / "sub" / ".gitignore").write_text(SUB_GITIGNORE)
+    (tmp_path / EXCLUDE_FILE).write_text("excluded_by_info.txt\n")
+    return str(tmp_path)
+
+
+def test_walk_matches_git_exclude_standard(repo):
+    walked = {rel_path for rel_path, _, is_dir in FileFilter().walk(repo) if not is_dir}
+    listed = set(git(repo, "ls-files", "-z", "-o", "--exclude-standard").decode().split("\0")) - {""}
+
+    assert walked == listed
+    # The fixture exercises both outcomes of every rule.
+    assert {"keep.log", "sub/important.log", "lib/build_out", "data/keep/k.csv",
+            "sub/deeper/kept.txt", "trailing"} <= walked
+    assert not {"app.log", "build_out/x.py", "docs/x/y/b.tmp", "src/cache/g.py", "a/b/c/z.txt",
+                "data/d.csv", "sub/x/local.txt", "trailing ", "excluded_by_info.txt"} & walked
+
+
+@pytest.mark.parametrize("pattern, matches, misses", [
+    ("*.py", ["a.py", ".py"], ["a/b.py", "a.pyc"]),
+    ("a?c", ["abc"], ["a/c", "ac"]),
+    ("**/x", ["x", "a/x", "a/b/x"], ["ax", "a/xb"]),
+    ("a/**", ["a/b", "a/b/c"], ["a", "ab/c"]),
+    ("a/**/b", ["a/b", "a/x/b", "a/x/y/b"], ["ab", "a/xb"]),
+    ("a**b", ["ab", "axxb"], ["a/b"]),
+    ("[a-c]x", ["bx"], ["dx", "/x"]),
+    ("[!a-c]x", ["dx"], ["bx"]),
+    ("[]]x", ["]x"], ["ax"]),
+    ("\\*x", ["*x"], ["ax"]),
+    ("a+(b).c", ["a+(b).c"], ["aab.c"]),
+])
+def test_translate(pattern, matches, misses):
+    regex = re.compile(_translate(pattern), re.DOTALL)
+    assert [path for path in matches if regex.fullmatch(path)] == matches
+    assert [path for path in misses if regex.fullmatch(path)] == []
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+import gemini
+from common import metrics
+from digest import EstimateTokens
+
+LONG_MODULE = '"""A module long enough to be outlined."""\n\n' + "".join(
+    f"def handler_{i}(request):\n    \"\"\"Handle request {i}.\"\"\"\n" + "    value = request\n" * 8 + "    return value\n\n"
+    for i in range(60))
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = str(tmp_path / "repo")
+    write(os.path.join(path, "main.py"), "print('hello')\n" * 80)
+    write(os.path.join(path, "handlers.py"), LONG_MODULE)
+    write(os.path.join(path, "requirements.txt"), "requests\npyarrow\n")
+    write(os.path.join(path, "docs", "notes.txt"), "not an important file\n")
+    return path
+
+
+def test_digest_savings_are_measured_against_the_previews(repo):
+    previews = gemini.ReadRepositoryContents(repo, digest=False)
+    metrics.METRICS.reset()
+
+    digest = gemini.ReadRepositoryContents(repo)
+
+    counters = metrics.METRICS.snapshot()["counters"]
+    assert counters[("digest_tokens_before", ())] == EstimateTokens(previews)
+    # The outline reaches handlers the 50-line preview never shows.
+    assert "def handler_20(request):" in digest and "def handler_20(" not in previews
+
+
+class CountingOpener:
+    """Opens files like open() and counts the bytes read from them."""
+
+    def __init__(self):
+        self.bytes_read = 0
+
+    def __call__(self, path, mode):
+        f = open(path, mode)
+        read = f.read
+
+        def counted(*args):
+            data = read(*args)
+            self.bytes_read += len(data)
+            return data
+        f.read = counted
+        return f
+
+
+def test_large_files_are_read_only_in_part(tmp_path):
+    path = str(tmp_path / "handlers.py")
+    write(path, LONG_MODULE * 40)
+    opener = CountingOpener()
+
+    text = gemini.ReadFileText(path, opener)
+    preview = gemini.ReadFilePreview(path, opener=opener)
+
+    assert len(text) == gemini.MAX_READ_BYTES
+    assert opener.bytes_read <= 2 * gemini.MAX_READ_BYTES
+    assert preview.count("\n") == gemini.MAX_PREVIEW_LINES + 4
+
+
+def test_truncated_module_is_still_outlined(repo):
+    write(os.path.join(repo, "handlers.py"), LONG_MODULE * 40)
+
+    digest = gemini.ReadRepositoryContents(repo)
+
+    assert "def handler_20(request):" in digest
+    assert "value = request" not in digest.split("handlers.py", 1)[1].split("File:", 1)[0]
+
+
+def test_contents_are_cut_to_the_prompt_limit(repo):
+    for i in range(gemini.MAX_IMPORTANT_FILES):
+        write(os.path.join(repo, f"module_{i}.py"), (str(i) * 2000 + "\n") * 60)
+
+    assert len(gemini.ReadRepositoryContents(repo, digest=False)) == gemini.MAX_CONTENT_LENGTH
+    assert len(gemini.ReadRepositoryContents(repo)) == gemini.MAX_CONTENT_LENGTH
@@ -0,0 +1,127 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from build_manifest import resolve_head
+from common import git_objects
+from common.file_filter import FileFilter
+from common.git_objects import STREAM_BYTES, GitObjectReader, is_object_store
+from repo_reader import IterRepositoryFiles
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+LARGE_TEXT = "".join(f"line {i}\n" for i in range(4 * STREAM_BYTES // 8))
+FILES = {
+    "README.md": "# Project\n",
+    "src/app.py": "print('app')\n",
+    "src/data/large.txt": LARGE_TEXT,
+    "build.log": "ignored\n",
+    ".gitignore": "*.log\n",
+}
+
+
+def git(*args, cwd=None):
+    return subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                          cwd=cwd, check=True, capture_output=True).stdout
+
+
+@pytest.fixture(scope="module")
+def work(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("work"))
+    git("init", "-q", path)
+    git("config", "uploadpack.allowFilter", "true", cwd=path)
+    for rel_path, text in FILES.items():
+        os.makedirs(os.path.dirname(os.path.join(path, rel_path)), exist_ok=True)
+        with open(os.path.join(path, rel_path), "w") as f:
+            f.write(text)
+    git("add", "-A", "-f", cwd=path)  # build.log is committed although .gitignore matches it
+    git("commit", "-qm", "init", cwd=path)
+    return path
+
+
+@pytest.fixture(scope="module", params=["bare", "no-checkout"])
+def store(request, work, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp(request.param) / "repo")
+    git("clone", "-q", "--bare" if request.param == "bare" else "--no-checkout", work, path)
+    return path
+
+
+@pytest.fixture(params=["batch-command", "batch"])
+def git_version(request, monkeypatch):
+    """Run each test with cat-file --batch-command and with the --batch/--batch-check fallback."""
+    if request.param == "batch":
+        monkeypatch.setattr(git_objects, "git_version", lambda: (2, 35))
+    elif git_objects.git_version() < git_objects.BATCH_COMMAND_VERSION:
+        pytest.skip("git is older than 2.36")
+
+
+def test_object_stores_are_detected(work, store):
+    assert is_object_store(store)
+    assert not is_object_store(work)
+    assert resolve_head(store) == git("rev-parse", "HEAD", cwd=work).decode().strip()
+
+
+def test_list_size_and_read(store, git_version):
+    with GitObjectReader(store) as objects:
+        assert [entry.name for entry in objects.listdir()] == [".gitignore", "README.md", "build.log", "src"]
+        assert [entry.name for entry in objects.listdir("src")] == ["app.py", "data"]
+        for rel_path, text in FILES.items():
+            entry = objects._entries[rel_path]
+            assert entry.stat().st_size == len(text)
+            assert objects.read(entry.oid) == text.encode()
+            with objects.open(rel_path) as f:
+                assert f.read() == text.encode()
+
+
+def test_sizes_loaded_in_bulk_match(store, git_version):
+    with GitObjectReader(store) as objects:
+        objects.load_sizes()
+        assert {path: objects.size(entry.oid) for path, entry in objects._entries.items() if entry.is_file()} == \
+            {path: len(text) for path, text in FILES.items()}
+
+
+def test_large_blob_is_streamed(store, git_version):
+    with GitObjectReader(store) as objects:
+        with objects.open("src/data/large.txt") as f:
+            assert isinstance(f, git_objects._BlobStream)
+            assert f.readline() == b"line 0\n"
+            assert f.read(7) == b"line 1\n"
+        # The batch process is still in step after a stream was abandoned half way.
+        assert objects.read(objects._entries["README.md"].oid) == FILES["README.md"].encode()
+        with objects.open("src/data/large.txt") as f:
+            assert f.read() == LARGE_TEXT.encode()
+
+
+def test_open_rejects_directories_and_text_mode(store):
+    with GitObjectReader(store) as objects:
+        with pytest.raises(FileNotFoundError):
+            objects.open("src")
+        with pytest.raises(ValueError):
+            objects.open("README.md", "r")
+
+
+def test_missing_blobs_of_a_partial_clone(work, tmp_path, git_version):
+    path = str(tmp_path / "partial")
+    git("clone", "-q", "--no-checkout", "--filter=blob:limit=1k", f"file://{work}", path)
+    git("remote", "remove", "origin", cwd=path)  # Nothing to fetch the missing blob from
+
+    with GitObjectReader(path) as objects:
+        [large] = objects.listdir("src/data")
+        with pytest.raises(FileNotFoundError):
+            large.stat()
+        with pytest.raises(FileNotFoundError):
+            objects.open("src/data/large.txt")
+        with objects.open("README.md") as f:
+            assert f.read() == FILES["README.md"].encode()
+
+
+def test_walk_and_read_match_the_worktree(work, store):
+    with GitObjectReader(store) as objects:
+        walked = [(rel_path, is_dir) for rel_path, _, is_dir in FileFilter().walk(store, objects)]
+    assert walked == [(rel_path, is_dir) for rel_path, _, is_dir in FileFilter().walk(work)
+                      if not rel_path.startswith(".git/") and rel_path != ".git"]
+    assert "build.log" not in dict(walked)
+
+    assert list(IterRepositoryFiles(store)) == list(IterRepositoryFiles(work))
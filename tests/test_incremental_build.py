@@ -0,0 +1,92 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from build_manifest import BuildManifest
+from common import metrics
+from dataset_index import SHARD_DIRECTORY
+from dataset_reader import read_shard
+from prepare_dataset import RepoProcessor, publish_shards
+from shard_writer import PARQUET_FORMAT
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+REPOSITORIES = ("alpha", "beta", "gamma")
+
+
+def git(*args, cwd=None):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=cwd, check=True, capture_output=True)
+
+
+def commit_readme(path, text):
+    with open(os.path.join(path, "README.md"), "w") as f:
+        f.write(text)
+    git("add", "-A", cwd=path)
+    git("commit", "-qm", text, cwd=path)
+
+
+@pytest.fixture
+def mirrors(tmp_path):
+    directory = tmp_path / "mirrors"
+    for name in REPOSITORIES:
+        path = str(directory / name)
+        git("init", "-q", path)
+        with open(os.path.join(path, "main.py"), "w") as f:
+            f.write(f"print({name!r})\n")
+        commit_readme(path, f"# {name}\n")
+    return str(directory)
+
+
+def processed():
+    return metrics.METRICS.snapshot()["counters"].get(("repositories_processed", ()), 0)
+
+
+def build(mirrors, manifest_dir, target):
+    """Run one incremental build into target and return how many repositories it processed."""
+    metrics.METRICS.reset()
+    manifest = BuildManifest(manifest_dir)
+    shard_paths = RepoProcessor(mirrors, file_format=PARQUET_FORMAT).process_repositories(manifest=manifest)
+    publish_shards(shard_paths, target)
+    manifest.commit()
+    for path in shard_paths:
+        os.remove(path)
+    return processed()
+
+
+def published_readmes(target):
+    readmes = {}
+    shard_dir = os.path.join(target, SHARD_DIRECTORY)
+    for name in sorted(os.listdir(shard_dir)):
+        for row in read_shard(os.path.join(shard_dir, name)).to_pylist():
+            readmes[row["repo_id"]] = row["readme_content"]
+    return readmes
+
+
+@pytest.fixture
+def build_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Shards are written to the working directory
+    os.makedirs("dataset")
+    return tmp_path
+
+
+def test_second_build_processes_only_the_changed_repository(mirrors, build_dir):
+    assert build(mirrors, "manifest", "dataset") == 3
+
+    commit_readme(os.path.join(mirrors, "beta"), "# beta, updated\n")
+    assert build(mirrors, "manifest", "dataset") == 1
+    assert published_readmes("dataset") == {"alpha": "# alpha\n", "beta": "# beta, updated\n",
+                                            "gamma": "# gamma\n"}
+
+    assert build(mirrors, "manifest", "dataset") == 0
+
+
+def test_unpublished_rows_are_processed_again(mirrors, build_dir):
+    RepoProcessor(mirrors, file_format=PARQUET_FORMAT).process_repositories(manifest=BuildManifest("manifest"))
+    # The manifest is not committed, as when publishing the rows fails.
+
+    metrics.METRICS.reset()
+    RepoProcessor(mirrors, file_format=PARQUET_FORMAT).process_repositories(manifest=BuildManifest("manifest"))
+    assert processed() == 3
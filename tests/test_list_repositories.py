@@ -0,0 +1,111 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import parallel_clone_repos
+
+
+class GitHubStub(BaseHTTPRequestHandler):
+    """Serves /users/<name>/repos like the GitHub API: paginated, with ETags and Link headers.
+
+    A 304 carries no Link header, so the client has to fall back to its cached page count.
+    """
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        page, per_page = int(query["page"][0]), int(query["per_page"][0])
+        repos = self.server.repos
+        body = json.dumps(repos[(page - 1) * per_page:page * per_page]).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        conditional = self.headers.get("If-None-Match")
+        status = 304 if conditional == etag else 200
+        self.server.log.append((page, conditional is not None, status))
+
+        self.send_response(status)
+        if status == 200:
+            last = max(1, -(-len(repos) // per_page))
+            base = f"http://{self.headers['Host']}{urlsplit(self.path).path}?per_page={per_page}"
+            links = [f'<{base}&page={last}>; rel="last"']
+            if page < last:
+                links.append(f'<{base}&page={page + 1}>; rel="next"')
+            self.send_header("ETag", etag)
+            self.send_header("Link", ", ".join(links))
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status == 200:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def repo(index):
+    return {"name": f"repo{index}", "fork": index % 2 == 1, "default_branch": "main",
+            "pushed_at": f"2024-01-0{index % 9 + 1}T00:00:00Z"}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), GitHubStub)
+    httpd.repos = [repo(i) for i in range(5)]
+    httpd.log = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(parallel_clone_repos, "GITHUB_API_URL", f"http://127.0.0.1:{httpd.server_port}")
+    monkeypatch.setattr(parallel_clone_repos, "LISTING_PAGE_SIZE", 2)
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def session_threads(monkeypatch):
+    """Record which threads each session was used from."""
+    used = {}
+    fetch = parallel_clone_repos._fetch_listing_page
+
+    def recording_fetch(session, *args):
+        used.setdefault(id(session), set()).add(threading.get_ident())
+        return fetch(session, *args)
+    monkeypatch.setattr(parallel_clone_repos, "_fetch_listing_page", recording_fetch)
+    return used
+
+
+def listed(server, tmp_path):
+    server.log.clear()
+    names = [r["name"] for r in parallel_clone_repos.list_repositories("org", cache_path=str(tmp_path / "cache.json"))]
+    return names, sorted(server.log)
+
+
+def test_pages_are_fetched_then_revalidated(server, tmp_path, session_threads):
+    names, log = listed(server, tmp_path)
+    assert names == [f"repo{i}" for i in range(5)]
+    assert log == [(1, False, 200), (2, False, 200), (3, False, 200)]
+
+    # Nothing changed: every page is answered with 304 and served from the cache.
+    names, log = listed(server, tmp_path)
+    assert names == [f"repo{i}" for i in range(5)]
+    assert log == [(1, True, 304), (2, True, 304), (3, True, 304)]
+
+    assert all(len(threads) == 1 for threads in session_threads.values())
+
+
+def test_new_pages_are_found_through_next_links(server, tmp_path):
+    listed(server, tmp_path)
+    server.repos += [repo(5), repo(6)]
+
+    names, log = listed(server, tmp_path)
+    assert names == [f"repo{i}" for i in range(7)]
+    # Pages 1 and 2 are unchanged. Page 3 has grown and links to page 4, which is new.
+    assert log == [(1, True, 304), (2, True, 304), (3, True, 200), (4, False, 200)]
+
+
+def test_get_repos_filters_forks(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The listing cache is written to the working directory
+    assert parallel_clone_repos.get_repos("org") == ["repo0", "repo2", "repo4"]
+    assert len(parallel_clone_repos.get_repos("org", include_fork=True)) == 5
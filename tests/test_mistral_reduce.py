@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain.schema")  # The prompt messages need LangChain.
+
+import llm_cache
+import mistral
+import providers
+import rate_limiter
+
+
+def count_tokens(text):
+    return len(text) // 4
+
+
+class StubEndpoint:
+    """Stands in for the Hugging Face endpoint: records prompt sizes and answers with long notes."""
+
+    def __init__(self, summary):
+        self.summary = summary
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(count_tokens("".join(message.content for message in messages)))
+        return self.summary
+
+
+@pytest.fixture
+def endpoint(monkeypatch, tmp_path):
+    """Register a stub client whose every summary fills most of a prompt."""
+    monkeypatch.setattr(mistral, "GetTokenCounter", lambda model: count_tokens)
+    monkeypatch.setattr(mistral, "CONTEXT_WINDOW", 4096)
+    monkeypatch.setattr(providers, "_FACTORIES", dict(providers._FACTORIES))
+    monkeypatch.setattr(providers, "_CLIENTS", {})
+    monkeypatch.setitem(rate_limiter.PROVIDER_LIMITS, "huggingface", (10 ** 9, None))
+    rate_limiter.GetRateLimiter.cache_clear()
+    cache = llm_cache.ResponseCache(str(tmp_path / "responses.sqlite"))
+    monkeypatch.setattr(llm_cache, "GetResponseCache", lambda: cache)
+
+    stub = StubEndpoint("summary line\n" * (mistral.CONTEXT_WINDOW // 6))
+    providers.RegisterProvider("huggingface")(lambda: stub)
+    yield stub
+    rate_limiter.GetRateLimiter.cache_clear()
+
+
+def test_every_prompt_fits_when_summaries_do_not_pack(endpoint):
+    files = [(f"file{i}.py", "x = 1\n" * 2000) for i in range(6)]
+    asyncio.run(mistral._GenerateReadme(files, model=None, max_concurrency=2, attributes={}))
+
+    assert max(endpoint.prompts) <= mistral.CONTEXT_WINDOW - mistral.MAX_NEW_TOKENS
+    assert len(endpoint.prompts) > 7  # Chunk summaries, pairwise merges and the final merge
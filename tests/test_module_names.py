@@ -0,0 +1,12 @@
+import os
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def module_names(*parts):
+    return {name for name in os.listdir(os.path.join(REPO_ROOT, *parts)) if name.endswith(".py")}
+
+
+def test_scripts_and_dataset_modules_do_not_shadow_each_other():
+    # conftest.py puts both directories on sys.path, so a shared name would load only one of the modules.
+    assert not module_names("scripts") & module_names("src", "data")
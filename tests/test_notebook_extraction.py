@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from prepare_dataset import RepoProcessor, _strip_notebook_outputs
+
+
+def code_cell(source, outputs):
+    return {"cell_type": "code", "execution_count": 1, "metadata": {}, "source": source, "outputs": outputs}
+
+
+def nbformat4(*cells):
+    return json.dumps({"cells": list(cells), "metadata": {}, "nbformat": 4, "nbformat_minor": 5},
+                      indent=1).encode()
+
+
+@pytest.fixture
+def processor(tmp_path):
+    return RepoProcessor(str(tmp_path))
+
+
+# Output strings that a naive scanner would misread as closing the string or the array.
+TRICKY_OUTPUTS = [
+    {"output_type": "stream", "name": "stdout", "text": ['quote \\" and ] } [ {\n', 'ends in a backslash \\\\']},
+    {"output_type": "stream", "name": "stdout", "text": ['"outputs": [\n', 'even run: \\\\\\\\"']},
+    {"output_type": "display_data", "metadata": {},
+     "data": {"image/png": "iVBORw0KGgo" * 100, "text/plain": ["[nested {\"list\": [1, [2]]}]"]}},
+]
+
+
+def test_strip_empties_every_outputs_array():
+    content = nbformat4(code_cell("a = 1", TRICKY_OUTPUTS), code_cell(["b = 2\n", "c = 3"], TRICKY_OUTPUTS))
+    stripped = json.loads(_strip_notebook_outputs(content))
+    expected = json.loads(content)
+    for cell in expected["cells"]:
+        cell["outputs"] = []
+    assert stripped == expected
+
+
+def test_strip_keeps_outputs_text_inside_sources():
+    # "outputs": [ inside a source string is code, not an outputs array.
+    source = 'print(\'"outputs": [\')\nx = "\\\\"'
+    content = nbformat4(code_cell(source, TRICKY_OUTPUTS))
+    assert json.loads(_strip_notebook_outputs(content))["cells"][0]["source"] == source
+
+
+def test_strip_compact_json():
+    content = json.dumps({"cells": [code_cell("x", TRICKY_OUTPUTS)]}, separators=(",", ":")).encode()
+    assert json.loads(_strip_notebook_outputs(content))["cells"][0]["outputs"] == []
+
+
+def test_strip_rejects_truncated_notebook():
+    content = nbformat4(code_cell("a = 1", TRICKY_OUTPUTS))
+    with pytest.raises(ValueError):
+        _strip_notebook_outputs(content[:content.index(b"iVBOR") + 10])
+
+
+def test_process_nbformat4_extracts_code_cells(processor):
+    content = nbformat4(
+        code_cell(["import os\n", "print(os.sep)"], TRICKY_OUTPUTS),
+        {"cell_type": "markdown", "metadata": {}, "source": "# Title"},
+        code_cell("!pip install foo", []),
+        code_cell("%%capture\nnoisy()", TRICKY_OUTPUTS),
+        code_cell('s = "tab\\t \\" quote"', []),
+    )
+    assert processor._process_notebook(content) == 'import os\nprint(os.sep)\ns = "tab\\t \\" quote"'
+
+
+def test_process_nbformat3_reads_worksheet_inputs(processor):
+    notebook = {
+        "nbformat": 3,
+        "metadata": {},
+        "worksheets": [
+            {"cells": [
+                {"cell_type": "code", "input": ["x = 1\n", "y = 2"], "language": "python",
+                 "outputs": [{"output_type": "pyout", "text": ["] \\\" ["]}]},
+                {"cell_type": "markdown", "source": ["Notes"]},
+            ]},
+            {"cells": [{"cell_type": "code", "input": "z = 3", "outputs": []}]},
+        ],
+    }
+    assert processor._process_notebook(json.dumps(notebook).encode()) == "x = 1\ny = 2\nz = 3"
+
+
+def test_process_invalid_notebook_returns_empty(processor):
+    assert processor._process_notebook(b'{"cells": [') == ""
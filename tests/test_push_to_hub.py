@@ -0,0 +1,63 @@
+import os
+
+import pyarrow as pa
+import pytest
+
+from common import metrics
+from push_to_hub import load_shard, process_files
+from shard_writer import FEATHER_FORMAT, PARQUET_FORMAT, ShardWriter
+
+ROWS = 200
+
+
+def make_row(number):
+    return {
+        "repo_id": f"repo-{number}",
+        "file_structure": [{"path": "main.py", "type": "file"}],
+        "readme_content": f"# Project {number}\n" + "Some words about it. " * 100,
+        "key_code_snippets": [{"path": "main.py", "content": f"print({number})\n" * 50}],
+    }
+
+
+def write_shards(directory, file_format, compression="default", shards=2):
+    with ShardWriter(str(directory), file_format, rows_per_shard=ROWS // shards, compression=compression) as writer:
+        for number in range(ROWS):
+            writer.write_row(make_row(number))
+    return [os.path.basename(path) for path in writer.shard_paths]
+
+
+def test_process_files_reads_shards_from_a_local_directory(tmp_path):
+    files = write_shards(tmp_path, FEATHER_FORMAT)
+
+    table = process_files(files, str(tmp_path), max_workers=2)
+
+    assert sorted(table["repo_id"].to_pylist()) == sorted(f"repo-{number}" for number in range(ROWS))
+    assert table.column("key_code_snippets")[3].as_py() == make_row(3)["key_code_snippets"]
+
+
+def test_uncompressed_feather_shards_are_read_without_copying(tmp_path):
+    filename, = write_shards(tmp_path, FEATHER_FORMAT, shards=1)
+
+    allocated = pa.total_allocated_bytes()
+    table = load_shard(str(tmp_path), filename)
+    # Only the table's metadata is allocated; the buffers stay in the memory map.
+    assert pa.total_allocated_bytes() - allocated < table.nbytes // 100
+
+
+@pytest.mark.parametrize("file_format, compression", [(FEATHER_FORMAT, "zstd"), (PARQUET_FORMAT, "default")])
+def test_compressed_shards_are_decoded(tmp_path, file_format, compression):
+    filename, = write_shards(tmp_path, file_format, compression, shards=1)
+
+    table = load_shard(str(tmp_path), filename)
+    assert table.num_rows == ROWS
+    assert table["readme_content"][7].as_py() == make_row(7)["readme_content"]
+
+
+def test_missing_shard_is_skipped(tmp_path):
+    files = write_shards(tmp_path, FEATHER_FORMAT)
+    metrics.METRICS.reset()
+
+    table = process_files(files + ["df_chunk_9_100.ftr"], str(tmp_path))
+
+    assert table.num_rows == ROWS
+    assert metrics.METRICS.snapshot()["counters"][("shards_failed", ())] == 1
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+import rate_limiter
+from rate_limiter import CallWithRateLimit, GetRateLimiter, RateLimiter
+
+
+class RateLimitError(Exception):
+    """Shaped like the provider SDK errors: a 429 status and a Retry-After header."""
+
+    class Response:
+        def __init__(self, retry_after):
+            self.status_code = 429
+            self.headers = {"retry-after": str(retry_after)}
+
+    def __init__(self, retry_after):
+        super().__init__("429 Too Many Requests")
+        self.response = self.Response(retry_after)
+
+
+class ThrottlingBackend:
+    """Fake provider that accepts `allowed` requests per window and throttles the rest."""
+
+    def __init__(self, allowed, window, retry_after):
+        self.allowed = allowed
+        self.window = window
+        self.retry_after = retry_after
+        self.accepted = []
+        self.rejected = 0
+
+    def __call__(self):
+        now = time.monotonic()
+        recent = [t for t in self.accepted if now - t < self.window]
+        if len(recent) >= self.allowed:
+            self.rejected += 1
+            raise RateLimitError(self.retry_after)
+        self.accepted.append(now)
+        return len(self.accepted)
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setitem(rate_limiter.PROVIDER_LIMITS, "fake", (6000, 10 ** 6))
+    monkeypatch.setattr(rate_limiter, "BACKOFF_BASE", 0.01)
+    GetRateLimiter.cache_clear()
+    yield "fake"
+    GetRateLimiter.cache_clear()
+
+
+def test_idle_limiter_sends_oversized_request_at_once(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(rate_limiter.time, "sleep", sleeps.append)
+    limiter = RateLimiter(60, 32000)
+    limiter.acquire(tokens=100000)
+    assert sleeps == []
+
+
+def test_second_oversized_request_waits_for_one_refill():
+    limiter = RateLimiter(60, 32000)
+    assert limiter._reserve(100000) == 0
+    # The bucket is empty now; refilling all 32000 tokens takes one minute.
+    assert limiter._reserve(100000) == pytest.approx(60, rel=0.01)
+
+
+def test_retries_until_throttling_backend_accepts(provider):
+    backend = ThrottlingBackend(allowed=2, window=0.05, retry_after=0.02)
+    results = [CallWithRateLimit(provider, backend, tokens=10) for _ in range(5)]
+
+    assert results == [1, 2, 3, 4, 5]
+    assert backend.rejected > 0
+
+
+def test_throttling_lowers_rate_and_success_restores_it(provider):
+    limiter = GetRateLimiter(provider)
+    configured = limiter._requests.configured_rate
+    backend = ThrottlingBackend(allowed=1, window=0.05, retry_after=0.01)
+    CallWithRateLimit(provider, backend)
+    CallWithRateLimit(provider, backend)
+    assert limiter._requests.rate < configured
+
+    for _ in range(40):
+        limiter.succeeded()
+    assert limiter._requests.rate == configured
+
+
+def test_gives_up_after_max_retries(provider):
+    backend = ThrottlingBackend(allowed=0, window=1, retry_after=0.001)
+    with pytest.raises(RateLimitError):
+        CallWithRateLimit(provider, backend, max_retries=2)
+    assert backend.rejected == 3
+
+
+def test_other_errors_are_not_retried(provider):
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        CallWithRateLimit(provider, failing)
+    assert len(calls) == 1
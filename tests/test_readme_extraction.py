@@ -0,0 +1,35 @@
+import os
+
+from common.file_filter import LONG_LINE_BYTES
+from prepare_dataset import RepoProcessor
+
+BADGE_LINE = "".join(f'<a href="https://example.com/{i}"><img src="badge-{i}.svg"></a>' for i in range(100))
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_readme_is_kept_when_it_looks_generated(tmp_path):
+    readme = "<!-- DO NOT EDIT: rendered from docs/ -->\n" + BADGE_LINE + "\n# Project\n"
+    write(str(tmp_path / "repo" / "README.md"), readme)
+
+    row = RepoProcessor(str(tmp_path))._build_repo_data("repo")
+    assert row["readme_content"] == readme
+
+
+def test_readme_with_one_long_line_is_kept(tmp_path):
+    readme = BADGE_LINE + "\n"
+    assert len(BADGE_LINE) > LONG_LINE_BYTES
+    write(str(tmp_path / "repo" / "README.md"), readme)
+
+    assert RepoProcessor(str(tmp_path))._build_repo_data("repo")["readme_content"] == readme
+
+
+def test_generated_key_files_are_still_skipped(tmp_path):
+    write(str(tmp_path / "repo" / "README.md"), "# Project\n")
+    write(str(tmp_path / "repo" / "main.py"), "# Code generated by protoc. DO NOT EDIT.\nx = 1\n")
+
+    assert RepoProcessor(str(tmp_path))._build_repo_data("repo")["key_code_snippets"] == []